@@ -1,65 +1,133 @@
-from flask import Flask,request,render_template
-import numpy as np
-import pandas as pd
+from flask import Flask,request,render_template,jsonify,g
+import hmac
 import os
-import logging
+import time
 
-from sklearn.preprocessing import StandardScaler
-from src.pipepline.predict_pipeline import CustomData,PredictPipeline
+from src.pipepline.predict_pipeline import CustomData,CustomDataBatch,PredictPipeline
+from src.pipepline.micro_batcher import MicroBatcher
+from src.pipepline.readiness import ReadinessProbe
+from src.logger import logging, log_stats, sampled
+from src import metrics
+from src.profiling import RequestProfiler
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 application=Flask(__name__)
 
 app=application
 
+# Shared by every request; artifacts are loaded once per worker by the model registry.
+predict_pipeline=PredictPipeline()
+# Coalesces concurrent /predictdata requests when PREDICT_MICROBATCH=1; only cache misses reach it.
+micro_batcher=MicroBatcher(lambda features: predict_pipeline.predict(features, use_cache=False))
+# /readyz: registry state plus a canary prediction cached for READINESS_CANARY_INTERVAL seconds.
+readiness_probe=ReadinessProbe(predict_pipeline)
+
+# Stages timed here; artifact loading, transform and predict are timed inside PredictPipeline.
+# Parsing and validating the form fields.
+_PARSE_STAGE=metrics.stage("parse_form")
+# The form data as the record PredictPipeline scores (observed there only for CustomData input).
+_FEATURES_STAGE=metrics.stage("build_features")
+_BATCH_FEATURES_STAGE=metrics.stage("build_batch_frame")
+_RENDER_STAGE=metrics.stage("render_template")
+_IN_FLIGHT=metrics.IN_FLIGHT.labels()
+metrics.register_stats("model_registry", predict_pipeline.registry.stats)
+metrics.register_stats("micro_batcher", lambda: micro_batcher.stats() if micro_batcher.config.enabled else None)
+metrics.register_stats("prediction_cache", lambda: predict_pipeline.cache.stats() if predict_pipeline.cache.config.enabled else None)
+metrics.register_stats("prediction_lookup", lambda: predict_pipeline.lookup_stats if predict_pipeline.config.lookup_table else None)
+metrics.register_stats("logging", log_stats)
+# Profiles the next N prediction requests (PROFILE_REQUESTS or POST /admin/profile) into logs/profiles.
+request_profiler=RequestProfiler()
+_PROFILED_PATHS=("/predictdata", "/predict/batch")
+
+@app.before_request
+def _start_request():
+    g.request_started = time.perf_counter()
+    _IN_FLIGHT.inc()
+    if request_profiler.remaining and request.path in _PROFILED_PATHS:
+        g.profile = request_profiler.begin()
+
+@app.after_request
+def _record_request(response):
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.REQUEST_SECONDS.labels(route, request.method).observe(time.perf_counter() - g.request_started)
+    metrics.REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+    return response
+
+@app.teardown_request
+def _finish_request(error=None):
+    _IN_FLIGHT.dec()
+    profile = g.pop("profile", None)
+    if profile is not None:
+        request_profiler.end(profile)
+    if error is not None:
+        metrics.record_error(request.url_rule.rule if request.url_rule is not None else "unmatched", error)
+
 ##Route for a home page
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/livez')
+def livez():
+    # Process is up and serving requests; no I/O and no model access.
+    return {"status": "alive"}
+
+@app.route('/readyz')
+def readyz():
+    ready, report = readiness_probe.check()
+    return jsonify(report), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@app.route('/admin/profile',methods=['GET','POST'])
+def admin_profile():
+    # Hidden unless PROFILE_ADMIN_TOKEN is set; the token travels in the X-Admin-Token header.
+    token = request_profiler.config.admin_token
+    if not token:
+        return jsonify(error="Not found"), 404
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return jsonify(error="Forbidden"), 403
+    if request.method == 'POST':
+        options = request.get_json(silent=True) or request.form
+        try:
+            requests = int(options.get("requests", 100))
+            if requests <= 0:
+                raise ValueError("requests must be positive")
+            return jsonify(request_profiler.arm(requests, options.get("mode")))
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+    return jsonify(request_profiler.status())
+
 @app.route('/health')
 def health_check():
     try:
-        logger.info("Health check started")
-        
-        # Test if model files exist
-        model_path = os.path.join("artifacts", "model.pkl")
-        preprocessor_path = os.path.join("artifacts", "preprocessor.pkl")
-        
-        model_exists = os.path.exists(model_path)
-        preprocessor_exists = os.path.exists(preprocessor_path)
-        
-        logger.info(f"Model exists: {model_exists}, Preprocessor exists: {preprocessor_exists}")
-        
-        # Test if model can be loaded
-        if model_exists and preprocessor_exists:
-            try:
-                from src.utils import load_object
-                model = load_object(model_path)
-                preprocessor = load_object(preprocessor_path)
-                model_loaded = True
-                logger.info("Model and preprocessor loaded successfully")
-            except Exception as load_error:
-                logger.error(f"Error loading model: {str(load_error)}")
-                model_loaded = False
-        else:
-            model_loaded = False
-            
+        # Loads the artifacts on a fresh worker, so the status says whether it can serve;
+        # afterwards this reads the loaded snapshot instead of the pickles.
+        registry = predict_pipeline.registry
+        registry.peek() or registry.get()
+        registry_stats = registry.stats()
+        model_loaded = registry_stats["loaded"]
         return {
             "status": "healthy" if model_loaded else "unhealthy",
-            "model_exists": model_exists,
-            "preprocessor_exists": preprocessor_exists,
+            # The files the registry actually serves: the published version's once current.json exists.
+            "model_path": registry_stats.get("model_path"),
+            "preprocessor_path": registry_stats.get("preprocessor_path"),
+            "version": registry_stats.get("version"),
             "model_loaded": model_loaded,
             "current_directory": os.getcwd(),
             "artifacts_directory": os.path.exists("artifacts"),
-            "artifacts_contents": os.listdir("artifacts") if os.path.exists("artifacts") else []
+            "model_registry": registry_stats,
+            "micro_batcher": micro_batcher.stats() if micro_batcher.config.enabled else None,
+            "prediction_lookup": predict_pipeline.lookup_stats if predict_pipeline.config.lookup_table else None,
+            "prediction_cache": predict_pipeline.cache.stats() if predict_pipeline.cache.config.enabled else None,
+            "logging": log_stats()
         }
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {
             "status": "unhealthy",
             "error": str(e),
@@ -71,63 +139,66 @@ def predict_datapoint():
     if request.method=='GET':
         return render_template('home.html')
     else:
+        started = time.perf_counter()
         try:
-            logger.info("Prediction request received")
-            
-            # Validate form data
-            gender = request.form.get('gender')
-            ethnicity = request.form.get('ethnicity')
-            parental_level_of_education = request.form.get('parental_level_of_education')
-            lunch = request.form.get('lunch')
-            test_preparation_course = request.form.get('test_preparation_course')
-            writing_score = request.form.get('writing_score')
-            reading_score = request.form.get('reading_score')
-            
-            logger.info(f"Form data: gender={gender}, ethnicity={ethnicity}, parental_education={parental_level_of_education}, lunch={lunch}, test_course={test_preparation_course}, writing={writing_score}, reading={reading_score}")
-            
-            # Check if all required fields are present
-            if not all([gender, ethnicity, parental_level_of_education, lunch, test_preparation_course, writing_score, reading_score]):
-                return render_template('home.html', results="Error: All fields are required")
-            
-            # Validate numeric scores
+            # Same parsing and messages as asgi.py.
             try:
-                writing_score = float(writing_score)
-                reading_score = float(reading_score)
-            except ValueError:
-                return render_template('home.html', results="Error: Reading and writing scores must be valid numbers")
-            
-            data = CustomData(
-                gender=gender,
-                race_ethnicity=ethnicity,
-                parental_level_of_education=parental_level_of_education,
-                lunch=lunch,
-                test_preparation_course=test_preparation_course,
-                writing_score=writing_score,
-                reading_score=reading_score
-            )
-            pred_df = data.get_data_as_data_frame()
-            logger.info(f"DataFrame created: {pred_df.shape}")
-
-            predict_pipeline=PredictPipeline()
-            logger.info("Starting prediction...")
-            results=predict_pipeline.predict(pred_df)
+                data = CustomData.from_form(request.form)
+            except ValueError as e:
+                return render_template('home.html', results=f"Error: {e}")
+            _PARSE_STAGE.observe(time.perf_counter() - started)
+
+            # from_form validated the fields already.
+            with _FEATURES_STAGE.time():
+                record = data.as_record(validate=False)
+            results=predict_pipeline.predict(record, batcher=micro_batcher if micro_batcher.config.enabled else None)
             prediction_value = float(results[0])  # Convert numpy.float64 to Python float
-            logger.info(f"Prediction completed: {prediction_value}")
-            return render_template('home.html',results=prediction_value)
+            # One line per request; the inputs only on a sampled fraction of them.
+            fields = {"route": "/predictdata", "ms": round((time.perf_counter() - started) * 1000, 3)}
+            if sampled():
+                fields.update(record, prediction=prediction_value)
+            logger.info("Prediction completed", extra={"fields": fields})
+            with _RENDER_STAGE.time():
+                return render_template('home.html',results=prediction_value)
         except FileNotFoundError as e:
-            logger.error(f"File not found error: {str(e)}")
+            metrics.record_error("/predictdata", e)
+            logger.error("File not found error: %s", e)
             return render_template('home.html', results=f"Error: Model files not found. Please check deployment.")
         except ValueError as e:
-            logger.error(f"Value error: {str(e)}")
+            metrics.record_error("/predictdata", e)
+            logger.error("Value error: %s", e)
             return render_template('home.html', results=f"Error: Invalid input data - {str(e)}")
         except ImportError as e:
-            logger.error(f"Import error: {str(e)}")
+            metrics.record_error("/predictdata", e)
+            logger.error("Import error: %s", e)
             return render_template('home.html', results=f"Error: Missing dependencies - {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            metrics.record_error("/predictdata", e)
+            logger.exception("Unexpected error: %s", e)
             return render_template('home.html', results=f"Error: An unexpected error occurred - {str(e)}")
+
+@app.route('/predict/batch',methods=['POST'])
+def predict_batch():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify(error="Request body must be JSON"), 400
+    started = time.perf_counter()
+    try:
+        pred_df = CustomDataBatch(payload).get_data_as_data_frame()
+        _BATCH_FEATURES_STAGE.observe(time.perf_counter() - started)
+        if len(pred_df) > predict_pipeline.config.batch_max_rows:
+            return jsonify(error=f"Batch exceeds {predict_pipeline.config.batch_max_rows} rows"), 413
+        results = predict_pipeline.predict_batch(pred_df)
+        logger.info("Batch prediction completed", extra={"fields": {
+            "route": "/predict/batch", "rows": len(results), "ms": round((time.perf_counter() - started) * 1000, 3)}})
+        return jsonify(predictions=results.tolist(), count=len(results))
+    except ValueError as e:
+        metrics.record_error("/predict/batch", e)
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        metrics.record_error("/predict/batch", e)
+        logger.error("Batch prediction failed: %s", e)
+        return jsonify(error=f"An unexpected error occurred - {str(e)}"), 500
     
 ##if __name__=="__main__":
   ##  app.run(host="0.0.0.0",debug=True)    
@@ -1,14 +1,13 @@
 from flask import Flask,request,render_template
-import numpy as np
-import pandas as pd
 
-from sklearn.preprocessing import StandardScaler
 from src.pipepline.predict_pipeline import CustomData,PredictPipeline
 
 application=Flask(__name__)
 
 app=application
 
+predict_pipeline=PredictPipeline()
+
 ##Route for a home page
 
 @app.route('/')
@@ -29,11 +28,7 @@ def predict_datapoint():
             writing_score=float(request.form.get('writing_score')),
             reading_score=float(request.form.get('reading_score'))
         )
-        pred_df = data.get_data_as_data_frame()
-        print(pred_df)
-
-        predict_pipeline=PredictPipeline()
-        results=predict_pipeline.predict(pred_df)
+        results=predict_pipeline.predict(data)
         return render_template('home.html',results=results[0])
     
 if __name__=="__main__":
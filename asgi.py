@@ -0,0 +1,227 @@
+'''
+ASGI entry point serving the same routes as app.py.
+
+Inference runs on a bounded pool (src/pipepline/inference_pool.py) so the
+event loop keeps accepting connections while models score, and requests
+beyond the pool's queue limit get a 503 with Retry-After instead of waiting.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+INFERENCE_POOL (thread|process), INFERENCE_POOL_WORKERS and
+INFERENCE_POOL_MAX_QUEUE size the pool.
+'''
+import asyncio
+import json
+import os
+import time
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src import metrics
+from src.logger import logging
+from src.pipepline.inference_pool import InferencePool, PoolSaturated
+from src.pipepline.predict_pipeline import CustomData, CustomDataBatch, PredictPipeline
+from src.pipepline.readiness import ReadinessProbe
+
+MAX_BODY_BYTES = int(os.environ.get("ASGI_MAX_BODY_BYTES", str(32 * 1024 * 1024)))
+
+_ENDPOINTS = {"index": "/", "predict_datapoint": "/predictdata"}
+
+templates = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")),
+    autoescape=select_autoescape(["html"]),
+)
+templates.globals["url_for"] = lambda endpoint, **_: _ENDPOINTS[endpoint]
+
+predict_pipeline = PredictPipeline()
+inference_pool = InferencePool(predict_pipeline)
+readiness_probe = ReadinessProbe(predict_pipeline)
+# With INFERENCE_POOL=process the pipeline stages are timed in the worker processes, not here.
+metrics.register_stats("inference_pool", inference_pool.stats)
+_IN_FLIGHT = metrics.IN_FLIGHT.labels()
+_FEATURES_STAGE = metrics.stage("build_features")
+# Route and method of the request the current task is serving, for the response counter.
+_route = ContextVar("route", default="unmatched")
+_method = ContextVar("method", default="GET")
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        size += len(chunks[-1])
+        if size > MAX_BODY_BYTES:
+            raise _BodyTooLarge()
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _respond(send, status, body, content_type, headers=()):
+    metrics.REQUESTS.labels(_route.get(), _method.get(), str(status)).inc()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        + [(name.encode(), value.encode()) for name, value in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _html(send, template, status=200, headers=(), **context):
+    body = templates.get_template(template).render(**context).encode()
+    return _respond(send, status, body, "text/html; charset=utf-8", headers)
+
+
+def _json(send, payload, status=200, headers=()):
+    return _respond(send, status, json.dumps(payload).encode(), "application/json", headers)
+
+
+async def _run(method, features):
+    return await asyncio.wrap_future(inference_pool.submit(method, features))
+
+
+async def predict_datapoint(receive, send):
+    form = {name: values[0] for name, values in parse_qs((await _read_body(receive)).decode()).items()}
+    try:
+        data = CustomData.from_form(form)
+    except ValueError as e:
+        return await _html(send, "home.html", results=f"Error: {e}")
+    with _FEATURES_STAGE.time():
+        # from_form validated the fields already.
+        record = data.as_record(validate=False)
+    try:
+        results = await _run("predict", record)
+    except PoolSaturated as e:
+        metrics.record_error("/predictdata", e)
+        return await _html(send, "home.html", status=503, headers=[("retry-after", "1")],
+                           results="Error: The server is busy, please try again")
+    except Exception as e:
+        metrics.record_error("/predictdata", e)
+        logging.error(f"Prediction failed: {e}")
+        return await _html(send, "home.html", results=f"Error: An unexpected error occurred - {e}")
+    return await _html(send, "home.html", results=float(results[0]))
+
+
+async def predict_batch(receive, send):
+    try:
+        payload = json.loads(await _read_body(receive))
+    except ValueError:
+        return await _json(send, {"error": "Request body must be JSON"}, 400)
+    try:
+        # Validation is vectorized pandas work; keep it off the event loop too.
+        pred_df = await asyncio.get_running_loop().run_in_executor(None, CustomDataBatch(payload).get_data_as_data_frame)
+        if len(pred_df) > predict_pipeline.config.batch_max_rows:
+            return await _json(send, {"error": f"Batch exceeds {predict_pipeline.config.batch_max_rows} rows"}, 413)
+        results = await _run("predict_batch", pred_df)
+    except PoolSaturated as e:
+        metrics.record_error("/predict/batch", e)
+        return await _json(send, {"error": "The server is busy, please try again"}, 503, [("retry-after", "1")])
+    except ValueError as e:
+        metrics.record_error("/predict/batch", e)
+        return await _json(send, {"error": str(e)}, 400)
+    except Exception as e:
+        metrics.record_error("/predict/batch", e)
+        logging.error(f"Batch prediction failed: {e}")
+        return await _json(send, {"error": f"An unexpected error occurred - {e}"}, 500)
+    return await _json(send, {"predictions": results.tolist(), "count": len(results)})
+
+
+async def livez(receive, send):
+    return await _json(send, {"status": "alive"})
+
+
+async def readyz(receive, send):
+    if inference_pool.config.kind == "process":
+        # The models live in the pool's workers; they are ready once the pool has started.
+        ready = inference_pool.started
+        report = {"status": "ready" if ready else "not_ready", "inference_pool": inference_pool.stats()}
+    else:
+        ready, report = await asyncio.get_running_loop().run_in_executor(None, readiness_probe.check)
+    return await _json(send, report, 200 if ready else 503)
+
+
+async def metrics_endpoint(receive, send):
+    return await _respond(send, 200, metrics.render().encode(), "text/plain; version=0.0.4; charset=utf-8")
+
+
+def _registry_stats():
+    # Loads the artifacts on a fresh worker, like app.py's /health.
+    registry = predict_pipeline.registry
+    registry.peek() or registry.get()
+    return registry.stats()
+
+
+async def health(receive, send):
+    report = {"inference_pool": inference_pool.stats()}
+    try:
+        if inference_pool.config.kind == "process":
+            # The models live in the pool's workers, which load them when the pool starts.
+            healthy = inference_pool.started
+        else:
+            report["model_registry"] = await asyncio.get_running_loop().run_in_executor(None, _registry_stats)
+            healthy = report["model_registry"]["loaded"]
+    except Exception as e:
+        logging.error(f"Health check failed: {e}")
+        healthy, report["error"] = False, str(e)
+    return await _json(send, {"status": "healthy" if healthy else "unhealthy", **report})
+
+
+_ROUTES = {
+    ("GET", "/"): lambda receive, send: _html(send, "index.html"),
+    ("GET", "/predictdata"): lambda receive, send: _html(send, "home.html"),
+    ("POST", "/predictdata"): predict_datapoint,
+    ("POST", "/predict/batch"): predict_batch,
+    ("GET", "/health"): health,
+    ("GET", "/livez"): livez,
+    ("GET", "/readyz"): readyz,
+    ("GET", "/metrics"): metrics_endpoint,
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                # Loads the artifacts (in every worker for a process pool) before traffic arrives.
+                await asyncio.get_running_loop().run_in_executor(None, inference_pool.start)
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            inference_pool.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    handler = _ROUTES.get((scope["method"], scope["path"]))
+    _route.set(scope["path"] if any(path == scope["path"] for _, path in _ROUTES) else "unmatched")
+    _method.set(scope["method"])
+    if handler is None:
+        allowed = _route.get() != "unmatched"
+        return await _json(send, {"error": "Method not allowed" if allowed else "Not found"}, 405 if allowed else 404)
+    started = time.perf_counter()
+    _IN_FLIGHT.inc()
+    try:
+        await handler(receive, send)
+    except _BodyTooLarge:
+        await _json(send, {"error": f"Request body exceeds {MAX_BODY_BYTES} bytes"}, 413)
+    except Exception as e:
+        metrics.record_error(scope["path"], e)
+        raise
+    finally:
+        _IN_FLIGHT.dec()
+        metrics.REQUEST_SECONDS.labels(scope["path"], scope["method"]).observe(time.perf_counter() - started)
@@ -0,0 +1,94 @@
+'''
+Cold-start comparison of the dill pickles against the compact artifact format.
+
+    python -m benchmarks.artifact_load [--artifacts-dir artifacts] [--repeat 5]
+
+Every measurement runs in a fresh interpreter so import and page-cache
+effects are counted the way a new worker sees them. Reports the median
+load time (imports included), max RSS after loading plus one prediction,
+and checks that both formats predict the same values.
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_CHILD = r'''
+import json, resource, sys, time
+import warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import pandas as pd
+fmt, artifacts_dir, sample_path = sys.argv[1:4]
+if fmt == "dill":
+    from src.utils import load_object
+    model = load_object(f"{artifacts_dir}/model.pkl")
+    preprocessor = load_object(f"{artifacts_dir}/preprocessor.pkl")
+else:
+    from src.artifact_format import load_artifacts
+    model, preprocessor = load_artifacts(f"{artifacts_dir}/compact")
+load_seconds = time.perf_counter() - start
+sample = pd.read_csv(sample_path)
+start = time.perf_counter()
+preds = model.predict(preprocessor.transform(sample))
+first_predict_seconds = time.perf_counter() - start
+print(json.dumps({
+    "load_seconds": load_seconds,
+    "first_predict_seconds": first_predict_seconds,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "sklearn_imported": "sklearn" in sys.modules,
+    "predictions": [float(value) for value in preds],
+}))
+'''
+
+
+def run_once(fmt, artifacts_dir, sample_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, fmt, artifacts_dir, sample_path],
+        capture_output=True, text=True, check=True, env=env, cwd=root,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--artifacts-dir", default="artifacts")
+    parser.add_argument("--sample", default=os.path.join("artifacts", "test.csv"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.artifacts_dir, "compact", "manifest.json")):
+        from src.artifact_format import main as export_main
+
+        export_main(["export", "--artifacts-dir", args.artifacts_dir])
+
+    results = {}
+    for fmt in ("dill", "compact"):
+        runs = [run_once(fmt, args.artifacts_dir, args.sample) for _ in range(args.repeat)]
+        results[fmt] = {
+            "load_seconds_median": statistics.median(run["load_seconds"] for run in runs),
+            "first_predict_seconds_median": statistics.median(run["first_predict_seconds"] for run in runs),
+            "maxrss_mb_median": statistics.median(run["maxrss_mb"] for run in runs),
+            "sklearn_imported": runs[0]["sklearn_imported"],
+            "predictions": runs[0]["predictions"],
+        }
+
+    diff = max(
+        (abs(a - b) for a, b in zip(results["dill"]["predictions"], results["compact"]["predictions"])),
+        default=0.0,
+    )
+    for fmt, result in results.items():
+        result.pop("predictions")
+        print(f"{fmt:>8}: load {result['load_seconds_median'] * 1000:8.1f} ms  "
+              f"first predict {result['first_predict_seconds_median'] * 1000:7.2f} ms  "
+              f"max RSS {result['maxrss_mb_median']:7.1f} MB  sklearn imported: {result['sklearn_imported']}")
+    print(f"max |prediction difference|: {diff:.3g}")
+    return 0 if diff < 1e-6 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
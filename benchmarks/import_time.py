@@ -0,0 +1,105 @@
+'''
+Startup import cost of the serving entry points, with a regression guard.
+
+    python -m benchmarks.import_time [--modules app application asgi] [--repeat 5]
+                                     [--baseline FILE [--tolerance 0.25]] [--write-baseline FILE]
+
+Each module is imported in a fresh interpreter under `python -X importtime`,
+from an empty working directory. The check fails (exit 1) when importing it
+pulls in a training-only library, creates a logs/ directory, or (with
+--baseline) takes more than `tolerance` longer than the recorded median.
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only needed once a pickled sklearn/XGBoost/CatBoost model is actually loaded, or for training.
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "dill", "xgboost", "catboost", "matplotlib", "seaborn")
+
+_CHILD = "import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+
+
+def parse_importtime(stderr):
+    '''[(depth, name, self_us, cumulative_us)] from `-X importtime` output.'''
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module):
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module)],
+            capture_output=True, text=True, cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT),
+        )
+        created_logs = os.path.exists(os.path.join(cwd, "logs"))
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total_us = next(cumulative for depth, name, _, cumulative in rows if depth == 0 and name == module)
+    return {
+        "total_ms": total_us / 1000,
+        "modules": json.loads(result.stdout.strip().splitlines()[-1]),
+        "created_logs": created_logs,
+        "rows": rows,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["app", "application", "asgi"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest direct imports to list")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--write-baseline", default=None)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            baseline = json.load(file_obj)
+
+    failures, medians = [], {}
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        medians[module] = statistics.median(run["total_ms"] for run in runs)
+        print(f"{module}: median {medians[module]:.1f} ms over {args.repeat} runs")
+
+        direct = sorted(
+            ((cumulative, name) for depth, name, _, cumulative in runs[-1]["rows"] if depth == 1),
+            reverse=True,
+        )
+        for cumulative, name in direct[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        heavy = sorted({name.split(".")[0] for name in runs[-1]["modules"]} & set(HEAVY_MODULES))
+        if heavy:
+            failures.append(f"import {module} loads {', '.join(heavy)}")
+        if any(run["created_logs"] for run in runs):
+            failures.append(f"import {module} creates a logs/ directory")
+        if module in baseline and medians[module] > baseline[module] * (1 + args.tolerance):
+            failures.append(
+                f"import {module} took {medians[module]:.1f} ms, over {baseline[module]:.1f} ms + {args.tolerance:.0%}"
+            )
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as file_obj:
+            json.dump(medians, file_obj, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+'''
+Inference latency and throughput, with a regression guard.
+
+    python -m benchmarks.inference [--sample artifacts/raw.csv] [--sizes 1 10 100 1000 10000 100000]
+                                   [--runs 3] [--output FILE] [--baseline FILE [--tolerance 0.35]]
+
+Measures, from the repository root:
+
+    cold_load.<format>.seconds      fresh interpreter: import, load artifacts, first prediction
+    predict.single.p50_ms / p99_ms  PredictPipeline.predict on one CustomData
+    predict.rows_per_sec.<n>        PredictPipeline.predict on an n-row DataFrame
+    predict_batch.rows_per_sec.<n>  PredictPipeline.predict_batch (validation included)
+    flask.predictdata.p50_ms/p99_ms POST /predictdata through the Flask test client
+    flask.batch.rows_per_sec.<n>    POST /predict/batch with n JSON records
+
+Each metric is the median over --runs passes, which keeps a shared or
+single-core machine's run-to-run noise inside the tolerance. Results are
+written as JSON (--output). Every metric is compared against --baseline,
+by default the committed benchmarks/baselines/inference.json, and the run
+fails (exit 1) when a latency grows, or a throughput drops, by more than
+`tolerance` (twice that for p99 latencies); --baseline "" skips the
+comparison. Runs are only comparable on the same machine with the same
+PREDICT_*/MODEL_* settings, which are recorded in the output: on another
+machine, record a baseline there first (--output FILE) and compare
+against that.
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "inference.json")
+_SETTINGS_PREFIXES = ("PREDICT_", "MODEL_", "LOG_")
+
+_COLD_CHILD = r'''
+import time
+start = time.perf_counter()
+import warnings
+warnings.filterwarnings("ignore")
+from src.pipepline.predict_pipeline import PredictPipeline
+PredictPipeline().warm_up(watch=False)
+print(time.perf_counter() - start)
+'''
+
+
+def percentiles(timings):
+    '''(p50, p99) of per-call timings, in milliseconds.'''
+    timings = sorted(timings)
+    return statistics.median(timings) * 1000, timings[max(int(len(timings) * 0.99) - 1, 0)] * 1000
+
+
+def time_calls(fn, min_time, min_calls=3, warmup=2):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_calls or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def cold_load(artifact_format, repeat):
+    env = dict(os.environ, MODEL_ARTIFACT_FORMAT=artifact_format, MODEL_CHECK_INTERVAL="0", PYTHONPATH=ROOT)
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", _COLD_CHILD], capture_output=True, text=True, cwd=ROOT, env=env)
+        if result.returncode != 0:
+            raise RuntimeError(f"cold load ({artifact_format}) failed:\n{result.stderr[-2000:]}")
+        runs.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(runs)
+
+
+def resample(frame, size):
+    return frame.iloc[np.arange(size) % len(frame)].reset_index(drop=True)
+
+
+def bench_pipeline(results, frame, sizes, min_time):
+    from src.pipepline.predict_pipeline import CustomData, CustomDataBatch, PredictPipeline
+
+    pipeline = PredictPipeline()
+    pipeline.warm_up(watch=False)
+    rows = [CustomData(**record) for record in frame.to_dict("records")]
+    position = iter(range(1 << 62))
+
+    def single():
+        pipeline.predict(rows[next(position) % len(rows)])
+
+    p50, p99 = percentiles(time_calls(single, min_time, warmup=100))
+    results["predict.single.p50_ms"] = p50
+    results["predict.single.p99_ms"] = p99
+
+    for size in sizes:
+        batch = resample(frame, size)
+        timings = time_calls(lambda: pipeline.predict(batch), min_time)
+        results[f"predict.rows_per_sec.{size}"] = size / statistics.median(timings)
+        timings = time_calls(lambda: pipeline.predict_batch(CustomDataBatch(batch).get_data_as_data_frame()), min_time)
+        results[f"predict_batch.rows_per_sec.{size}"] = size / statistics.median(timings)
+
+
+def bench_flask(results, frame, sizes, min_time):
+    import app as app_module
+
+    client = app_module.app.test_client()
+    forms = [
+        dict({key: str(value) for key, value in record.items() if key != "race_ethnicity"}, ethnicity=record["race_ethnicity"])
+        for record in frame.to_dict("records")
+    ]
+    position = iter(range(1 << 62))
+
+    def single():
+        response = client.post("/predictdata", data=forms[next(position) % len(forms)])
+        if response.status_code != 200 or b"Error:" in response.data:
+            raise RuntimeError(f"/predictdata failed with {response.status_code}")
+
+    p50, p99 = percentiles(time_calls(single, min_time, warmup=20))
+    results["flask.predictdata.p50_ms"] = p50
+    results["flask.predictdata.p99_ms"] = p99
+
+    for size in sizes:
+        if size > app_module.predict_pipeline.config.batch_max_rows:
+            continue
+        payload = {"records": resample(frame, size).to_dict("records")}
+
+        def batch():
+            response = client.post("/predict/batch", json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict/batch failed with {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+        timings = time_calls(batch, min_time, warmup=1)
+        results[f"flask.batch.rows_per_sec.{size}"] = size / statistics.median(timings)
+
+
+def higher_is_better(metric):
+    return "rows_per_sec" in metric
+
+
+def metric_tolerance(metric, tolerance):
+    # Tail latencies move with whatever else the machine is doing; only a large jump is a regression.
+    return 2 * tolerance if metric.endswith("p99_ms") else tolerance
+
+
+def compare(results, baseline, tolerance):
+    '''Prints every metric against the baseline; returns the regressions.'''
+    failures = []
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if base is None:
+            print(f"{metric:<36} {value:14.3f}")
+            continue
+        change = (value - base) / base if base else 0.0
+        allowed = metric_tolerance(metric, tolerance)
+        regressed = change < -allowed if higher_is_better(metric) else change > allowed
+        print(f"{metric:<36} {value:14.3f}   baseline {base:14.3f}   {change:+7.1%}{'   REGRESSION' if regressed else ''}")
+        if regressed:
+            failures.append(f"{metric} {value:.3f} vs baseline {base:.3f} ({change:+.1%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sample", default="artifacts/raw.csv")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds spent on each measurement")
+    parser.add_argument("--cold-repeat", type=int, default=3)
+    parser.add_argument("--formats", nargs="+", default=["dill", "compact"], help="artifact formats for the cold load")
+    parser.add_argument("--skip-flask", action="store_true")
+    parser.add_argument("--runs", type=int, default=3, help="passes over every measurement; each metric is their median")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.35)
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    warnings.filterwarnings("ignore")
+    from src.pipepline.predict_pipeline import FEATURE_COLUMNS
+
+    frame = pd.read_csv(args.sample)[FEATURE_COLUMNS]
+    passes = []
+    for _ in range(args.runs):
+        results = {}
+        for artifact_format in args.formats:
+            if artifact_format == "compact" and not os.path.exists(os.path.join("artifacts", "compact")):
+                continue
+            results[f"cold_load.{artifact_format}.seconds"] = cold_load(artifact_format, args.cold_repeat)
+        bench_pipeline(results, frame, args.sizes, args.min_time)
+        if not args.skip_flask:
+            bench_flask(results, frame, args.sizes, args.min_time)
+        passes.append(results)
+    results = {metric: statistics.median(run[metric] for run in passes) for metric in passes[0]}
+
+    output = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": args.runs,
+        "settings": {name: value for name, value in sorted(os.environ.items()) if name.startswith(_SETTINGS_PREFIXES)},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file_obj:
+            json.dump(output, file_obj, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            recorded = json.load(file_obj)
+        baseline = recorded["results"]
+        if recorded.get("cpu_count") != output["cpu_count"] or recorded.get("settings") != output["settings"]:
+            print(f"warning: {args.baseline} was recorded with other settings or on another machine")
+    failures = compare(results, baseline, args.tolerance)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
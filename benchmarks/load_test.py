@@ -0,0 +1,392 @@
+'''
+Load generator for a locally running server (app.py, prefork_server.py or asgi.py).
+
+    python -m benchmarks.load_test [--url http://127.0.0.1:5000] [--start "python app.py"]
+                                   [--replay FILE | --sample artifacts/raw.csv]
+                                   [--concurrency 8] [--rate QPS [--poisson]]
+                                   [--duration 30 | --requests N]
+                                   [--batch-fraction 0.0 --batch-size 100] [--warmup 10] [--output FILE]
+
+Traffic is either replayed from recorded requests or synthesized. --replay
+takes app.py's own log (logs/<run>/<run>.log, text or LOG_FORMAT=json): each
+"Prediction completed" line whose inputs were sampled becomes a /predictdata
+request. Inputs are only logged for a LOG_SAMPLE_RATE share of requests, so
+record traffic for replay with
+
+    LOG_SAMPLE_RATE=1 python app.py
+
+--replay also accepts hand-written JSONL, one request per line:
+
+    {"path": "/predictdata", "form": {"gender": "female", "ethnicity": "group B", ...}}
+    {"path": "/predict/batch", "json": {"records": [...]}}
+
+Other lines are skipped. Without --replay, requests are synthesized from the
+column distributions of --sample: each categorical is drawn from its
+observed frequencies and (reading, writing) score pairs from observed rows,
+so the mix matches real students.
+
+Without --rate the run is closed-loop: --concurrency workers each send the
+next request as soon as the previous one returns. With --rate requests are
+scheduled at that arrival rate regardless of how fast the server answers,
+and latency is measured from the scheduled time, so queueing behind a slow
+server is counted instead of hidden. Reports achieved QPS, error rate, status
+codes, latency percentiles and a histogram.
+'''
+import argparse
+import csv
+import http.client
+import json
+import math
+import queue
+import random
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+CATEGORICAL_COLUMNS = ["gender", "race_ethnicity", "parental_level_of_education", "lunch", "test_preparation_course"]
+FEATURE_COLUMNS = CATEGORICAL_COLUMNS + ["reading_score", "writing_score"]
+# /predictdata names race_ethnicity "ethnicity" in the form.
+FORM_NAMES = {"race_ethnicity": "ethnicity"}
+# app.py's per-request log line; src/logger.py appends its fields as " key=value" in text mode.
+PREDICTION_MESSAGE = "Prediction completed"
+_TEXT_MARKER = f" -{PREDICTION_MESSAGE} "
+_TEXT_FIELDS = re.compile(r" (route|ms|prediction|" + "|".join(FEATURE_COLUMNS) + r")=")
+
+
+class SyntheticTraffic:
+    def __init__(self, sample_path, batch_fraction=0.0, batch_size=100, seed=None):
+        with open(sample_path, newline="") as file_obj:
+            rows = list(csv.DictReader(file_obj))
+        self.categories = {column: Counter(row[column] for row in rows) for column in CATEGORICAL_COLUMNS}
+        self.scores = [(row["reading_score"], row["writing_score"]) for row in rows]
+        self.batch_fraction = batch_fraction
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+
+    def record(self):
+        record = {}
+        for column, counts in self.categories.items():
+            record[column] = self.random.choices(list(counts), weights=list(counts.values()))[0]
+        record["reading_score"], record["writing_score"] = self.random.choice(self.scores)
+        return record
+
+    def __iter__(self):
+        while True:
+            if self.random.random() < self.batch_fraction:
+                records = [self.record() for _ in range(self.batch_size)]
+                for record in records:
+                    record["reading_score"] = float(record["reading_score"])
+                    record["writing_score"] = float(record["writing_score"])
+                yield {"path": "/predict/batch", "json": {"records": records}}
+            else:
+                yield {"path": "/predictdata", "form": {FORM_NAMES.get(key, key): value for key, value in self.record().items()}}
+
+
+def logged_request(fields):
+    '''The /predictdata request behind a logged prediction, or None if its inputs were not sampled.'''
+    if not all(column in fields for column in FEATURE_COLUMNS):
+        return None
+    form = {FORM_NAMES.get(column, column): str(fields[column]) for column in FEATURE_COLUMNS}
+    return {"path": fields.get("route", "/predictdata"), "form": form}
+
+
+def parse_line(line):
+    '''
+    (request or None, is a logged prediction) for one line of a replay file:
+    a JSONL request, or an app.py "Prediction completed" log line.
+    '''
+    if _TEXT_MARKER in line:
+        # Values may contain spaces ("group B"), so split on the known keys.
+        parts = _TEXT_FIELDS.split(" " + line.split(_TEXT_MARKER, 1)[1].rstrip("\n"))
+        return logged_request(dict(zip(parts[1::2], parts[2::2]))), True
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None, False
+    if not isinstance(entry, dict):
+        return None, False
+    if entry.get("message") == PREDICTION_MESSAGE:
+        return logged_request(entry), True
+    if isinstance(entry.get("path"), str) and ("form" in entry or "json" in entry):
+        return entry, False
+    return None, False
+
+
+def read_replay(path):
+    '''
+    Requests from a replay file, the number of lines that were not requests
+    and the number of logged predictions whose inputs were not sampled.
+    '''
+    requests, skipped, unsampled = [], 0, 0
+    with open(path) as file_obj:
+        for line in file_obj:
+            request, logged = parse_line(line)
+            if request is not None:
+                requests.append(request)
+            elif logged:
+                unsampled += 1
+            elif line.strip():
+                skipped += 1
+    return requests, skipped, unsampled
+
+
+def encode(entry):
+    '''(method, path, body, headers) for a traffic entry.'''
+    if "json" in entry:
+        return entry.get("method", "POST"), entry["path"], json.dumps(entry["json"]).encode(), {"Content-Type": "application/json"}
+    return (
+        entry.get("method", "POST"),
+        entry["path"],
+        urlencode(entry["form"]).encode(),
+        {"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+
+class Client:
+    '''One keep-alive connection per worker thread, reopened when the server closes it.'''
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def send(self, method, path, body, headers):
+        '''Returns (status, ok); status is None when the request did not complete.'''
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            if response.will_close:
+                self.connection.close()
+                self.connection = None
+        except (OSError, http.client.HTTPException):
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            return None, False
+        # /predictdata renders its errors into the page with a 200.
+        ok = response.status < 400 and not (path == "/predictdata" and b"Error:" in payload)
+        return response.status, ok
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.rows = 0
+
+    def add(self, latency, status, ok, rows):
+        with self.lock:
+            self.latencies.append(latency)
+            self.statuses[str(status) if status is not None else "connection error"] += 1
+            if ok:
+                self.rows += rows
+            else:
+                self.errors += 1
+
+
+def _rows(entry):
+    return len(entry["json"].get("records", [])) if isinstance(entry.get("json"), dict) else 1
+
+
+def run_closed_loop(url, traffic, concurrency, deadline, max_requests, timeout, recorder):
+    traffic = iter(traffic)
+    lock = threading.Lock()
+    sent = [0]
+
+    def worker():
+        client = Client(url, timeout)
+        while time.perf_counter() < deadline:
+            with lock:
+                if max_requests and sent[0] >= max_requests:
+                    return
+                sent[0] += 1
+                entry = next(traffic)
+            start = time.perf_counter()
+            status, ok = client.send(*encode(entry))
+            recorder.add(time.perf_counter() - start, status, ok, _rows(entry))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sent[0]
+
+
+def run_open_loop(url, traffic, concurrency, rate, poisson, deadline, max_requests, timeout, recorder, seed=None):
+    pending = queue.Queue()
+    arrivals = random.Random(seed)
+
+    def worker():
+        client = Client(url, timeout)
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            scheduled_at, entry = item
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            status, ok = client.send(*encode(entry))
+            # From the scheduled time: time spent waiting for a free worker counts as latency.
+            recorder.add(time.perf_counter() - scheduled_at, status, ok, _rows(entry))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    sent = 0
+    scheduled_at = time.perf_counter()
+    for entry in traffic:
+        if scheduled_at >= deadline or (max_requests and sent >= max_requests):
+            break
+        # Keep the dispatcher at most ~100 ms ahead of the schedule.
+        ahead = scheduled_at - time.perf_counter() - 0.1
+        if ahead > 0:
+            time.sleep(ahead)
+        pending.put((scheduled_at, entry))
+        sent += 1
+        scheduled_at += arrivals.expovariate(rate) if poisson else 1.0 / rate
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    return sent
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(int(math.ceil(len(sorted_values) * fraction)) - 1, len(sorted_values) - 1)]
+
+
+def histogram(latencies, buckets_per_decade=4):
+    '''[(upper bound in ms, count)] over log-spaced buckets.'''
+    counts = Counter()
+    for latency in latencies:
+        exponent = math.ceil(math.log10(max(latency * 1000, 1e-3)) * buckets_per_decade)
+        counts[exponent] += 1
+    return [(10 ** (exponent / buckets_per_decade), counts[exponent]) for exponent in sorted(counts)]
+
+
+def summarize(recorder, sent, elapsed):
+    latencies = sorted(recorder.latencies)
+    completed = len(latencies)
+    return {
+        "sent": sent,
+        "completed": completed,
+        "errors": recorder.errors,
+        "error_rate": recorder.errors / completed if completed else 0.0,
+        "elapsed_seconds": elapsed,
+        "achieved_qps": completed / elapsed if elapsed else 0.0,
+        "rows_per_sec": recorder.rows / elapsed if elapsed else 0.0,
+        "statuses": dict(recorder.statuses),
+        "latency_ms": {
+            name: percentile(latencies, fraction) * 1000
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999), ("max", 1.0))
+        },
+        "histogram_ms": histogram(latencies),
+    }
+
+
+def print_report(report):
+    print(f"sent {report['sent']}  completed {report['completed']}  errors {report['errors']} ({report['error_rate']:.2%})")
+    print(f"achieved {report['achieved_qps']:.1f} req/s, {report['rows_per_sec']:.1f} rows/s over {report['elapsed_seconds']:.1f}s")
+    print("statuses " + ", ".join(f"{status}: {count}" for status, count in sorted(report["statuses"].items())))
+    print("latency  " + "  ".join(f"{name} {value:.2f} ms" for name, value in report["latency_ms"].items()))
+    peak = max((count for _, count in report["histogram_ms"]), default=0)
+    for upper, count in report["histogram_ms"]:
+        print(f"  <= {upper:10.3f} ms {count:8d} {'#' * max(round(40 * count / peak), 1 if count else 0)}")
+
+
+def wait_until_live(url, timeout):
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=1)
+            connection.request("GET", "/livez")
+            if connection.getresponse().status == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--start", default=None, help="command that starts the server; stopped when the run ends")
+    parser.add_argument("--replay", default=None, help="app.py log, or JSONL file, of recorded requests")
+    parser.add_argument("--sample", default="artifacts/raw.csv", help="data whose distributions drive synthetic traffic")
+    parser.add_argument("--batch-fraction", type=float, default=0.0, help="share of synthetic requests sent to /predict/batch")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="open-loop arrival rate in requests/sec")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of a fixed interval")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: no limit)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--warmup", type=int, default=10, help="requests sent, and not recorded, before the run")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        entries, skipped, unsampled = read_replay(args.replay)
+        if skipped:
+            print(f"skipped {skipped} lines of {args.replay} that are not requests")
+        if unsampled:
+            print(f"skipped {unsampled} logged predictions without inputs (record with LOG_SAMPLE_RATE=1)")
+        if not entries:
+            print(f"no requests to replay in {args.replay}")
+            return 1
+        traffic = (entries[index % len(entries)] for index in range(1 << 62))
+    else:
+        traffic = iter(SyntheticTraffic(args.sample, args.batch_fraction, args.batch_size, args.seed))
+
+    server = None
+    if args.start:
+        server = subprocess.Popen(shlex.split(args.start))
+    try:
+        if not wait_until_live(args.url, 60 if server else 5):
+            print(f"server at {args.url} is not answering /livez")
+            return 1
+        client = Client(args.url, args.timeout)
+        for _ in range(args.warmup):
+            client.send(*encode(next(traffic)))
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        if args.rate:
+            sent = run_open_loop(args.url, traffic, args.concurrency, args.rate, args.poisson, deadline,
+                                 args.requests, args.timeout, recorder, args.seed)
+        else:
+            sent = run_closed_loop(args.url, traffic, args.concurrency, deadline, args.requests, args.timeout, recorder)
+        report = summarize(recorder, sent, time.perf_counter() - start)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report["config"] = {name: value for name, value in vars(args).items() if name != "output"}
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as file_obj:
+            json.dump(report, file_obj, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+'''
+Parity and latency of the compiled preprocessor against the fitted ColumnTransformer.
+
+    python -m benchmarks.preprocess_latency [--sample artifacts/raw.csv] [--repeat 2000]
+
+Parity: every row of the sample (plus injected NaNs) must transform to
+exactly the same array through the compiled kernel, whether passed as a
+DataFrame, a list of records, a column mapping or one record at a time.
+Exits non-zero on any mismatch.
+'''
+import argparse
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+from src.pipepline.predict_pipeline import FEATURE_COLUMNS
+from src.utils import load_object
+
+
+def check_parity(preprocessor, compiled, frame):
+    expected = preprocessor.transform(frame)
+    records = frame.to_dict("records")
+    checks = {
+        "dataframe": compiled.transform(frame),
+        "records": compiled.transform(records),
+        "columns": compiled.transform(frame.to_dict("list")),
+        "single records": np.vstack([compiled.transform(record) for record in records]),
+    }
+    ok = True
+    for name, actual in checks.items():
+        equal = actual.shape == expected.shape and np.array_equal(actual, expected)
+        ok &= equal
+        print(f"parity {name:>14}: {'identical' if equal else 'MISMATCH'}")
+    return ok
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preprocessor", default="artifacts/preprocessor.pkl")
+    parser.add_argument("--sample", default="artifacts/raw.csv")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    preprocessor = load_object(args.preprocessor)
+    compiled = CompiledPreprocessor.compile(preprocessor)
+    if compiled is None:
+        print("preprocessor cannot be compiled")
+        return 1
+
+    frame = pd.read_csv(args.sample)[FEATURE_COLUMNS]
+    with_missing = frame.copy()
+    with_missing.loc[::7, "writing_score"] = np.nan
+    with_missing.loc[::11, "lunch"] = np.nan
+    ok = check_parity(preprocessor, compiled, frame) and check_parity(preprocessor, compiled, with_missing)
+
+    record = frame.iloc[0].to_dict()
+    one_row = frame.iloc[:1]
+    columns = {column: frame[column].to_numpy() for column in FEATURE_COLUMNS}
+    cases = [
+        ("1 row   ColumnTransformer(DataFrame)", lambda: preprocessor.transform(one_row), args.repeat),
+        ("1 row   compiled(dict)", lambda: compiled.transform(record), args.repeat),
+        ("1 row   compiled(DataFrame)", lambda: compiled.transform(one_row), args.repeat),
+        (f"{len(frame)} rows ColumnTransformer(DataFrame)", lambda: preprocessor.transform(frame), max(args.repeat // 20, 5)),
+        (f"{len(frame)} rows compiled(columns)", lambda: compiled.transform(columns), max(args.repeat // 20, 5)),
+    ]
+    for name, fn, repeat in cases:
+        p50, p99 = time_call(fn, repeat)
+        print(f"{name:<40} p50 {p50 * 1e6:10.1f} us   p99 {p99 * 1e6:10.1f} us")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+'''
+Preload-and-fork launcher for the Flask app.
+
+The parent imports app.py, loads the model artifacts and scores one warm-up
+record, then freezes the garbage collector so those objects stay in shared
+copy-on-write pages, and forks the workers. All workers accept on one
+listening socket opened by the parent. Each worker scores its own warm-up
+record before serving, so no request pays import or load costs. Workers that
+die are replaced; SIGTERM or SIGINT stops them all.
+
+    python prefork_server.py [--workers N] [--host 0.0.0.0] [--port 5000]
+'''
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+from src.logger import logging
+
+
+def _bind(host, port, backlog):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(module, sock, host, port, threaded):
+    from werkzeug.serving import make_server
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Starts this worker's registry watcher and pays any per-process first-call cost.
+    module.predict_pipeline.warm_up()
+    server = make_server(host, port, module.app, threaded=threaded, fd=sock.fileno())
+    logging.info(f"Worker {os.getpid()} serving on {host}:{port}")
+    server.serve_forever()
+
+
+def _spawn(module, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _run_worker(module, sock, args.host, args.port, not args.no_threads)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preload the model once, then fork Flask workers.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("PREFORK_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5000")))
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--no-threads", action="store_true", help="serve one request at a time per worker")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    import app as module
+
+    # No watcher thread in the parent: threads do not survive fork, and each worker starts its own.
+    module.predict_pipeline.warm_up(watch=False)
+    gc.collect()
+    # Moves everything allocated so far out of the collector's reach, so collections in the
+    # workers do not write to (and un-share) the pages holding the preloaded objects.
+    gc.freeze()
+    sock = _bind(args.host, args.port, args.backlog)
+    logging.info(f"Preloaded app and model in {time.perf_counter() - start:.2f}s, forking {args.workers} workers")
+
+    workers = {_spawn(module, sock, args) for _ in range(args.workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            logging.warning(f"Worker {pid} exited with status {status}, starting a replacement")
+            time.sleep(1)
+            workers.add(_spawn(module, sock, args))
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
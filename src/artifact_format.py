@@ -0,0 +1,380 @@
+'''
+Compact on-disk format for the served model and preprocessor.
+
+    artifacts/compact/
+        manifest.json        layout, column names, category vocabularies, file hashes
+        *.npy                numeric state (coefficients, medians, means, scales)
+        model.ubj / .cbm     native XGBoost / CatBoost model files
+
+Loading needs no unpickling: arrays are memory-mapped and the objects
+returned are small numpy predictors/transformers, so worker start-up is
+faster and does not pull in sklearn just to score. Models and transformer
+steps without an array representation fall back to a dill file listed in
+the manifest.
+
+    python -m src.artifact_format export [--artifacts-dir artifacts]
+'''
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from itertools import repeat
+
+import numpy as np
+
+from src.exception import CustomException
+
+FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "manifest.json"
+
+
+def _sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class _Writer:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.files = {}
+
+    def array(self, name, array):
+        file_name = f"{name}.npy"
+        np.save(os.path.join(self.out_dir, file_name), np.ascontiguousarray(array))
+        return self.add(file_name)
+
+    def dill(self, name, obj):
+        import dill
+
+        file_name = f"{name}.pkl"
+        with open(os.path.join(self.out_dir, file_name), "wb") as file_obj:
+            dill.dump(obj, file_obj)
+        return self.add(file_name)
+
+    def add(self, file_name):
+        self.files[file_name] = _sha256(os.path.join(self.out_dir, file_name))
+        return file_name
+
+
+class _MemoryWriter:
+    '''Keeps exported arrays in memory; used to convert fitted objects without touching disk.'''
+    out_dir = None
+
+    def array(self, name, array):
+        return np.asarray(array)
+
+    def dill(self, name, obj):
+        return None
+
+
+class _MemoryReader:
+    def array(self, array):
+        return array
+
+
+class _Reader:
+    def __init__(self, directory, mmap):
+        self.directory = directory
+        self.mmap_mode = "r" if mmap else None
+
+    def array(self, file_name):
+        return np.load(os.path.join(self.directory, file_name), mmap_mode=self.mmap_mode)
+
+    def path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def dill(self, file_name):
+        import dill
+
+        with open(self.path(file_name), "rb") as file_obj:
+            return dill.load(file_obj)
+
+
+# ---------------------------------------------------------------- model
+
+
+class LinearPredictor:
+    def __init__(self, coef, intercept):
+        self.coef = coef
+        self.intercept = intercept
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept
+
+
+class XGBoostPredictor:
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, X):
+        return self.booster.inplace_predict(np.asarray(X, dtype=np.float32))
+
+
+def _export_model(model, writer):
+    cls = type(model)
+    if cls.__name__ == "XGBRegressor":
+        model.save_model(os.path.join(writer.out_dir, "model.ubj"))
+        return {"kind": "xgboost", "file": writer.add("model.ubj")}
+    if cls.__name__ == "CatBoostRegressor":
+        model.save_model(os.path.join(writer.out_dir, "model.cbm"))
+        return {"kind": "catboost", "file": writer.add("model.cbm")}
+    if cls.__module__.startswith("sklearn.linear_model") and hasattr(model, "coef_"):
+        return {
+            "kind": "linear",
+            "coef": writer.array("model_coef", np.asarray(model.coef_, dtype=np.float64)),
+            "intercept": writer.array("model_intercept", np.asarray(model.intercept_, dtype=np.float64)),
+        }
+    return {"kind": "dill", "file": writer.dill("model", model)}
+
+
+def _load_model(spec, reader):
+    kind = spec["kind"]
+    if kind == "linear":
+        intercept = reader.array(spec["intercept"])
+        return LinearPredictor(reader.array(spec["coef"]), intercept[()] if intercept.ndim == 0 else intercept)
+    if kind == "xgboost":
+        import xgboost
+
+        booster = xgboost.Booster()
+        booster.load_model(reader.path(spec["file"]))
+        return XGBoostPredictor(booster)
+    if kind == "catboost":
+        from catboost import CatBoostRegressor
+
+        return CatBoostRegressor().load_model(reader.path(spec["file"]))
+    if kind == "dill":
+        return reader.dill(spec["file"])
+    raise ValueError(f"Unknown model kind in manifest: {kind}")
+
+
+# ---------------------------------------------------------- preprocessor
+
+
+def _is_nan_marker(value):
+    return isinstance(value, float) and np.isnan(value)
+
+
+def _export_step(step, prefix, writer):
+    '''Array state for one fitted pipeline step, or None if it has no array form.'''
+    name = type(step).__name__
+    if name == "SimpleImputer" and _is_nan_marker(step.missing_values) and not step.add_indicator:
+        statistics = step.statistics_
+        if statistics.dtype.kind in "fiu":
+            return {"kind": "impute", "statistics": writer.array(f"{prefix}_statistics", statistics.astype(np.float64))}
+        return {"kind": "impute", "values": statistics.tolist()}
+    if name == "StandardScaler":
+        return {
+            "kind": "scale",
+            "mean": writer.array(f"{prefix}_mean", step.mean_) if step.with_mean else None,
+            "scale": writer.array(f"{prefix}_scale", step.scale_) if step.with_std else None,
+        }
+    if (name == "OneHotEncoder" and step.drop is None and step.handle_unknown in ("error", "ignore")
+            and all(infrequent is None for infrequent in getattr(step, "_infrequent_indices", [None]))):
+        return {
+            "kind": "one_hot",
+            "categories": [categories.tolist() for categories in step.categories_],
+            "handle_unknown": step.handle_unknown,
+        }
+    return None
+
+
+def _export_preprocessor(preprocessor, writer):
+    if type(preprocessor).__name__ != "ColumnTransformer" or preprocessor.remainder != "drop":
+        return {"kind": "dill", "file": writer.dill("preprocessor", preprocessor)}
+
+    blocks = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop" or name == "remainder":
+            continue
+        if not all(isinstance(column, str) for column in columns):
+            return {"kind": "dill", "file": writer.dill("preprocessor", preprocessor)}
+        steps = [] if transformer == "passthrough" else [
+            _export_step(step, f"{name}_{step_name}", writer)
+            for step_name, step in getattr(transformer, "steps", [(name, transformer)])
+        ]
+        if any(step is None for step in steps):
+            return {"kind": "dill", "file": writer.dill("preprocessor", preprocessor)}
+        blocks.append({"name": name, "columns": list(columns), "steps": steps})
+    return {"kind": "column_transformer", "blocks": blocks}
+
+
+class ArrayPreprocessor:
+    '''
+    Numpy re-implementation of the fitted ColumnTransformer: imputation,
+    standard scaling and one-hot encoding from the exported arrays, with the
+    same column order and output as `preprocessor.transform`.
+    '''
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def known_categories(self):
+        categories = {}
+        for block in self.blocks:
+            for step in block["steps"]:
+                if step["kind"] == "one_hot":
+                    for column, values in zip(block["columns"], step["categories"]):
+                        categories[column] = set(values)
+        return categories
+
+    @staticmethod
+    def _impute(values, step):
+        if "statistics" in step:
+            values = values.astype(np.float64)
+            missing = np.isnan(values)
+            if missing.any():
+                values = np.where(missing, step["statistics"], values)
+            return values
+        # Only NaN is missing, as in SimpleImputer(missing_values=np.nan) on object columns.
+        missing = values != values
+        if missing.any():
+            values = np.where(missing, np.array(step["values"], dtype=object), values)
+        return values
+
+    @staticmethod
+    def _one_hot(values, step):
+        n_rows = len(values)
+        widths = [len(categories) for categories in step["categories"]]
+        out = np.zeros((n_rows, sum(widths)), dtype=np.float64)
+        offset = 0
+        rows = np.arange(n_rows)
+        for column_index, lookup in enumerate(step["lookups"]):
+            column = values[:, column_index].tolist()
+            codes = np.fromiter(map(lookup.get, column, repeat(-1, n_rows)), dtype=np.intp, count=n_rows)
+            known = codes >= 0
+            if not known.all() and step["handle_unknown"] == "error":
+                unknown = sorted({repr(column[row]) for row in np.flatnonzero(~known)})
+                raise ValueError(f"Found unknown categories [{', '.join(unknown)}] in column {column_index} during transform")
+            out[rows[known], offset + codes[known]] = 1.0
+            offset += widths[column_index]
+        return out
+
+    def transform(self, X):
+        outputs = []
+        for block in self.blocks:
+            values = X[block["columns"]].to_numpy()
+            for step in block["steps"]:
+                kind = step["kind"]
+                if kind == "impute":
+                    values = self._impute(values, step)
+                elif kind == "one_hot":
+                    values = self._one_hot(values, step)
+                else:
+                    values = values.astype(np.float64)
+                    if step["mean"] is not None:
+                        values = values - step["mean"]
+                    if step["scale"] is not None:
+                        values = values / step["scale"]
+            outputs.append(np.asarray(values, dtype=np.float64))
+        return np.hstack(outputs)
+
+
+def _load_preprocessor(spec, reader):
+    if spec["kind"] == "dill":
+        return reader.dill(spec["file"])
+    blocks = []
+    for block in spec["blocks"]:
+        steps = []
+        for step in block["steps"]:
+            step = dict(step)
+            for key in ("statistics", "mean", "scale"):
+                if step.get(key) is not None:
+                    step[key] = reader.array(step[key])
+            if step["kind"] == "one_hot":
+                step["lookups"] = [{category: code for code, category in enumerate(categories)} for categories in step["categories"]]
+            steps.append(step)
+        blocks.append(dict(block, steps=steps))
+    return ArrayPreprocessor(blocks)
+
+
+# ------------------------------------------------------------ public API
+
+
+def as_array_preprocessor(preprocessor):
+    '''ArrayPreprocessor equivalent of a fitted preprocessor, or None if it has no array form.'''
+    if isinstance(preprocessor, ArrayPreprocessor):
+        return preprocessor
+    spec = _export_preprocessor(preprocessor, _MemoryWriter())
+    if spec["kind"] == "dill":
+        return None
+    return _load_preprocessor(spec, _MemoryReader())
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILE_NAME)) as file_obj:
+        return json.load(file_obj)
+
+
+def export_artifacts(model, preprocessor, out_dir, source=None):
+    '''
+    Writes the compact form of a fitted model and preprocessor to `out_dir`,
+    replacing it. `source` is stored in the manifest as-is (e.g. pickle hashes).
+    '''
+    try:
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        writer = _Writer(tmp_dir)
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "created_at": time.time(),
+            "model_class": f"{type(model).__module__}.{type(model).__qualname__}",
+            "source": source,
+            "model": _export_model(model, writer),
+            "preprocessor": _export_preprocessor(preprocessor, writer),
+        }
+        manifest["files"] = writer.files
+        with open(os.path.join(tmp_dir, MANIFEST_FILE_NAME), "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2)
+
+        if os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp_dir, out_dir)
+        return manifest
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_artifacts(directory, mmap=True):
+    '''Returns (model, preprocessor) from a directory written by `export_artifacts`.'''
+    try:
+        manifest = read_manifest(directory)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format version {manifest.get('format_version')}")
+        reader = _Reader(directory, mmap)
+        return _load_model(manifest["model"], reader), _load_preprocessor(manifest["preprocessor"], reader)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the dill artifacts to the compact format.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--artifacts-dir", default="artifacts")
+    parser.add_argument("--out-dir", default=None, help="defaults to <artifacts-dir>/compact")
+    args = parser.parse_args(argv)
+
+    from src.utils import load_object
+
+    model_path = os.path.join(args.artifacts_dir, "model.pkl")
+    preprocessor_path = os.path.join(args.artifacts_dir, "preprocessor.pkl")
+    out_dir = args.out_dir or os.path.join(args.artifacts_dir, "compact")
+    manifest = export_artifacts(
+        load_object(model_path),
+        load_object(preprocessor_path),
+        out_dir,
+        source={"model.pkl": _sha256(model_path), "preprocessor.pkl": _sha256(preprocessor_path)},
+    )
+    print(f"Exported {manifest['model_class']} ({manifest['model']['kind']}) to {out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
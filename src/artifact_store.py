@@ -0,0 +1,223 @@
+'''
+Versioned publishing of the served artifacts.
+
+    artifacts/
+        current.json             {"version": ..., "previous": ..., "published_at": ...}
+        versions/<version>/
+            model.pkl
+            preprocessor.pkl
+            compact/             (when the compact export exists)
+            version.json         file hashes recorded at publish time
+
+A version directory is assembled under a temporary name and renamed into
+place once complete, and current.json is replaced by rename, so a reader
+that follows the pointer always finds a whole version. Versions are never
+modified after publishing; rolling back only moves the pointer.
+
+    python -m src.artifact_store list
+    python -m src.artifact_store publish [--artifacts-dir artifacts]
+    python -m src.artifact_store rollback [--version VERSION]
+'''
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+
+POINTER_FILE_NAME = "current.json"
+VERSION_FILE_NAME = "version.json"
+
+
+@dataclass
+class ArtifactStoreConfig:
+    artifacts_dir: str = "artifacts"
+    versions_dir_name: str = "versions"
+    # Published versions kept on disk; the current and previous ones are never pruned.
+    keep_versions: int = int(os.environ.get("ARTIFACT_KEEP_VERSIONS", "5"))
+
+
+def _sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_pointer(artifacts_dir):
+    '''The parsed current.json of `artifacts_dir`, or None if nothing was published there.'''
+    try:
+        with open(os.path.join(artifacts_dir, POINTER_FILE_NAME)) as file_obj:
+            pointer = json.load(file_obj)
+    except FileNotFoundError:
+        return None
+    if not isinstance(pointer, dict) or not pointer.get("version"):
+        raise ValueError(f"Malformed artifact pointer in {artifacts_dir}")
+    return pointer
+
+
+class ArtifactStore:
+    def __init__(self, config=None):
+        self.config = config or ArtifactStoreConfig()
+        self.versions_dir = os.path.join(self.config.artifacts_dir, self.config.versions_dir_name)
+        self.pointer_path = os.path.join(self.config.artifacts_dir, POINTER_FILE_NAME)
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def current(self):
+        pointer = read_pointer(self.config.artifacts_dir)
+        return pointer["version"] if pointer else None
+
+    def versions(self):
+        '''Published versions, oldest first (version names sort by publish time).'''
+        try:
+            names = os.listdir(self.versions_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            name for name in names
+            if not name.startswith(".") and os.path.exists(os.path.join(self.version_dir(name), VERSION_FILE_NAME))
+        )
+
+    def read_version(self, version):
+        with open(os.path.join(self.version_dir(version), VERSION_FILE_NAME)) as file_obj:
+            return json.load(file_obj)
+
+    def _write_pointer(self, version, previous):
+        pointer = {"version": version, "previous": previous, "published_at": time.time()}
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(pointer, file_obj, indent=2)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+        os.replace(tmp_path, self.pointer_path)
+        return pointer
+
+    def publish(self, files):
+        '''
+        Publishes `files` ({name in the version dir: source file or directory})
+        as a new version and points current.json at it. Returns the version;
+        if the current version already holds the same content, returns it
+        without publishing.
+        '''
+        try:
+            hashes = {}
+            for name, path in files.items():
+                if os.path.isdir(path):
+                    # Directories are identified by their manifest, which hashes every file in them.
+                    hashes[name] = _sha256(os.path.join(path, "manifest.json"))
+                else:
+                    hashes[name] = _sha256(path)
+
+            current = self.current()
+            if current is not None and self.read_version(current)["files"] == hashes:
+                logging.info(f"Artifacts unchanged, keeping version {current}")
+                return current
+
+            content = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()
+            # Same name means same content, so an existing directory of that name is reused.
+            version = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{content[:8]}"
+            final_dir = self.version_dir(version)
+            tmp_dir = os.path.join(self.versions_dir, f".{version}.{os.getpid()}.tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            for name, path in files.items():
+                dest = os.path.join(tmp_dir, name)
+                if os.path.isdir(path):
+                    shutil.copytree(path, dest)
+                    for file_name in os.listdir(dest):
+                        _fsync(os.path.join(dest, file_name))
+                else:
+                    shutil.copyfile(path, dest)
+                    _fsync(dest)
+            with open(os.path.join(tmp_dir, VERSION_FILE_NAME), "w") as file_obj:
+                json.dump({"version": version, "published_at": time.time(), "files": hashes}, file_obj, indent=2)
+
+            if os.path.exists(final_dir):
+                shutil.rmtree(tmp_dir)
+            else:
+                os.replace(tmp_dir, final_dir)
+            self._write_pointer(version, current)
+            logging.info(f"Published artifact version {version} (previous {current})")
+            self.prune()
+            return version
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def rollback(self, version=None):
+        '''
+        Points current.json at `version`, by default the one published before
+        the current one. Serving processes pick the change up like a publish.
+        '''
+        try:
+            pointer = read_pointer(self.config.artifacts_dir)
+            if pointer is None:
+                raise ValueError("No artifact version has been published")
+            target = version or pointer.get("previous")
+            if not target:
+                raise ValueError(f"Version {pointer['version']} has no previous version to roll back to")
+            if target not in self.versions():
+                raise ValueError(f"Unknown artifact version {target}")
+            self._write_pointer(target, pointer["version"])
+            logging.info(f"Rolled artifacts back from {pointer['version']} to {target}")
+            return target
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def prune(self):
+        pointer = read_pointer(self.config.artifacts_dir) or {}
+        keep = {pointer.get("version"), pointer.get("previous")}
+        versions = self.versions()
+        for version in versions[:max(len(versions) - self.config.keep_versions, 0)]:
+            if version not in keep:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
+
+
+def resolve_artifacts_dir(artifacts_dir):
+    '''The directory holding the current version, or `artifacts_dir` itself if nothing was published.'''
+    pointer = read_pointer(artifacts_dir)
+    if pointer is None:
+        return artifacts_dir
+    return os.path.join(artifacts_dir, ArtifactStoreConfig.versions_dir_name, pointer["version"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish, list and roll back served artifact versions.")
+    parser.add_argument("command", choices=["list", "publish", "rollback"])
+    parser.add_argument("--artifacts-dir", default="artifacts")
+    parser.add_argument("--version", default=None, help="rollback target; defaults to the previous version")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(ArtifactStoreConfig(artifacts_dir=args.artifacts_dir))
+    if args.command == "publish":
+        files = {name: os.path.join(args.artifacts_dir, name) for name in ("model.pkl", "preprocessor.pkl")}
+        compact_dir = os.path.join(args.artifacts_dir, "compact")
+        if os.path.isdir(compact_dir):
+            files["compact"] = compact_dir
+        print(store.publish(files))
+    elif args.command == "rollback":
+        print(store.rollback(args.version))
+    else:
+        current = store.current()
+        for version in store.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
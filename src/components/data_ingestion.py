@@ -4,60 +4,94 @@ from src.exception import CustomException
 from src.logger import logging
 import pandas as pd
 
-from sklearn.model_selection import train_test_split
 from dataclasses import dataclass
 
-from src.components.data_transformation import DataTransformation
-from src.components.data_transformation import DataTransformationConfig
-
-from src.components.model_trainer import ModelTrainerConfig
-from src.components.model_trainer import ModelTrainer
+# Rows are assigned to the test split by hashing them into this many buckets.
+_SPLIT_BUCKETS = 10000
 
 @dataclass
 class DataIngestionConfig:
     train_data_path: str=os.path.join('artifacts',"train.csv")
     test_data_path: str=os.path.join('artifacts',"test.csv")
     raw_data_path: str=os.path.join('artifacts',"raw.csv")
+    source_data_path: str=os.environ.get("INGESTION_SOURCE_PATH", os.path.join('notebook','data','stud.csv'))
+    test_size: float=0.2
+    random_state: int=42
+    # Rows read per chunk; memory use depends on this, not on the size of the source.
+    chunk_size: int=int(os.environ.get("INGESTION_CHUNK_SIZE", "100000"))
+
+def split_mask(chunk, test_size, random_state):
+    '''
+    True for the rows of `chunk` that belong to the test split, decided per
+    row from a hash of its values keyed by `random_state`. `chunk` must hold
+    the CSV fields as read (dtype=str): hashing inferred dtypes would make a
+    row's hash depend on its neighbours, e.g. an int column read as float64
+    in a chunk that has a blank cell. Identical rows land in the same split.
+    '''
+    hashes = pd.util.hash_pandas_object(chunk, index=False, hash_key=f"{random_state:016d}"[-16:])
+    return (hashes.to_numpy() % _SPLIT_BUCKETS) < round(test_size * _SPLIT_BUCKETS)
 
 class DataIngestion:
     def __init__(self):
         self.ingestion_config = DataIngestionConfig()
 
     def initiate_data_ingestion(self):
+        '''
+        Streams the source CSV in chunks of `chunk_size` rows, appending each
+        chunk to raw.csv and its hash-split rows to train.csv / test.csv. The
+        files are written next to their destination and renamed into place
+        once complete.
+        '''
         logging.info("Entered the data ingestion method or component")
+        config = self.ingestion_config
+        destinations = [config.raw_data_path, config.train_data_path, config.test_data_path]
+        temporary = [f"{path}.{os.getpid()}.tmp" for path in destinations]
         try:
-            ##df = pd.read_csv('notebook\data\stud.csv')
-            ##df = pd.read_csv('notebook/data/stud.csv')
-            df= pd.read_csv('D:/mlproject/notebook/data/stud.csv')
-
-            logging.info('Read the dataset as dataframe ')
+            os.makedirs(os.path.dirname(config.train_data_path),exist_ok=True)
 
-            os.makedirs(os.path.dirname(self.ingestion_config.train_data_path),exist_ok=True)
+            logging.info(f"Reading {config.source_data_path} in chunks of {config.chunk_size} rows")
+            rows = {"raw": 0, "train": 0, "test": 0}
+            files = [open(path, "w", newline="") for path in temporary]
+            try:
+                raw_file, train_file, test_file = files
+                # Fields are kept as the source's text, so the split and the copies do not depend on chunking.
+                reader = pd.read_csv(config.source_data_path, chunksize=config.chunk_size, dtype=str, keep_default_na=False)
+                for index, chunk in enumerate(reader):
+                    header = index == 0
+                    test_rows = split_mask(chunk, config.test_size, config.random_state)
+                    chunk.to_csv(raw_file, index=False, header=header)
+                    chunk[~test_rows].to_csv(train_file, index=False, header=header)
+                    chunk[test_rows].to_csv(test_file, index=False, header=header)
+                    rows["raw"] += len(chunk)
+                    rows["test"] += int(test_rows.sum())
+                for file_obj in files:
+                    file_obj.flush()
+                    os.fsync(file_obj.fileno())
+            finally:
+                for file_obj in files:
+                    file_obj.close()
+            if rows["raw"] == 0:
+                raise ValueError(f"No rows in {config.source_data_path}")
+            rows["train"] = rows["raw"] - rows["test"]
 
-            df.to_csv(self.ingestion_config.raw_data_path,index=False,header=True)
+            for source, destination in zip(temporary, destinations):
+                os.replace(source, destination)
 
-            logging.info("Train test split initiated")
-            train_set , test_set=train_test_split(df,test_size=0.2,random_state=42)
-
-            train_set.to_csv(self.ingestion_config.train_data_path,index=False,header=True)
-            test_set.to_csv(self.ingestion_config.test_data_path,index=False,header=True)
-
-            logging.info("Inmgestion of the data is completed")
+            logging.info(f"Ingestion of the data is completed: {rows}")
 
             return(
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path
+                config.train_data_path,
+                config.test_data_path
             )
 
         except Exception as e:
+            for path in temporary:
+                if os.path.exists(path):
+                    os.remove(path)
             raise CustomException(e,sys)
     
 if __name__=="__main__":
-    obj = DataIngestion()
-    train_data,test_data=obj.initiate_data_ingestion()
+    # Ingestion, transformation and training, each skipped when its inputs are unchanged.
+    from src.pipepline.train_pipeline import TrainPipeline
 
-    data_transformation = DataTransformation()
-    train_arr,test_arr,_=data_transformation.initiate_data_transformation(train_data,test_data)    
-    
-    modeltrainer=ModelTrainer()
-    print(modeltrainer.initiate_model_trainer(train_arr,test_arr))
\ No newline at end of file
+    print(TrainPipeline().initiate_training())
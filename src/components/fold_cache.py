@@ -0,0 +1,93 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_ALIGNMENT = 64
+_FOLD_PARTS = ("X_train", "y_train", "X_test", "y_test")
+
+
+class FoldCache:
+    '''
+    Cross-validation fold matrices built once and handed to every candidate.
+
+    Each (resource, fold) gets contiguous X_train/y_train/X_test/y_test
+    arrays of one dtype. With shared=True they are packed into a single
+    shared-memory block, and pool workers map the same pages through
+    `attach(descriptor)` instead of receiving and re-slicing copies.
+    The arrays are read-only so no candidate can change another's data.
+    '''
+
+    def __init__(self, arrays, shm=None, descriptor=None):
+        self.arrays = arrays
+        self._shm = shm
+        self._descriptor = descriptor
+
+    @staticmethod
+    def _layout(n_features, splits, dtype):
+        layout = []
+        offset = 0
+        for resource, folds in splits.items():
+            for fold_index, (train_idx, test_idx) in enumerate(folds):
+                shapes = ((len(train_idx), n_features), (len(train_idx),), (len(test_idx), n_features), (len(test_idx),))
+                for part, shape in zip(_FOLD_PARTS, shapes):
+                    layout.append(((resource, fold_index, part), shape, offset))
+                    nbytes = int(np.prod(shape)) * dtype.itemsize
+                    offset += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+        return layout, offset
+
+    @classmethod
+    def _views(cls, buffer, layout, dtype):
+        arrays = {}
+        for key, shape, offset in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            array.flags.writeable = False
+            arrays[key] = array
+        return arrays
+
+    @classmethod
+    def build(cls, X, y, splits, dtype="float64", shared=False):
+        '''
+        `splits` maps a resource (rows used) to its list of (train, test)
+        index pairs into X/y.
+        '''
+        dtype = np.dtype(dtype)
+        X = np.asarray(X)
+        y = np.asarray(y)
+        layout, size = cls._layout(X.shape[1], splits, dtype)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1)) if shared else None
+        buffer = shm.buf if shared else bytearray(max(size, 1))
+        for key, shape, offset in layout:
+            resource, fold_index, part = key
+            rows = splits[resource][fold_index][0 if part.endswith("train") else 1]
+            source = X if part.startswith("X") else y
+            np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)[...] = source[rows]
+
+        descriptor = (shm.name, layout, dtype.str) if shared else None
+        return cls(cls._views(buffer, layout, dtype), shm, descriptor)
+
+    @property
+    def descriptor(self):
+        '''Picklable handle for `attach` in another process (shared caches only).'''
+        if self._shm is None:
+            raise ValueError("Only a shared FoldCache can be attached from another process")
+        return self._descriptor
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, layout, dtype = descriptor
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(cls._views(shm.buf, layout, np.dtype(dtype)), shm, descriptor)
+
+    def fold(self, resource, fold_index):
+        return tuple(self.arrays[(resource, fold_index, part)] for part in _FOLD_PARTS)
+
+    def close(self, unlink=False):
+        if self._shm is None:
+            return
+        # Views must be dropped before the mapping can be closed.
+        self.arrays = {}
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
@@ -0,0 +1,320 @@
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack, closing, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import KFold, ParameterGrid
+
+from src.components.fold_cache import FoldCache
+from src.components.score_store import ScoreStore, data_digest
+from src.exception import CustomException
+from src.logger import logging
+
+# Estimators that run their own thread pool, keyed by class name, with the
+# parameter that sizes it. Inside the process pool they are pinned to their
+# share of the worker budget so processes x threads never exceeds it.
+THREADED_ESTIMATOR_PARAMS = {
+    "RandomForestRegressor": "n_jobs",
+    "XGBRegressor": "n_jobs",
+    "CatBoostRegressor": "thread_count",
+}
+
+SEARCH_STRATEGIES = ("grid", "halving")
+
+# Grid parameters that successive halving uses as the round budget instead of
+# searching over them; models without one are budgeted by training rows.
+HALVING_RESOURCE_PARAMS = ("n_estimators", "iterations")
+
+
+def set_estimator_threads(estimator, threads):
+    param = THREADED_ESTIMATOR_PARAMS.get(type(estimator).__name__)
+    if param is not None:
+        estimator.set_params(**{param: threads})
+    return estimator
+
+
+@dataclass
+class ModelSearchConfig:
+    n_jobs: int = int(os.environ.get("MODEL_SEARCH_N_JOBS", os.cpu_count() or 1))
+    cv: int = 3
+    # "grid" scores every candidate on all rows; "halving" drops weak candidates after cheap rounds.
+    strategy: str = "grid"
+    # Most candidates evaluated per model; larger grids are sampled down. None keeps the full grid.
+    budget: Optional[int] = None
+    halving_factor: int = 3
+    # Fewest training rows in a halving round for models budgeted by rows; None means 2 * cv.
+    halving_min_resources: Optional[int] = None
+    random_state: int = 42
+    # dtype of the cached fold matrices; "float32" halves their memory at some cost in precision.
+    fold_dtype: str = "float64"
+    # SQLite memo of (model, params, fold, data) scores reused across runs; empty disables it.
+    score_cache_path: Optional[str] = os.environ.get(
+        "MODEL_SEARCH_SCORE_CACHE", os.path.join("artifacts", "cache", "cv_scores.sqlite")
+    )
+    # "spawn" avoids forking a parent whose OpenMP runtime (xgboost/catboost) is already initialised.
+    mp_context: str = "spawn"
+
+
+_worker_state = {}
+
+
+def _init_worker(models, folds, threads):
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(threads)
+    if not isinstance(folds, FoldCache):
+        folds = FoldCache.attach(folds)
+    _worker_state.update(models=models, folds=folds, threads=threads)
+
+
+def _fit_and_score(model_name, params, resource, fold_index):
+    state = _worker_state
+    X_train, y_train, X_test, y_test = state["folds"].fold(resource, fold_index)
+
+    estimator = clone(state["models"][model_name]).set_params(**params)
+    if state["threads"] is not None:
+        set_estimator_threads(estimator, state["threads"])
+
+    start = time.perf_counter()
+    try:
+        estimator.fit(X_train, y_train)
+        score = estimator.score(X_test, y_test)
+    except Exception as e:
+        # Same as GridSearchCV(error_score=np.nan): a failing candidate is skipped, not fatal.
+        logging.warning(f"{model_name} failed with {params} on fold {fold_index}: {e}")
+        score = np.nan
+    return score, time.perf_counter() - start
+
+
+class ModelSearch:
+    '''
+    Hyperparameter search for several models at once, with every
+    (model, parameter combination, fold) fit scheduled as its own task on a
+    process pool of `n_jobs` workers.
+
+    With strategy="grid" scores match GridSearchCV(cv=3): the estimator's
+    own score (R^2) on unshuffled KFold splits, averaged over folds, first
+    best candidate wins. With strategy="halving" candidates are first scored
+    on a small budget and only the best 1/halving_factor of them move on to
+    the next round, which gets halving_factor times more (successive
+    halving, as in sklearn's HalvingGridSearchCV). For models whose grid has
+    n_estimators/iterations the budget is that iteration count, ending at
+    the largest grid value; otherwise it is the number of training rows.
+    Combined with `budget`, search time depends on the budget rather than on
+    the size of the grids.
+    '''
+
+    def __init__(self, models, param, config=None):
+        self.models = models
+        self.param = param
+        self.config = config or ModelSearchConfig()
+        if self.config.strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy {self.config.strategy!r}, expected one of {SEARCH_STRATEGIES}")
+        self.timings_ = {}
+        self.wall_seconds_ = None
+
+    def _resource_param(self, model_name):
+        if self.config.strategy != "halving":
+            return None
+        grid = self.param.get(model_name, {})
+        return next((name for name in HALVING_RESOURCE_PARAMS if len(grid.get(name, [])) > 1), None)
+
+    def _candidates(self, model_name):
+        grid = dict(self.param.get(model_name, {}))
+        resource_param = self._resource_param(model_name)
+        if resource_param is not None:
+            # The iteration count becomes the per-round budget instead of a grid axis.
+            grid.pop(resource_param)
+        candidates = list(ParameterGrid(grid))
+        budget = self.config.budget
+        if budget is not None and len(candidates) > budget:
+            rng = np.random.default_rng(self.config.random_state)
+            keep = np.sort(rng.choice(len(candidates), size=budget, replace=False))
+            candidates = [candidates[i] for i in keep]
+        return candidates
+
+    def _schedule(self, model_name, n_candidates, n_samples):
+        '''
+        Budget of each round for a model with `n_candidates` candidates:
+        iteration counts when its grid has n_estimators/iterations, else rows.
+        '''
+        resource_param = self._resource_param(model_name)
+        if resource_param is not None:
+            values = self.param[model_name][resource_param]
+            min_resources, max_resources = min(values), max(values)
+        else:
+            min_resources = self.config.halving_min_resources or 2 * self.config.cv
+            max_resources = n_samples
+        if self.config.strategy == "grid" or n_candidates == 1:
+            return [max_resources]
+
+        factor = self.config.halving_factor
+        required_rounds = 1 + int(math.floor(math.log(n_candidates, factor)))
+        possible_rounds = 1 + int(math.floor(math.log(max_resources / min_resources, factor)))
+        n_rounds = max(1, min(required_rounds, possible_rounds))
+        # Counted back from the full budget so the last round always uses all of it.
+        return [max(min_resources, max_resources // factor ** (n_rounds - 1 - i)) for i in range(n_rounds)]
+
+    def _splits(self, resources, n_samples):
+        '''KFold splits per subsample size, as indices into the full training rows.'''
+        permutation = np.random.default_rng(self.config.random_state).permutation(n_samples)
+        kfold = KFold(n_splits=self.config.cv)
+        splits = {}
+        for resource in resources:
+            rows = np.arange(n_samples) if resource == n_samples else np.sort(permutation[:resource])
+            splits[resource] = [(rows[train], rows[test]) for train, test in kfold.split(rows)]
+        return splits
+
+    def _start_workers(self, stack, X, y, splits, workers):
+        if workers <= 1:
+            # In-process: threaded estimators keep their own defaults.
+            _init_worker(self.models, FoldCache.build(X, y, splits, self.config.fold_dtype), threads=None)
+            stack.callback(_worker_state.clear)
+            return lambda tasks: [_fit_and_score(*task) for task in tasks]
+
+        threads = max(1, self.config.n_jobs // workers)
+        folds = FoldCache.build(X, y, splits, self.config.fold_dtype, shared=True)
+        stack.callback(folds.close, unlink=True)
+        pool = stack.enter_context(ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(self.config.mp_context),
+            initializer=_init_worker,
+            initargs=(self.models, folds.descriptor, threads),
+        ))
+
+        def run(tasks):
+            futures = {pool.submit(_fit_and_score, *task): i for i, task in enumerate(tasks)}
+            results = [None] * len(tasks)
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+            return results
+        return run
+
+    @contextmanager
+    def _executor(self, X, y, splits):
+        '''
+        Yields run(tasks) -> [(score, seconds)]. Workers and the fold cache are
+        only set up once there is something to fit, sized by that first batch.
+        '''
+        with ExitStack() as stack:
+            started = []
+
+            def run(tasks):
+                if not tasks:
+                    return []
+                if not started:
+                    started.append(self._start_workers(stack, X, y, splits, min(self.config.n_jobs, len(tasks))))
+                return started[0](tasks)
+            yield run
+
+    def _open_score_store(self, X, y):
+        if not self.config.score_cache_path:
+            return None
+        context = {
+            "cv": self.config.cv,
+            "random_state": self.config.random_state,
+            "fold_dtype": self.config.fold_dtype,
+            "data": data_digest(X, y),
+        }
+        return ScoreStore(self.config.score_cache_path, context)
+
+    def _run_memoized(self, run, store, tasks):
+        '''Runs the tasks not found in the score store; yields (score, seconds, cached) in task order.'''
+        if store is None:
+            return iter([(score, seconds, False) for score, seconds in run(tasks)])
+
+        keys = [store.key(self.models[name], params, rows, fold) for name, params, rows, fold in tasks]
+        found = store.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        computed = dict(zip(missing, run([tasks[i] for i in missing])))
+        store.put_many(
+            (keys[i], tasks[i][0], tasks[i][1], tasks[i][2], tasks[i][3], *computed[i]) for i in missing
+        )
+        return iter([
+            (*computed[i], False) if i in computed else (*found[keys[i]], True)
+            for i in range(len(tasks))
+        ])
+
+    def fit(self, X, y):
+        '''
+        Returns {model name: best params}. Per-model fit count and fit time
+        summed over workers are kept in `timings_`.
+        '''
+        try:
+            n_samples = len(X)
+            cv = self.config.cv
+
+            candidates = {name: self._candidates(name) for name in self.models}
+            schedules = {name: self._schedule(name, len(candidates[name]), n_samples) for name in self.models}
+            resource_params = {name: self._resource_param(name) for name in self.models}
+
+            def with_budget(name, params, budget):
+                # Returns (params, rows) for a candidate at a round budget.
+                if resource_params[name] is None:
+                    return params, budget
+                return dict(params, **{resource_params[name]: budget}), n_samples
+
+            # Candidates still in the running; a single candidate needs no search at all.
+            alive = {name: list(range(len(cands))) for name, cands in candidates.items() if len(cands) > 1}
+            best_params = {
+                name: with_budget(name, cands[0], schedules[name][-1])[0]
+                for name, cands in candidates.items() if len(cands) == 1
+            }
+            self.timings_ = {name: {"fits": 0, "cached": 0, "search_seconds": 0.0} for name in self.models}
+
+            splits = self._splits(
+                {with_budget(name, {}, budget)[1] for name in alive for budget in schedules[name]},
+                n_samples,
+            )
+            first_round_tasks = sum(len(alive[name]) * cv for name in alive)
+            n_rounds = max((len(schedules[name]) for name in alive), default=0)
+            logging.info(
+                f"Model search ({self.config.strategy}): {first_round_tasks} fits in the first of "
+                f"{n_rounds} rounds on up to {self.config.n_jobs} workers"
+            )
+
+            start = time.perf_counter()
+            store = self._open_score_store(X, y)
+            with self._executor(X, y, splits) as run, (closing(store) if store else nullcontext()):
+                for round_index in range(n_rounds):
+                    # Every model still searching contributes its round to the same batch of tasks.
+                    active = [name for name in alive if round_index < len(schedules[name])]
+                    tasks = [
+                        (name, *with_budget(name, candidates[name][i], schedules[name][round_index]), fold)
+                        for name in active
+                        for i in alive[name]
+                        for fold in range(cv)
+                    ]
+                    results = self._run_memoized(run, store, tasks)
+
+                    for name in active:
+                        means = []
+                        for _ in alive[name]:
+                            fold_results = [next(results) for _ in range(cv)]
+                            means.append(np.mean([score for score, _, _ in fold_results]))
+                            for _, seconds, cached in fold_results:
+                                self.timings_[name]["cached" if cached else "fits"] += 1
+                                self.timings_[name]["search_seconds"] += 0.0 if cached else seconds
+
+                        means = np.array(means)
+                        if np.all(np.isnan(means)):
+                            raise ValueError(f"All candidates failed for {name}")
+                        # Stable ordering on -score keeps the first of equally good candidates.
+                        ranked = [alive[name][i] for i in np.argsort(-np.nan_to_num(means, nan=-np.inf), kind="stable")]
+                        if round_index == len(schedules[name]) - 1:
+                            best_params[name] = with_budget(name, candidates[name][ranked[0]], schedules[name][-1])[0]
+                        else:
+                            keep = math.ceil(len(ranked) / self.config.halving_factor)
+                            alive[name] = sorted(ranked[:keep])
+
+            self.wall_seconds_ = time.perf_counter() - start
+            return best_params
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,31 +1,117 @@
+import json
 import os
 import sys
 from dataclasses import dataclass
+from typing import Optional
 
-from catboost import CatBoostRegressor
-from sklearn.ensemble import(
-    AdaBoostRegressor,
-    GradientBoostingRegressor,
-    RandomForestRegressor,
-)
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
-from xgboost import XGBRegressor
 
+from src.components.model_search import ModelSearchConfig
 from src.exception import CustomException
 from src.logger import logging
+from src.profiling import profiled
 from src.utils import save_object,evaluate_models
 
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join("artifacts","model.pkl")
+    search_report_file_path: str = os.path.join("artifacts","model_report.json")
+    # Worker processes for the (model, params, fold) search; threaded estimators are pinned to fit the budget.
+    search_n_jobs: int = int(os.environ.get("MODEL_SEARCH_N_JOBS", os.cpu_count() or 1))
+    # "grid" (exhaustive) or "halving" (successive halving, see ModelSearch).
+    search_strategy: str = os.environ.get("MODEL_SEARCH_STRATEGY", "grid")
+    # Most parameter combinations tried per model; None tries the whole grid.
+    search_budget: Optional[int] = int(os.environ["MODEL_SEARCH_BUDGET"]) if os.environ.get("MODEL_SEARCH_BUDGET") else None
+    halving_factor: int = 3
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config=ModelTrainerConfig()
 
+    def get_search_config(self):
+        config = self.model_trainer_config
+        return ModelSearchConfig(
+            n_jobs=config.search_n_jobs,
+            strategy=config.search_strategy,
+            budget=config.search_budget,
+            halving_factor=config.halving_factor,
+        )
+
+    def get_models(self):
+        # Imported here so importing this module (e.g. for its config) does not load every library.
+        from catboost import CatBoostRegressor
+        from sklearn.ensemble import(
+            AdaBoostRegressor,
+            GradientBoostingRegressor,
+            RandomForestRegressor,
+        )
+        from sklearn.linear_model import LinearRegression
+        from sklearn.neighbors import KNeighborsRegressor
+        from sklearn.tree import DecisionTreeRegressor
+        from xgboost import XGBRegressor
+
+        models = {
+            "Random Forest": RandomForestRegressor(),
+            "Decision Tree": DecisionTreeRegressor(),
+            "Gradient Boosting": GradientBoostingRegressor(),
+            "Linear Regression": LinearRegression(),
+            "K-Neighbors Regressor": KNeighborsRegressor(),
+            "XGBRegressor": XGBRegressor(),
+            "CatBoosting Regressor": CatBoostRegressor(verbose=False),
+            "AdaBoost Regressor":AdaBoostRegressor(),   
+
+        }
+        return models
+
+    def get_params(self):
+        params={
+            "Decision Tree": {
+                'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
+                # 'splitter':['best','random'],
+                # 'max_features':['sqrt','log2'],
+            },
+            "Random Forest":{
+                # 'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
+
+#'max_features':['sqrt','log2',None],
+                'n_estimators': [8,16,32,64,128,256]
+            },
+            "Gradient Boosting":{
+                # 'loss':['squared_error', 'huber', 'absolute_error', 'quantile'],
+                'learning_rate':[.1,.01,.05,.001],
+                'subsample':[0.6,0.7,0.75,0.8,0.85,0.9],
+                # 'criterion':['squared_error', 'friedman_mse'],
+                # 'max_features':['auto','sqrt','log2'],
+                'n_estimators': [8,16,32,64,128,256]
+            },
+            "Linear Regression":{},
+            "K-Neighbors Regressor":{
+                'n_neighbors':[5,7,9,11],
+                #'weights':['uniform','distance'],
+                #'algorithm':['ball_tree','kd_tree','brute']
+            },
+            "XGBRegressor":{
+                'learning_rate':[.1,.01,.05,.001],
+                'n_estimators': [8,16,32,64,128,256]
+            },
+            "CatBoosting Regressor":{
+                'depth': [6,8,10],
+                'learning_rate': [0.01, 0.05, 0.1],
+                'iterations': [30, 50, 100]
+            },
+            "AdaBoost Regressor":{
+                'learning_rate':[.1,.01,0.5,.001],
+                # 'loss':['linear','square','exponential'],
+                'n_estimators': [8,16,32,64,128,256]
+            },
+            
+
+
+        }
+        return params
+
+    # Profiled into logs/profiles when PROFILE_TRAINING=1.
+    @profiled("model_trainer")
     def initiate_model_trainer(self , train_array,test_array):
         try:
             logging.info("Split training and test input data")
@@ -35,63 +121,11 @@ class ModelTrainer:
                 test_array[:,:-1],
                 test_array[:,-1]
             )
-            models = {
-                "Random Forest": RandomForestRegressor(),
-                "Decision Tree": DecisionTreeRegressor(),
-                "Gradient Boosting": GradientBoostingRegressor(),
-                "Linear Regression": LinearRegression(),
-                "K-Neighbors Regressor": KNeighborsRegressor(),
-                "XGBRegressor": XGBRegressor(),
-                "CatBoosting Regressor": CatBoostRegressor(verbose=False),
-                "AdaBoost Regressor":AdaBoostRegressor(),   
+            models = self.get_models()
+            params = self.get_params()
 
-            }
-            params={
-                "Decision Tree": {
-                    'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
-                    # 'splitter':['best','random'],
-                    # 'max_features':['sqrt','log2'],
-                },
-                "Random Forest":{
-                    # 'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
-
-#'max_features':['sqrt','log2',None],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "Gradient Boosting":{
-                    # 'loss':['squared_error', 'huber', 'absolute_error', 'quantile'],
-                    'learning_rate':[.1,.01,.05,.001],
-                    'subsample':[0.6,0.7,0.75,0.8,0.85,0.9],
-                    # 'criterion':['squared_error', 'friedman_mse'],
-                    # 'max_features':['auto','sqrt','log2'],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "Linear Regression":{},
-                "K-Neighbors Regressor":{
-                    'n_neighbors':[5,7,9,11],
-                    #'weights':['uniform','distance'],
-                    #'algorithm':['ball_tree','kd_tree','brute']
-                },
-                "XGBRegressor":{
-                    'learning_rate':[.1,.01,.05,.001],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "CatBoosting Regressor":{
-                    'depth': [6,8,10],
-                    'learning_rate': [0.01, 0.05, 0.1],
-                    'iterations': [30, 50, 100]
-                },
-                "AdaBoost Regressor":{
-                    'learning_rate':[.1,.01,0.5,.001],
-                    # 'loss':['linear','square','exponential'],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                
-
-
-            }
-
-            model_report:dict=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,models=models,param=params)
+            model_report:dict=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,models=models,param=params,
+                                             search_config=self.get_search_config())
 
             best_model_score = max(sorted(model_report.values()))
 
@@ -109,6 +143,17 @@ class ModelTrainer:
                 obj=best_model
             )
 
+            search_report = {
+                "best_model": best_model_name,
+                "test_r2": model_report,
+                "best_params": {
+                    name: {key: models[name].get_params()[key] for key in params[name]}
+                    for name in models
+                },
+            }
+            with open(self.model_trainer_config.search_report_file_path,"w") as file_obj:
+                json.dump(search_report,file_obj,indent=2,default=str)
+
             predicted = best_model.predict(X_test)
 
             r2_square = r2_score(y_test,predicted)
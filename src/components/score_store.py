@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from src.stage_cache import describe, digest, library_versions
+
+
+def data_digest(X, y):
+    sha = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        sha.update(f"{array.dtype.str}{array.shape}".encode())
+        sha.update(memoryview(array).cast("B"))
+    return sha.hexdigest()
+
+
+class ScoreStore:
+    '''
+    On-disk memo of cross-validation scores in SQLite.
+
+    A score is keyed by the estimator description (class and fixed params),
+    the candidate's params, the rows and fold it was scored on, the CV
+    layout, a hash of the training data and the library versions. Adding a
+    value to a grid therefore only costs the fits for the new combinations.
+    Failed fits (NaN scores) are not kept: the failure may be transient, e.g.
+    a worker running out of memory, so the next search fits them again.
+    '''
+
+    def __init__(self, path, context):
+        self.path = path
+        # Everything shared by all scores of one search: data hash, CV layout, versions.
+        self.context = dict(context, versions=library_versions())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cv_scores ("
+            " key TEXT PRIMARY KEY, model TEXT, params TEXT, resource INTEGER, fold INTEGER,"
+            " score REAL, seconds REAL, created_at REAL)"
+        )
+        self._connection.commit()
+
+    def key(self, estimator, params, resource, fold_index):
+        return digest({
+            "estimator": describe(estimator),
+            "params": describe(params),
+            "resource": resource,
+            "fold": fold_index,
+            "context": self.context,
+        })
+
+    def get_many(self, keys):
+        '''Returns {key: (score, seconds)} for the keys already stored.'''
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            # NULL scores are failures stored by earlier versions; treat them as missing.
+            rows = self._connection.execute(
+                f"SELECT key, score, seconds FROM cv_scores WHERE key IN ({','.join('?' * len(batch))})"
+                " AND score IS NOT NULL",
+                batch,
+            )
+            for key, score, seconds in rows:
+                found[key] = (score, seconds)
+        return found
+
+    def put_many(self, entries):
+        '''
+        `entries` is an iterable of (key, model name, params, resource, fold, score, seconds).
+        Entries with a NaN score (a failed fit) are skipped.
+        '''
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO cv_scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, model, json.dumps(describe(params)), int(resource), int(fold), float(score), float(seconds), now)
+                    for key, model, params, resource, fold, score, seconds in entries
+                    if not np.isnan(score)
+                ],
+            )
+
+    def close(self):
+        self._connection.close()
@@ -1,17 +1,145 @@
+'''
+Process-wide logging setup.
+
+Records go through a bounded in-memory queue to a listener thread that
+formats them and writes the log file, so a request thread only pays for
+building the LogRecord. When the queue is full (the disk cannot keep up)
+records are dropped and counted instead of blocking the caller.
+
+Structured fields are passed as `extra={"fields": {...}}` and written as
+key=value pairs, or as one JSON object per line with LOG_FORMAT=json.
+`sampled()` decides whether a request also logs its verbose fields.
+'''
+import atexit
+import json
 import logging
 import os
+import queue
+import random
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 logs_path = os.path.join(os.getcwd(),"logs",LOG_FILE)
-os.makedirs(logs_path,exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(logs_path,LOG_FILE)
 
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+# Records buffered for the writer thread before new ones are dropped.
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# Fraction of requests that log their verbose fields (inputs, predictions).
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+
+
+class LazyFileHandler(logging.FileHandler):
+    '''Creates the log directory and file on the first record instead of at import.'''
+
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class StructuredFormatter(logging.Formatter):
+    '''The repo's text line with the record's `fields` appended, or a JSON object per line.'''
+
+    def __init__(self, json_lines=False):
+        super().__init__("[%(asctime)s]%(lineno)d %(name)s -%(levelname)s -%(message)s")
+        self.json_lines = json_lines
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+    def format(self, record):
+        if not self.json_lines:
+            return super().format(record)
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    '''
+    QueueHandler that never blocks and leaves formatting to the listener.
+
+    The stdlib handler renders every message in the calling thread before
+    enqueueing it; here the record is queued as is, so "%s" arguments should
+    be values that do not change after the call (numbers, strings).
+    '''
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Blocks until the writer thread makes room, so records queued before exit are kept.
+        self.queue.put(self._sentinel)
+
+
+_file_handler = LazyFileHandler(LOG_FILE_PATH)
+_file_handler.setFormatter(StructuredFormatter(json_lines=LOG_FORMAT == "json"))
+_queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+_listener = None
+
+
+def _start_listener():
+    global _listener
+    # A fresh queue: the parent's may have been locked by another thread at fork time.
+    _queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener = _Listener(_queue_handler.queue, _file_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def sampled(rate=None):
+    '''True for about `rate` (LOG_SAMPLE_RATE by default) of calls.'''
+    rate = LOG_SAMPLE_RATE if rate is None else rate
+    return rate >= 1 or random.random() < rate
+
+
+def log_stats():
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "sample_rate": LOG_SAMPLE_RATE,
+    }
+
+
+_start_listener()
+# The writer thread does not survive fork; forked workers start their own.
+os.register_at_fork(after_in_child=_start_listener)
+atexit.register(_stop_listener)
+
 logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format = "[%(asctime)s]%(lineno)d %(name)s -%(levelname)s -%(message)s",
+    handlers=[_queue_handler],
     level = logging.INFO,
 )
-
-
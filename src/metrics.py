@@ -0,0 +1,245 @@
+'''
+In-process metrics rendered in the Prometheus text format.
+
+Counters, gauges and histograms are plain Python objects; a labelled child
+is created once and then reused, so recording a value is a bisect and a few
+additions. Counter and histogram updates are not locked (an uncontended
+lock would double the cost of an observation): under the GIL an update is
+only lost if a thread switch lands inside one `+=`, which is rare enough
+for monitoring. Gauges go up and down, so a lost update would never be
+corrected; they do take a lock. `register_stats` exports an existing
+stats() dict (micro-batcher, cache, registry) as gauges at scrape time
+instead of instrumenting those classes twice.
+
+Metrics are per process: behind prefork_server.py each scrape reports the
+worker that answered it.
+'''
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from src.exception import CustomException
+
+# Seconds; from a few microseconds (compiled transform) up to a cold artifact load.
+DEFAULT_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+@dataclass
+class MetricsConfig:
+    enabled: bool = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+
+config = MetricsConfig()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        if config.enabled:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"]
+
+
+class _LockedValue(_Value):
+    __slots__ = ("_lock",)
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if config.enabled:
+            with self._lock:
+                self.value += amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _LockedValue()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        if config.enabled:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values, child):
+        counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, [('le', le)])} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+_metrics = []
+_stats_sources = []
+
+
+def _register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+STAGE_SECONDS = _register(Histogram(
+    "serving_stage_seconds", "Time spent in each stage of serving a prediction.", ["stage"]
+))
+REQUEST_SECONDS = _register(Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ["route", "method"]
+))
+REQUESTS = _register(Counter(
+    "http_requests_total", "Requests answered, by route and status code.", ["route", "method", "status"]
+))
+REQUEST_ERRORS = _register(Counter(
+    "http_request_errors_total", "Requests that failed, by route and exception type.", ["route", "exception"]
+))
+IN_FLIGHT = _register(Gauge("http_requests_in_flight", "Requests currently being served."))
+
+
+def stage(name):
+    '''The histogram child for a serving stage; bind it once and call .observe(seconds).'''
+    return STAGE_SECONDS.labels(name)
+
+
+def record_error(route, error):
+    # CustomException wraps the error raised in the except block it came from.
+    if isinstance(error, CustomException) and error.__context__ is not None:
+        error = error.__context__
+    REQUEST_ERRORS.labels(route, type(error).__name__).inc()
+
+
+def register_stats(prefix, stats_fn):
+    '''Exports the numeric entries of `stats_fn()` as `<prefix>_<key>` gauges on every scrape.'''
+    _stats_sources.append((prefix, stats_fn))
+
+
+def _render_stats(prefix, stats):
+    lines = []
+    for key, value in sorted(stats.items()):
+        name = f"{prefix}_{key}"
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.extend([f"# TYPE {name} gauge", f"{name} {value}"])
+        elif isinstance(value, dict):
+            # e.g. the micro-batcher's batch-size histogram: one series per key.
+            series = [(item, count) for item, count in sorted(value.items()) if isinstance(count, (int, float))]
+            if series:
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(f'{name}{{key="{_escape(item)}"}} {count}' for item, count in series)
+    return lines
+
+
+def render():
+    '''All metrics in the Prometheus text exposition format (version 0.0.4).'''
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for prefix, stats_fn in _stats_sources:
+        try:
+            stats = stats_fn()
+        except Exception:
+            continue
+        if stats:
+            lines.extend(_render_stats(prefix, stats))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,218 @@
+'''
+Offline bulk scoring of CSV/Parquet files with the saved artifacts.
+
+    python -m src.pipepline.batch_score input.csv predictions.csv --chunk-size 50000 --workers 4 --resume
+
+The input is read and scored one chunk at a time and each scored chunk is
+written before the next one is read, so memory stays flat whatever the
+file size. CSV output is a single appended file; Parquet output is a
+directory with one part file per chunk. Progress is checkpointed next to
+the output after every chunk so an interrupted run can pick up with
+--resume.
+'''
+import argparse
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipepline.predict_pipeline import CustomDataBatch, PredictPipeline
+
+
+@dataclass
+class BatchScoreConfig:
+    input_path: str
+    output_path: str
+    chunk_size: int = 50000
+    workers: int = 1
+    resume: bool = False
+    prediction_column: str = "prediction"
+    # Input columns copied to the output next to the prediction; None keeps all.
+    keep_columns: Optional[List[str]] = field(default=None)
+    artifacts_dir: Optional[str] = None
+
+
+def _file_format(path):
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet input/output needs pyarrow: pip install pyarrow") from e
+    return pq
+
+
+_worker_pipeline = None
+
+
+def _init_worker(artifacts_dir):
+    global _worker_pipeline
+    registry = ModelRegistry(ModelRegistryConfig(check_interval=0), artifacts_dir=artifacts_dir)
+    registry.get()
+    _worker_pipeline = PredictPipeline(registry=registry)
+
+
+def _score_chunk(chunk, first_row, keep_columns, prediction_column):
+    try:
+        features = CustomDataBatch(chunk).get_data_as_data_frame()
+        preds = _worker_pipeline.predict_batch(features, chunk_size=len(chunk))
+    except ValueError as e:
+        raise ValueError(f"Chunk starting at input row {first_row}: {e}")
+    scored = chunk if keep_columns is None else chunk[keep_columns]
+    return scored.assign(**{prediction_column: preds})
+
+
+class BatchScorer:
+    def __init__(self, config):
+        self.config = config
+        self.input_format = _file_format(config.input_path)
+        self.output_format = _file_format(config.output_path)
+        self.progress_path = config.output_path.rstrip(os.sep) + ".progress.json"
+
+    def _input_fingerprint(self):
+        stat = os.stat(self.config.input_path)
+        return {
+            "input_path": os.path.abspath(self.config.input_path),
+            "input_size": stat.st_size,
+            "input_mtime_ns": stat.st_mtime_ns,
+            "chunk_size": self.config.chunk_size,
+            "output_format": self.output_format,
+        }
+
+    def _load_progress(self):
+        fingerprint = self._input_fingerprint()
+        if not self.config.resume or not os.path.exists(self.progress_path):
+            return dict(fingerprint, chunks_done=0, rows_done=0, output_bytes=0)
+        with open(self.progress_path) as file_obj:
+            progress = json.load(file_obj)
+        if any(progress.get(key) != value for key, value in fingerprint.items()):
+            raise ValueError(
+                f"{self.progress_path} was written for a different input or chunk size; "
+                "remove it or rerun without --resume"
+            )
+        return progress
+
+    def _save_progress(self, progress):
+        tmp_path = self.progress_path + ".tmp"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(progress, file_obj)
+        os.replace(tmp_path, self.progress_path)
+
+    def _read_chunks(self, skip_chunks):
+        chunk_size = self.config.chunk_size
+        if self.input_format == "parquet":
+            pq = _require_pyarrow()
+            batches = pq.ParquetFile(self.config.input_path).iter_batches(batch_size=chunk_size)
+            for batch in itertools.islice(batches, skip_chunks, None):
+                yield batch.to_pandas()
+        else:
+            skip_rows = skip_chunks * chunk_size
+            yield from pd.read_csv(
+                self.config.input_path,
+                chunksize=chunk_size,
+                skiprows=(lambda i: 0 < i <= skip_rows) if skip_rows else None,
+            )
+
+    def _prepare_output(self, progress):
+        path = self.config.output_path
+        if self.output_format == "parquet":
+            _require_pyarrow()
+            os.makedirs(path, exist_ok=True)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Drop whatever a crashed run wrote after its last checkpoint.
+        with open(path, "ab") as file_obj:
+            file_obj.truncate(progress["output_bytes"])
+
+    def _write_chunk(self, scored, chunk_index, progress):
+        path = self.config.output_path
+        if self.output_format == "parquet":
+            scored.to_parquet(os.path.join(path, f"part-{chunk_index:06d}.parquet"), index=False)
+        else:
+            with open(path, "a", newline="") as file_obj:
+                scored.to_csv(file_obj, header=progress["output_bytes"] == 0, index=False)
+            progress["output_bytes"] = os.path.getsize(path)
+        progress["chunks_done"] = chunk_index + 1
+        progress["rows_done"] += len(scored)
+        self._save_progress(progress)
+
+    def initiate_batch_scoring(self):
+        try:
+            config = self.config
+            progress = self._load_progress()
+            if progress["chunks_done"]:
+                logging.info(f"Resuming batch scoring after {progress['rows_done']} rows")
+            self._prepare_output(progress)
+
+            chunks = enumerate(self._read_chunks(progress["chunks_done"]), start=progress["chunks_done"])
+            score_args = (config.keep_columns, config.prediction_column)
+
+            if config.workers <= 1:
+                _init_worker(config.artifacts_dir)
+                for chunk_index, chunk in chunks:
+                    scored = _score_chunk(chunk, chunk_index * config.chunk_size, *score_args)
+                    self._write_chunk(scored, chunk_index, progress)
+            else:
+                # Bounded in-flight window keeps memory flat; results are written in input order.
+                with ProcessPoolExecutor(
+                    max_workers=config.workers,
+                    initializer=_init_worker,
+                    initargs=(config.artifacts_dir,),
+                ) as pool:
+                    pending = deque()
+                    for chunk_index, chunk in chunks:
+                        future = pool.submit(_score_chunk, chunk, chunk_index * config.chunk_size, *score_args)
+                        pending.append((chunk_index, future))
+                        if len(pending) >= 2 * config.workers:
+                            index, done = pending.popleft()
+                            self._write_chunk(done.result(), index, progress)
+                    while pending:
+                        index, done = pending.popleft()
+                        self._write_chunk(done.result(), index, progress)
+
+            logging.info(f"Batch scoring completed: {progress['rows_done']} rows written to {config.output_path}")
+            return progress["rows_done"]
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file in chunks with the saved model.")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path", help="CSV file, or directory of part files when ending in .parquet")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=1, help="processes scoring chunks in parallel")
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    parser.add_argument("--prediction-column", default="prediction")
+    parser.add_argument("--keep-columns", nargs="*", default=None, help="input columns to copy to the output")
+    parser.add_argument("--artifacts-dir", default=None)
+    args = parser.parse_args(argv)
+
+    config = BatchScoreConfig(
+        input_path=args.input_path,
+        output_path=args.output_path,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        resume=args.resume,
+        prediction_column=args.prediction_column,
+        keep_columns=args.keep_columns,
+        artifacts_dir=args.artifacts_dir,
+    )
+    rows = BatchScorer(config).initiate_batch_scoring()
+    print(f"Scored {rows} rows -> {config.output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
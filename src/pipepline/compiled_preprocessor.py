@@ -0,0 +1,149 @@
+from itertools import repeat
+
+import numpy as np
+
+from src.artifact_format import as_array_preprocessor
+
+
+def _is_nan(value):
+    # SimpleImputer(missing_values=np.nan) only fills NaN; None in an object column is a category.
+    return isinstance(value, float) and value != value
+
+
+class CompiledPreprocessor:
+    '''
+    The fitted ColumnTransformer reduced to lookup tables and a few numpy
+    expressions. Numeric columns keep their median, mean and scale; each
+    categorical column becomes a {category: output slot} table with the
+    already-scaled value written there. No pandas and no per-step dispatch,
+    so a single record costs a handful of dict lookups.
+
+    The arithmetic is the same as sklearn's ((x - mean) / scale, 1 / scale
+    for a one-hot hit), so the output is identical to `preprocessor.transform`.
+    '''
+
+    def __init__(self, n_features_out, base, numeric, categorical):
+        self.n_features_out = n_features_out
+        # Output row for an all-zero one-hot encoding (non-zero only if a scaler centres it).
+        self.base = base
+        # (column, output index, fill value or None, mean or None, scale or None)
+        self.numeric = numeric
+        # (column, {category: (output index, value)}, fill category or None, raise on unknown)
+        self.categorical = categorical
+
+    @classmethod
+    def compile(cls, preprocessor):
+        '''Builds the kernel, or returns None if the preprocessor has steps it cannot express.'''
+        array_preprocessor = as_array_preprocessor(preprocessor)
+        if array_preprocessor is None:
+            return None
+
+        base, numeric, categorical = [], [], []
+        for block in array_preprocessor.blocks:
+            kinds = [step["kind"] for step in block["steps"]]
+            steps = {step["kind"]: step for step in block["steps"]}
+            scale = steps.get("scale", {"mean": None, "scale": None})
+            impute = steps.get("impute")
+
+            if "one_hot" in steps:
+                if kinds not in (["one_hot"], ["one_hot", "scale"], ["impute", "one_hot"], ["impute", "one_hot", "scale"]):
+                    return None
+                encoder = steps["one_hot"]
+                start = offset = len(base)
+                width = sum(len(categories) for categories in encoder["categories"])
+                mean = np.zeros(width) if scale["mean"] is None else np.asarray(scale["mean"], dtype=np.float64)
+                if scale["scale"] is None:
+                    zero, hot = 0.0 - mean, 1.0 - mean
+                else:
+                    zero, hot = (0.0 - mean) / scale["scale"], (1.0 - mean) / scale["scale"]
+                base.extend(zero.tolist())
+                for column_index, (column, categories) in enumerate(zip(block["columns"], encoder["categories"])):
+                    table = {}
+                    for category in categories:
+                        table[category] = (offset, float(hot[offset - start]))
+                        offset += 1
+                    fill = impute["values"][column_index] if impute and "values" in impute else None
+                    categorical.append((column, table, fill, encoder["handle_unknown"] == "error"))
+            else:
+                if kinds not in ([], ["impute"], ["scale"], ["impute", "scale"]) or (impute and "statistics" not in impute):
+                    return None
+                for column_index, column in enumerate(block["columns"]):
+                    fill = float(impute["statistics"][column_index]) if impute else None
+                    mean = None if scale["mean"] is None else float(scale["mean"][column_index])
+                    std = None if scale["scale"] is None else float(scale["scale"][column_index])
+                    numeric.append((column, len(base), fill, mean, std))
+                    base.append(0.0)
+        return cls(len(base), np.array(base, dtype=np.float64), numeric, categorical)
+
+    def known_categories(self):
+        return {column: set(table) for column, table, _, _ in self.categorical}
+
+    @staticmethod
+    def _scale(value, mean, scale):
+        if mean is not None:
+            value = value - mean
+        if scale is not None:
+            value = value / scale
+        return value
+
+    def transform_record(self, record):
+        '''One mapping of column -> scalar to a (1, n_features_out) row.'''
+        out = self.base.copy()
+        for column, index, fill, mean, scale in self.numeric:
+            value = record[column]
+            if value is None or _is_nan(value):
+                value = np.nan if fill is None else fill
+            out[index] = self._scale(float(value), mean, scale)
+        for column, table, fill, strict in self.categorical:
+            value = record[column]
+            if fill is not None and _is_nan(value):
+                value = fill
+            hit = table.get(value)
+            if hit is not None:
+                out[hit[0]] = hit[1]
+            elif strict:
+                raise ValueError(f"Found unknown category {value!r} for '{column}' during transform")
+        return out.reshape(1, -1)
+
+    def transform_columns(self, columns):
+        '''Mapping of column -> equal-length sequence (list, ndarray or Series) to a 2-D array.'''
+        n_rows = len(columns[self.numeric[0][0] if self.numeric else self.categorical[0][0]])
+        out = np.tile(self.base, (n_rows, 1))
+        rows = np.arange(n_rows)
+        for column, index, fill, mean, scale in self.numeric:
+            values = np.asarray(columns[column], dtype=np.float64)
+            if fill is not None:
+                missing = np.isnan(values)
+                if missing.any():
+                    values = np.where(missing, fill, values)
+            out[:, index] = self._scale(values, mean, scale)
+        for column, table, fill, strict in self.categorical:
+            values = columns[column]
+            values = values.tolist() if hasattr(values, "tolist") else list(values)
+            hits = list(map(table.get, values, repeat(None, n_rows)))
+            known = np.fromiter((hit is not None for hit in hits), dtype=bool, count=n_rows)
+            if not known.all():
+                for row in np.flatnonzero(~known):
+                    if fill is not None and _is_nan(values[row]):
+                        hits[row] = table.get(fill)
+                    if hits[row] is None and strict:
+                        raise ValueError(f"Found unknown category {values[row]!r} for '{column}' during transform")
+                known = np.fromiter((hit is not None for hit in hits), dtype=bool, count=n_rows)
+            slots = np.array([hit for hit in hits if hit is not None], dtype=np.float64).reshape(-1, 2)
+            out[rows[known], slots[:, 0].astype(np.intp)] = slots[:, 1]
+        return out
+
+    def transform(self, X):
+        '''
+        Accepts a single record (mapping of scalars), a list of records, a
+        mapping of columns, or a DataFrame.
+        '''
+        if isinstance(X, list):
+            return self.transform_columns({column: [record[column] for record in X] for column in self.columns})
+        if isinstance(X, dict) and not any(isinstance(value, (list, tuple, np.ndarray)) for value in X.values()):
+            return self.transform_record(X)
+        return self.transform_columns(X)
+
+    @property
+    def columns(self):
+        return [column for column, *_ in self.numeric] + [column for column, *_ in self.categorical]
@@ -0,0 +1,127 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.logger import logging
+
+
+@dataclass
+class InferencePoolConfig:
+    # "thread" shares one PredictPipeline; "process" preloads one per worker process.
+    kind: str = os.environ.get("INFERENCE_POOL", "thread")
+    workers: int = int(os.environ.get("INFERENCE_POOL_WORKERS", str(os.cpu_count() or 1)))
+    # Calls allowed to wait for a worker; beyond workers + max_queue new calls are rejected.
+    max_queue: int = int(os.environ.get("INFERENCE_POOL_MAX_QUEUE", "64"))
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+_pipeline = None
+
+
+def _init_worker():
+    global _pipeline
+    from src.pipepline.predict_pipeline import PredictPipeline
+
+    _pipeline = PredictPipeline()
+    _pipeline.registry.get()
+
+
+def _call(method, features):
+    return getattr(_pipeline, method)(features)
+
+
+def _warm():
+    return os.getpid()
+
+
+class InferencePool:
+    '''
+    Bounded executor for PredictPipeline calls.
+
+    `submit` returns a concurrent.futures.Future, or raises PoolSaturated
+    when `workers + max_queue` calls are already in flight, so callers can
+    shed load with a 503 instead of letting latency grow without bound.
+    '''
+
+    def __init__(self, pipeline=None, config=None):
+        self.config = config or InferencePoolConfig()
+        self.pipeline = pipeline
+        self._executor = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"submitted": 0, "rejected": 0, "failed": 0, "max_in_flight": 0}
+
+    @property
+    def started(self):
+        return self._executor is not None
+
+    @property
+    def capacity(self):
+        return self.config.workers + self.config.max_queue
+
+    def start(self):
+        '''Creates the executor and loads the artifacts in every worker before traffic arrives.'''
+        with self._start_lock:
+            if self._executor is None:
+                self._start()
+
+    def _start(self):
+        if self.config.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.config.workers, initializer=_init_worker)
+            # Each worker runs _init_worker (artifact load) when it starts; wait for them all.
+            for future in [self._executor.submit(_warm) for _ in range(self.config.workers)]:
+                future.result()
+        else:
+            if self.pipeline is None:
+                from src.pipepline.predict_pipeline import PredictPipeline
+
+                self.pipeline = PredictPipeline()
+            self.pipeline.registry.get()
+            self._executor = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix="inference")
+        logging.info(f"Started {self.config.kind} inference pool with {self.config.workers} workers, queue {self.config.max_queue}")
+
+    def submit(self, method, features):
+        '''Runs `PredictPipeline.<method>(features)` on the pool.'''
+        if self._executor is None:
+            self.start()
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._stats["rejected"] += 1
+                raise PoolSaturated(f"{self._in_flight} inference calls in flight")
+            self._in_flight += 1
+            self._stats["submitted"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+        try:
+            if self.config.kind == "process":
+                future = self._executor.submit(_call, method, features)
+            else:
+                future = self._executor.submit(getattr(self.pipeline, method), features)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None and future.exception() is not None:
+                self._stats["failed"] += 1
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["in_flight"] = self._in_flight
+        stats["kind"] = self.config.kind
+        stats["workers"] = self.config.workers
+        stats["max_queue"] = self.config.max_queue
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
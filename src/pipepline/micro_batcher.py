@@ -0,0 +1,131 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.pipepline.predict_pipeline import stack_features
+
+
+def _rows(features):
+    # A DataFrame carries its own row count; anything else is a single record.
+    return len(features) if hasattr(features, "shape") else 1
+
+
+@dataclass
+class MicroBatcherConfig:
+    enabled: bool = os.environ.get("PREDICT_MICROBATCH", "0") == "1"
+    max_batch_size: int = int(os.environ.get("PREDICT_MICROBATCH_MAX_SIZE", "64"))
+    max_wait_ms: float = float(os.environ.get("PREDICT_MICROBATCH_MAX_WAIT_MS", "2"))
+
+
+class MicroBatcher:
+    '''
+    Coalesces concurrent single-row predictions into one predict call.
+
+    Callers block in `predict`; a background thread collects requests until
+    `max_batch_size` rows are queued or `max_wait_ms` has passed since the
+    first one, scores the stacked features once and hands each caller its rows.
+    Features are DataFrames or single records (CustomData); see `stack_features`.
+    '''
+
+    def __init__(self, predict_fn, config=None, stack_fn=stack_features):
+        self.predict_fn = predict_fn
+        self.stack_fn = stack_fn
+        self.config = config or MicroBatcherConfig()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._stats = {
+            "requests": 0,
+            "rows": 0,
+            "batches": 0,
+            "max_batch_rows": 0,
+            "fallbacks": 0,
+        }
+        # Batch row counts bucketed by upper bound: 1, 2, 4, ... max_batch_size.
+        self._histogram = {}
+
+    def submit(self, features):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((features, future))
+        return future
+
+    def predict(self, features, timeout=None):
+        return self.submit(features).result(timeout=timeout)
+
+    def _ensure_worker(self):
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            thread = threading.Thread(target=self._run, name="predict-micro-batcher", daemon=True)
+            thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = _rows(batch[0][0])
+        deadline = time.monotonic() + self.config.max_wait_ms / 1000.0
+        while rows < self.config.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += _rows(item[0])
+        return batch, rows
+
+    def _run(self):
+        while True:
+            batch, rows = self._collect()
+            self._record(len(batch), rows)
+            try:
+                preds = self.predict_fn(self.stack_fn([features for features, _ in batch]))
+            except Exception as e:
+                self._score_individually(batch, e)
+                continue
+
+            offset = 0
+            for features, future in batch:
+                future.set_result(preds[offset:offset + _rows(features)])
+                offset += _rows(features)
+
+    def _score_individually(self, batch, error):
+        # One bad row must not fail the requests it happened to be batched with.
+        if len(batch) == 1:
+            batch[0][1].set_exception(error)
+            return
+        self._stats["fallbacks"] += 1
+        logging.warning(f"Micro-batch of {len(batch)} requests failed, scoring individually: {error}")
+        for features, future in batch:
+            try:
+                future.set_result(self.predict_fn(features))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _record(self, requests, rows):
+        stats = self._stats
+        stats["requests"] += requests
+        stats["rows"] += rows
+        stats["batches"] += 1
+        stats["max_batch_rows"] = max(stats["max_batch_rows"], rows)
+        bucket = 1
+        while bucket < rows:
+            bucket *= 2
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["mean_batch_rows"] = stats["rows"] / stats["batches"] if stats["batches"] else 0.0
+        stats["batch_rows_histogram"] = {f"le_{bucket}": count for bucket, count in sorted(self._histogram.items())}
+        stats["max_batch_size"] = self.config.max_batch_size
+        stats["max_wait_ms"] = self.config.max_wait_ms
+        return stats
@@ -0,0 +1,292 @@
+import hashlib
+import math
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from src.artifact_format import MANIFEST_FILE_NAME, load_artifacts
+from src.artifact_store import POINTER_FILE_NAME, read_pointer, resolve_artifacts_dir
+from src.exception import CustomException
+from src.logger import logging
+from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+from src.utils import load_object
+
+
+@dataclass
+class ModelRegistryConfig:
+    model_file_name: str = "model.pkl"
+    preprocessor_file_name: str = "preprocessor.pkl"
+    # "dill" loads the pickles; "compact" loads <artifacts>/compact written by src.artifact_format.
+    artifact_format: str = os.environ.get("MODEL_ARTIFACT_FORMAT", "dill")
+    compact_dir_name: str = "compact"
+    # Serve through the CompiledPreprocessor kernel when the preprocessor can be compiled.
+    compile_preprocessor: bool = os.environ.get("MODEL_COMPILE_PREPROCESSOR", "1") != "0"
+    # Seconds between background checks of the artifact files; 0 disables the watcher.
+    check_interval: float = float(os.environ.get("MODEL_CHECK_INTERVAL", "30"))
+    # Score a canary record with reloaded artifacts before swapping them in.
+    validate_reload: bool = os.environ.get("MODEL_VALIDATE_RELOAD", "1") != "0"
+
+
+@dataclass(frozen=True)
+class LoadedArtifacts:
+    model: object
+    preprocessor: object
+    model_path: str
+    preprocessor_path: str
+    model_sha256: str
+    preprocessor_sha256: str
+    loaded_at: float
+    generation: int
+    compiled_preprocessor: object = None
+    # Published version (src/artifact_store.py) the files came from; None for the plain layout.
+    version: str = None
+    # Directory the files were resolved in: the version directory for a published version.
+    directory: str = None
+
+    @property
+    def transformer(self):
+        '''The preprocessor to call at inference time: the compiled kernel when there is one.'''
+        return self.compiled_preprocessor or self.preprocessor
+
+
+def _candidate_artifact_dirs():
+    return [
+        "artifacts",
+        os.path.join(os.getcwd(), "artifacts"),
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "artifacts"),
+    ]
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def validate_artifacts(artifacts):
+    '''
+    Scores a canary record with freshly loaded artifacts and raises if the
+    prediction is missing or not finite.
+    '''
+    from src.pipepline.predict_pipeline import canary_prediction
+
+    prediction = canary_prediction(artifacts)
+    if prediction is not None and not math.isfinite(prediction):
+        raise ValueError(f"Canary prediction is not finite: {prediction}")
+    return prediction
+
+
+class ModelRegistry:
+    '''
+    Holds the loaded model and preprocessor for the whole process.
+
+    Requests only read the current LoadedArtifacts snapshot; a daemon thread
+    stats the files (or the published version pointer) every `check_interval`
+    seconds, loads changed artifacts next to the live ones, scores a canary
+    record with them and only then swaps the snapshot. In-flight requests
+    finish on the snapshot they started with; a reload that fails to load or
+    validate leaves the current one serving.
+    '''
+
+    def __init__(self, config=None, artifacts_dir=None):
+        self.config = config or ModelRegistryConfig()
+        self.artifacts_dir = artifacts_dir
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._artifacts = None
+        self._signatures = None
+        # Signatures of the last reload that failed, so a broken publish is not retried every check.
+        self._rejected = None
+        self._watcher_pid = None
+        self._counters = {
+            "hits": 0,
+            "loads": 0,
+            "reloads": 0,
+            "reload_failures": 0,
+            "checks": 0,
+        }
+
+    def _resolve_paths(self):
+        '''
+        Returns (model_path, preprocessor_path, artifacts_dir, version, directory);
+        version is the published version the paths belong to, None for the plain
+        layout, and directory is where they were found (the version directory).
+        '''
+        dirs = [self.artifacts_dir] if self.artifacts_dir else _candidate_artifact_dirs()
+        tried = []
+        for base_dir in dirs:
+            pointer = read_pointer(base_dir)
+            version = pointer["version"] if pointer else None
+            directory = resolve_artifacts_dir(base_dir)
+            if self.config.artifact_format == "compact":
+                # Both snapshot paths point at the manifest, which lists the hashes of every file.
+                manifest_path = os.path.join(directory, self.config.compact_dir_name, MANIFEST_FILE_NAME)
+                tried.append(manifest_path)
+                if os.path.exists(manifest_path):
+                    return manifest_path, manifest_path, base_dir, version, directory
+                continue
+            model_path = os.path.join(directory, self.config.model_file_name)
+            tried.append(model_path)
+            if os.path.exists(model_path):
+                preprocessor_path = os.path.join(directory, self.config.preprocessor_file_name)
+                if not os.path.exists(preprocessor_path):
+                    raise FileNotFoundError(f"Preprocessor file not found at: {preprocessor_path}")
+                return model_path, preprocessor_path, base_dir, version, directory
+        raise FileNotFoundError(f"Model file not found. Tried paths: {tried}")
+
+    @staticmethod
+    def _signatures_of(model_path, preprocessor_path, artifacts_dir, version, directory):
+        if version is not None:
+            # Published versions are immutable; only the pointer moves.
+            return (version, file_signature(os.path.join(artifacts_dir, POINTER_FILE_NAME)))
+        return (file_signature(model_path), file_signature(preprocessor_path))
+
+    def _load(self, generation):
+        paths = self._resolve_paths()
+        model_path, preprocessor_path, _, version, directory = paths
+        signatures = self._signatures_of(*paths)
+
+        for path in (model_path, preprocessor_path):
+            if os.path.getsize(path) == 0:
+                raise ValueError(f"Artifact file is empty: {path}")
+
+        logging.info(f"Loading model from {model_path} and preprocessor from {preprocessor_path}")
+        if self.config.artifact_format == "compact":
+            model, preprocessor = load_artifacts(os.path.dirname(model_path))
+        else:
+            model, preprocessor = load_object(file_path=model_path), load_object(file_path=preprocessor_path)
+        artifacts = LoadedArtifacts(
+            model=model,
+            preprocessor=preprocessor,
+            model_path=model_path,
+            preprocessor_path=preprocessor_path,
+            model_sha256=file_sha256(model_path),
+            preprocessor_sha256=file_sha256(preprocessor_path),
+            loaded_at=time.time(),
+            generation=generation,
+            compiled_preprocessor=CompiledPreprocessor.compile(preprocessor) if self.config.compile_preprocessor else None,
+            version=version,
+            directory=directory,
+        )
+        return artifacts, signatures
+
+    def get(self, watch=True):
+        '''
+        The current snapshot, loading it on first use. watch=False skips starting
+        the watcher thread, e.g. in a parent process that is about to fork.
+        '''
+        artifacts = self._artifacts
+        if artifacts is None:
+            with self._lock:
+                if self._artifacts is None:
+                    try:
+                        self._artifacts, self._signatures = self._load(generation=1)
+                    except Exception as e:
+                        raise CustomException(e, sys)
+                    self._counters["loads"] += 1
+                artifacts = self._artifacts
+        else:
+            self._counters["hits"] += 1
+        if watch:
+            self._ensure_watcher()
+        return artifacts
+
+    def peek(self):
+        '''The current snapshot without loading it or counting a hit; None before the first load.'''
+        return self._artifacts
+
+    def check_for_updates(self):
+        '''
+        Reloads the artifacts if the files on disk (or the published version)
+        changed since the last load. Returns True when a new snapshot was swapped in.
+        '''
+        current = self._artifacts
+        if current is None:
+            return False
+        self._counters["checks"] += 1
+        try:
+            paths = self._resolve_paths()
+            signatures = self._signatures_of(*paths)
+        except (OSError, ValueError):
+            return False
+        if signatures == self._signatures or signatures == self._rejected:
+            return False
+
+        with self._reload_lock:
+            try:
+                # Files that were only touched, or a pointer moved to identical content, keep the loaded objects.
+                if (file_sha256(paths[0]) == current.model_sha256
+                        and file_sha256(paths[1]) == current.preprocessor_sha256):
+                    with self._lock:
+                        self._artifacts = replace(
+                            current, model_path=paths[0], preprocessor_path=paths[1], version=paths[3], directory=paths[4]
+                        )
+                        self._signatures = signatures
+                    return False
+                # Loaded next to the live snapshot; requests keep using `current` meanwhile.
+                artifacts, signatures = self._load(generation=current.generation + 1)
+                if self.config.validate_reload:
+                    validate_artifacts(artifacts)
+            except Exception as e:
+                self._counters["reload_failures"] += 1
+                self._rejected = signatures
+                logging.error(f"Artifact reload failed, keeping generation {current.generation}: {e}")
+                return False
+            with self._lock:
+                self._artifacts, self._signatures, self._rejected = artifacts, signatures, None
+                self._counters["reloads"] += 1
+        logging.info(f"Reloaded model artifacts, now at generation {artifacts.generation} (version {artifacts.version})")
+        return True
+
+    def _ensure_watcher(self):
+        # Threads do not survive fork, so each worker process starts its own watcher.
+        if self.config.check_interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            thread = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+            thread.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.config.check_interval)
+            self.check_for_updates()
+
+    def stats(self):
+        artifacts = self._artifacts
+        stats = dict(self._counters)
+        stats["loaded"] = artifacts is not None
+        if artifacts is not None:
+            stats["generation"] = artifacts.generation
+            stats["loaded_at"] = artifacts.loaded_at
+            stats["model_sha256"] = artifacts.model_sha256
+            stats["preprocessor_sha256"] = artifacts.preprocessor_sha256
+            stats["compiled_preprocessor"] = artifacts.compiled_preprocessor is not None
+            stats["version"] = artifacts.version
+            stats["model_path"] = artifacts.model_path
+            stats["preprocessor_path"] = artifacts.preprocessor_path
+        return stats
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -1,81 +1,250 @@
 import sys
 import os
-import pandas as pd
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from src import metrics
 from src.exception import CustomException
-from src.utils import load_object
+from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+from src.pipepline.model_registry import get_model_registry
+
+NUMERICAL_COLUMNS = ["writing_score", "reading_score"]
+CATEGORICAL_COLUMNS = [
+    "gender",
+    "race_ethnicity",
+    "parental_level_of_education",
+    "lunch",
+    "test_preparation_course",
+]
+FEATURE_COLUMNS = CATEGORICAL_COLUMNS + NUMERICAL_COLUMNS
+
+_LOAD_STAGE = metrics.stage("load_artifacts")
+_FEATURES_STAGE = metrics.stage("build_features")
+_LOOKUP_STAGE = metrics.stage("lookup_table")
+_TRANSFORM_STAGE = metrics.stage("transform")
+_PREDICT_STAGE = metrics.stage("predict")
+
+
+@dataclass
+class PredictPipelineConfig:
+    batch_chunk_size: int = int(os.environ.get("PREDICT_BATCH_CHUNK_SIZE", "10000"))
+    batch_max_rows: int = int(os.environ.get("PREDICT_BATCH_MAX_ROWS", "100000"))
+    # Answer integer-score requests from the precomputed table (src/pipepline/prediction_table.py).
+    lookup_table: bool = os.environ.get("PREDICT_LOOKUP_TABLE", "0") == "1"
+    prediction_table_path: str = os.environ.get("PREDICT_LOOKUP_TABLE_PATH", os.path.join("artifacts", "prediction_table.npy"))
+
+
+def known_categories(preprocessor):
+    '''
+    Returns {column: set of categories} seen by the fitted one-hot encoder,
+    or None if the preprocessor does not have the expected layout.
+    '''
+    if hasattr(preprocessor, "known_categories"):
+        return preprocessor.known_categories()
+    try:
+        cat_pipeline = preprocessor.named_transformers_["cat_pipeline"]
+        encoder = cat_pipeline.named_steps["one_hot_encoder"]
+        columns = [cols for name, _, cols in preprocessor.transformers_ if name == "cat_pipeline"][0]
+    except (AttributeError, KeyError, IndexError):
+        return None
+    return {column: set(categories) for column, categories in zip(columns, encoder.categories_)}
+
+
+def canary_record(preprocessor):
+    '''
+    A synthetic record the fitted preprocessor accepts: the first known
+    category of every column and mid-range scores. None if the preprocessor
+    does not expose its categories.
+    '''
+    categories = known_categories(preprocessor)
+    if categories is None:
+        return None
+    record = {column: sorted(categories[column], key=str)[0] for column in CATEGORICAL_COLUMNS}
+    record.update({column: 50 for column in NUMERICAL_COLUMNS})
+    return record
+
+
+def canary_prediction(artifacts):
+    '''Scores `canary_record` with `artifacts` directly (no cache or lookup table); None without one.'''
+    record = canary_record(artifacts.transformer)
+    if record is None:
+        return None
+    transformer = artifacts.transformer
+    features = record if isinstance(transformer, CompiledPreprocessor) else as_data_frame(record)
+    return float(artifacts.model.predict(transformer.transform(features))[0])
+
 
 class PredictPipeline:
-    def __init__(self):
-        pass
-    def predict(self,features):
+    def __init__(self, registry=None, config=None, cache=None):
+        from src.pipepline.prediction_cache import PredictionCache
+
+        self.registry = registry or get_model_registry()
+        self.config = config or PredictPipelineConfig()
+        # Opt-in (PREDICT_CACHE=1) LRU of single-record predictions.
+        self.cache = cache or PredictionCache()
+        # ((artifacts generation, directory), PredictionTable or None) for lookup mode.
+        self._table = (None, None)
+        self.lookup_stats = {"lookup_hits": 0, "lookup_misses": 0}
+
+    def prediction_table(self, artifacts):
+        '''
+        The lookup table for the loaded artifacts, re-checked against the model
+        whenever the registry swaps in a new generation or version. A published
+        version only uses the table published with it. None if missing or stale.
+        '''
+        key = (artifacts.generation, artifacts.directory)
+        cached_key, table = self._table
+        if cached_key == key:
+            return table
+        from src.pipepline.prediction_table import PredictionTable, PredictionTableConfig, read_source
+
+        import logging
+
+        logger = logging.getLogger(__name__)
+        table_path = self.config.prediction_table_path
+        if artifacts.version is not None:
+            table_path = os.path.join(artifacts.directory, os.path.basename(table_path))
+        table = None
+        try:
+            # The table records the sha256 of the model.pkl it was built from.
+            built_from = (read_source(table_path) or {}).get("model.pkl")
+            if built_from is not None and artifacts.model_path.endswith(".pkl") and built_from != artifacts.model_sha256:
+                logger.warning("Prediction table %s was built for another model, ignoring it", table_path)
+            else:
+                table = PredictionTable.load(table_path)
+                if not table.verify(artifacts.model, artifacts.transformer, PredictionTableConfig().n_probes):
+                    logger.warning("Prediction table %s does not match the loaded model, ignoring it", table_path)
+                    table = None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Prediction table unavailable, using live inference: %s", e)
+        self._table = (key, table)
+        return table
+
+    def warm_up(self, watch=True):
+        '''
+        Loads the artifacts and scores one synthetic record so the first real
+        request does not pay for lazy imports and first-call setup. Returns the
+        prediction, or None if the preprocessor does not expose its categories.
+        '''
+        artifacts = self.registry.get(watch=watch)
+        record = canary_record(artifacts.transformer)
+        if record is None:
+            return None
+        return float(self._predict(artifacts, record, True)[0])
+
+    def predict(self,features,batcher=None,use_cache=True):
+          '''
+          `features` is a CustomData, a record dict, a mapping of columns to
+          arrays (see `stack_features`) or a DataFrame. Records and columns go
+          straight to the compiled preprocessor without building a DataFrame.
+
+          With `batcher` (a MicroBatcher), single records the prediction cache
+          does not hold are scored through it, so the cache sits in front of
+          micro-batching. The batcher's own predict_fn passes use_cache=False.
+          '''
+          import logging
+
+          logger = logging.getLogger(__name__)
           try:
-            import traceback
-            import logging
-            
-            logger = logging.getLogger(__name__)
-            ##this is for my personal pc 
-            ##model_path='artifacts\model.pkl'
-            ##this is for deployment on render
-            
-            # Try multiple possible paths for deployment
-            possible_paths = [
-                os.path.join("artifacts", "model.pkl"),
-                os.path.join(os.getcwd(), "artifacts", "model.pkl"),
-                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "artifacts", "model.pkl")
-            ]
-            
-            model_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    model_path = path
-                    break
-                    
-            if model_path is None:
-                raise FileNotFoundError(f"Model file not found. Tried paths: {possible_paths}")
-                
-            preprocessor_path = model_path.replace("model.pkl", "preprocessor.pkl")
-            
-            if not os.path.exists(preprocessor_path):
-                raise FileNotFoundError(f"Preprocessor file not found at: {preprocessor_path}")
-            
-            # Check file sizes
-            model_size = os.path.getsize(model_path)
-            preprocessor_size = os.path.getsize(preprocessor_path)
-            
-            logger.info(f"Loading model from: {model_path} (size: {model_size} bytes)")
-            logger.info(f"Loading preprocessor from: {preprocessor_path} (size: {preprocessor_size} bytes)")
-            
-            if model_size == 0:
-                raise ValueError("Model file is empty")
-            if preprocessor_size == 0:
-                raise ValueError("Preprocessor file is empty")
-            
-            model = load_object(file_path=model_path)
-            preprocessor=load_object(file_path=preprocessor_path)
-            
-            logger.info("Model and preprocessor loaded successfully")
-            logger.info(f"Input features shape: {features.shape}")
-            logger.info(f"Input features columns: {features.columns.tolist()}")
-            logger.info(f"Input features data types: {features.dtypes}")
-            
-            data_scaled=preprocessor.transform(features)
-            logger.info(f"Scaled data shape: {data_scaled.shape}")
-            
-            preds = model.predict(data_scaled)
-            logger.info(f"Predictions shape: {preds.shape}")
-            logger.info(f"Predictions: {preds}")
+            start = time.perf_counter()
+            artifacts = self.registry.get()
+            _LOAD_STAGE.observe(time.perf_counter() - start)
+            if isinstance(features, CustomData):
+                start = time.perf_counter()
+                features = features.as_record()
+                _FEATURES_STAGE.observe(time.perf_counter() - start)
+            record = isinstance(features, dict) and not as_columns(features)
+            cache = record and use_cache and self.cache.config.enabled
+            if cache:
+                key = self.cache.key(features)
+                cached = self.cache.get(key, artifacts.generation)
+                if cached is not None:
+                    return np.array([cached])
+            if batcher is not None and record:
+                preds = batcher.predict(features)
+            else:
+                preds = self._predict(artifacts, features, record)
+            if cache:
+                self.cache.put(key, artifacts.generation, float(preds[0]))
             return preds
           except Exception as e:
-            logger.error(f"Error in predict method: {str(e)}")
-            logger.error(f"Current working directory: {os.getcwd()}")
-            logger.error(f"Model path exists: {os.path.exists(model_path) if 'model_path' in locals() else 'N/A'}")
-            logger.error(f"Preprocessor path exists: {os.path.exists(preprocessor_path) if 'preprocessor_path' in locals() else 'N/A'}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            logger.exception("Error in predict method: %s", e, extra={"fields": {"cwd": os.getcwd()}})
             raise CustomException(e,sys) 
 
+    def _predict(self, artifacts, features, record):
+        transformer = artifacts.transformer
+        if self.config.lookup_table and record:
+            start = time.perf_counter()
+            table = self.prediction_table(artifacts)
+            value = table.lookup(features) if table is not None else None
+            _LOOKUP_STAGE.observe(time.perf_counter() - start)
+            if value is not None:
+                self.lookup_stats["lookup_hits"] += 1
+                return np.array([value])
+            self.lookup_stats["lookup_misses"] += 1
+        start = time.perf_counter()
+        if isinstance(features, dict) and not isinstance(transformer, CompiledPreprocessor):
+            features = as_data_frame(features)
+
+        data_scaled=transformer.transform(features)
+        transformed = time.perf_counter()
+        _TRANSFORM_STAGE.observe(transformed - start)
+        preds = artifacts.model.predict(data_scaled)
+        _PREDICT_STAGE.observe(time.perf_counter() - transformed)
+        return preds
+
+    def predict_batch(self, features, chunk_size=None):
+        '''
+        Scores a validated batch frame with one transform and one predict per chunk.
+        '''
+        import logging
+
+        logger = logging.getLogger(__name__)
+        chunk_size = chunk_size or self.config.batch_chunk_size
+        try:
+            artifacts = self.registry.get()
+            categories = known_categories(artifacts.transformer)
+            if categories is not None:
+                for column, allowed in categories.items():
+                    unknown = ~features[column].isin(allowed)
+                    if unknown.any():
+                        rows = np.flatnonzero(unknown.to_numpy())[:10].tolist()
+                        raise ValueError(f"Unknown category for '{column}' in rows {rows}")
+
+            preds = []
+            for offset in range(0, len(features), chunk_size):
+                start = time.perf_counter()
+                data_scaled = artifacts.transformer.transform(features.iloc[offset:offset + chunk_size])
+                transformed = time.perf_counter()
+                _TRANSFORM_STAGE.observe(transformed - start)
+                preds.append(artifacts.model.predict(data_scaled))
+                _PREDICT_STAGE.observe(time.perf_counter() - transformed)
+            return np.concatenate(preds) if preds else np.empty(0)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error("Error in predict_batch method: %s", e)
+            raise CustomException(e,sys)
+
 
 
 class CustomData:
+    '''
+    One student from the online form. Plain slots rather than a DataFrame:
+    `as_record` validates all fields in one pass and returns the dict the
+    compiled preprocessor consumes directly.
+    '''
+    __slots__ = (
+        "gender",
+        "race_ethnicity",
+        "parental_level_of_education",
+        "lunch",
+        "test_preparation_course",
+        "reading_score",
+        "writing_score",
+    )
+
     def __init__(self,
                  gender:str,
                  race_ethnicity:str,
@@ -92,45 +261,164 @@ class CustomData:
                 self.test_preparation_course = test_preparation_course
                 self.reading_score = reading_score
                 self.writing_score = writing_score   
-    
-    def get_data_as_data_frame(self):
-          try:
-            import logging
-            logger = logging.getLogger(__name__)
-            
-            # Validate input data
-            if not all([self.gender, self.race_ethnicity, self.parental_level_of_education, 
-                       self.lunch, self.test_preparation_course]):
+
+    # CustomData field -> input name in templates/home.html.
+    FORM_FIELDS = {
+        "gender": "gender",
+        "race_ethnicity": "ethnicity",
+        "parental_level_of_education": "parental_level_of_education",
+        "lunch": "lunch",
+        "test_preparation_course": "test_preparation_course",
+        "reading_score": "reading_score",
+        "writing_score": "writing_score",
+    }
+
+    @classmethod
+    def from_form(cls, form):
+        '''
+        Validated CustomData from the /predictdata form fields. Raises ValueError
+        with the message both app.py and asgi.py show as "Error: <message>".
+        '''
+        values = {column: form.get(field) for column, field in cls.FORM_FIELDS.items()}
+        if not all(values.values()):
+            raise ValueError("All fields are required")
+        try:
+            for column in NUMERICAL_COLUMNS:
+                values[column] = float(values[column])
+        except ValueError:
+            raise ValueError("Reading and writing scores must be valid numbers")
+        data = cls(**values)
+        try:
+            data.validate()
+        except ValueError as e:
+            raise ValueError(f"Invalid input data - {e}")
+        return data
+
+    def validate(self):
+        for column in CATEGORICAL_COLUMNS:
+            if not getattr(self, column):
                 raise ValueError("All categorical fields must be provided")
-            
-            if not isinstance(self.reading_score, (int, float)) or not isinstance(self.writing_score, (int, float)):
+        for column in NUMERICAL_COLUMNS:
+            value = getattr(self, column)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
                 raise ValueError("Reading and writing scores must be numeric")
-            
-            if self.reading_score < 0 or self.reading_score > 100 or self.writing_score < 0 or self.writing_score > 100:
+            if not 0 <= value <= 100:
                 raise ValueError("Scores must be between 0 and 100")
-            
-            custom_data_input_dict = {
-                  "gender": [self.gender],
-                  "race_ethnicity":[self.race_ethnicity],
-                  "parental_level_of_education":[self.parental_level_of_education],
-                  "lunch":[self.lunch],
-                  "test_preparation_course":[self.test_preparation_course],
-                  "reading_score":[self.reading_score],
-                  "writing_score":[self.writing_score],
-            }
-            
-            df = pd.DataFrame(custom_data_input_dict)
-            logger.info(f"Created DataFrame with shape: {df.shape}")
-            logger.info(f"DataFrame columns: {df.columns.tolist()}")
-            logger.info(f"DataFrame data types: {df.dtypes}")
-            return df
+
+    def as_record(self, validate=True):
+        '''The fields as a record dict; validate=False for data that already passed validate().'''
+        if validate:
+            self.validate()
+        return {column: getattr(self, column) for column in FEATURE_COLUMNS}
+
+    def get_data_as_data_frame(self):
+          try:
+            import pandas as pd
+
+            return pd.DataFrame({column: [value] for column, value in self.as_record().items()})
           except Exception as e:
-                logger.error(f"Error in get_data_as_data_frame: {str(e)}")
                 raise CustomException(e,sys)
 
-            
 
+def as_columns(features):
+    '''True if a feature dict maps columns to arrays rather than holding one record.'''
+    return any(isinstance(value, (list, tuple, np.ndarray)) for value in features.values())
+
+
+def as_data_frame(features):
+    '''DataFrame from a record dict or a mapping of columns to arrays.'''
+    import pandas as pd
+
+    if as_columns(features):
+        return pd.DataFrame(features)
+    return pd.DataFrame([features])
+
+
+def stack_features(items):
+    '''
+    Combines the features of several single-row requests for one predict
+    call: DataFrames are concatenated, records become one column mapping.
+    '''
+    if len(items) == 1:
+        return items[0]
+    if isinstance(items[0], (CustomData, dict)):
+        records = [item.as_record() if isinstance(item, CustomData) else item for item in items]
+        return {column: [record[column] for record in records] for column in FEATURE_COLUMNS}
+    import pandas as pd
+
+    return pd.concat(items, ignore_index=True)
+
+
+class CustomDataBatch:
+    '''
+    Many students at once, from a JSON payload that is either a list of
+    records or a mapping of column name to equal-length arrays (optionally
+    wrapped as {"records": [...]} or {"columns": {...}}). An existing
+    DataFrame is validated as-is.
+
+    Validation is vectorized over the whole frame and raises ValueError,
+    naming up to ten offending rows, so callers can answer with a 400.
+    '''
+    def __init__(self, payload):
+        self.payload = payload
+
+    def _to_frame(self):
+        import pandas as pd
+
+        payload = self.payload
+        if isinstance(payload, pd.DataFrame):
+            return payload
+        if isinstance(payload, dict) and "records" in payload:
+            payload = payload["records"]
+        elif isinstance(payload, dict) and "columns" in payload:
+            payload = payload["columns"]
+
+        if isinstance(payload, list):
+            if not all(isinstance(record, dict) for record in payload):
+                raise ValueError("Every record must be a JSON object")
+            return pd.DataFrame.from_records(payload)
+        if isinstance(payload, dict):
+            lengths = {len(values) if isinstance(values, list) else -1 for values in payload.values()}
+            if len(lengths) != 1 or -1 in lengths:
+                raise ValueError("Columnar input must map each column to an array of the same length")
+            return pd.DataFrame(payload)
+        raise ValueError("Expected a list of records or a mapping of columns to arrays")
+
+    def get_data_as_data_frame(self):
+        from pandas import to_numeric
+        from pandas.api.types import is_bool_dtype
+
+        df = self._to_frame()
+        if len(df) == 0:
+            # Nothing to score: an empty frame with the expected columns, not a missing-fields error.
+            dtypes = {**{column: object for column in CATEGORICAL_COLUMNS}, **{column: "float64" for column in NUMERICAL_COLUMNS}}
+            return df.reindex(columns=FEATURE_COLUMNS).astype(dtypes)
+
+        missing = [column for column in FEATURE_COLUMNS if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required fields: {missing}")
+        df = df[FEATURE_COLUMNS]
+
+        for column in CATEGORICAL_COLUMNS:
+            values = df[column]
+            invalid = (values.isna() | values.eq("")).to_numpy()
+            if invalid.any():
+                raise ValueError(f"'{column}' must be a non-empty string in rows {np.flatnonzero(invalid)[:10].tolist()}")
 
-        
-        
+        scores = {}
+        for column in NUMERICAL_COLUMNS:
+            values = df[column]
+            # to_numeric would turn true/false into 1/0; a JSON boolean is not a score.
+            if is_bool_dtype(values):
+                booleans = np.ones(len(values), dtype=bool)
+            elif values.dtype == object:
+                booleans = values.map(lambda value: isinstance(value, (bool, np.bool_))).to_numpy(dtype=bool)
+            else:
+                booleans = np.zeros(len(values), dtype=bool)
+            numeric = to_numeric(values.mask(booleans), errors="coerce").astype("float64").to_numpy()
+            invalid = booleans | np.isnan(numeric) | (numeric < 0) | (numeric > 100)
+            if invalid.any():
+                raise ValueError(f"'{column}' must be a number between 0 and 100 in rows {np.flatnonzero(invalid)[:10].tolist()}")
+            scores[column] = numeric
 
+        return df.assign(**scores)
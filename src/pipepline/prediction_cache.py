@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.pipepline.predict_pipeline import CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS
+
+
+@dataclass
+class PredictionCacheConfig:
+    enabled: bool = os.environ.get("PREDICT_CACHE", "0") == "1"
+    max_entries: int = int(os.environ.get("PREDICT_CACHE_MAX_ENTRIES", "10000"))
+    # Approximate: sizes of the keys and values, not the dict overhead.
+    max_bytes: int = int(os.environ.get("PREDICT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    # Seconds an entry stays valid; 0 keeps entries until evicted or the model changes.
+    ttl_seconds: float = float(os.environ.get("PREDICT_CACHE_TTL_SECONDS", "0"))
+
+
+def _entry_size(key, value):
+    return sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value)
+
+
+class PredictionCache:
+    '''
+    Bounded LRU of single-record predictions.
+
+    Entries are tagged with the registry generation they were computed for;
+    the first lookup under a newer generation drops the whole cache, so a
+    reloaded model never serves predictions from the old one. Requests still
+    running on an older generation miss and their puts are ignored, so they
+    cannot flush the cache back and forth during a reload.
+    '''
+
+    def __init__(self, config=None):
+        self.config = config or PredictionCacheConfig()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def key(record):
+        '''
+        Normalized key for a validated record: categoricals as given, scores as
+        floats so 70 and 70.0 share an entry.
+        '''
+        return tuple(record[column] for column in CATEGORICAL_COLUMNS) + tuple(
+            float(record[column]) for column in NUMERICAL_COLUMNS
+        )
+
+    def _check_generation(self, generation):
+        '''False if `generation` is older than the cache's; a newer one drops every entry.'''
+        if self._generation is not None and generation < self._generation:
+            return False
+        if generation != self._generation:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = generation
+        return True
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key) if self._check_generation(generation) else None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._drop(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key, generation, value):
+        size = _entry_size(key, value)
+        ttl = self.config.ttl_seconds
+        with self._lock:
+            if not self._check_generation(generation):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + ttl if ttl > 0 else None, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.config.max_entries or self._bytes > self.config.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        stats["bytes"] = self._bytes
+        stats["generation"] = self._generation
+        stats["max_entries"] = self.config.max_entries
+        stats["max_bytes"] = self.config.max_bytes
+        stats["ttl_seconds"] = self.config.ttl_seconds
+        return stats
@@ -0,0 +1,194 @@
+'''
+Every prediction the model can make for integer scores, computed ahead of time.
+
+The inputs are five categoricals (2 x 5 x 6 x 2 x 2 = 240 combinations for
+the current encoder) and two scores in 0..100, so the whole space is about
+2.4M rows. `build` scores it in chunks and writes a float32 .npy array with
+one axis per feature plus a JSON sidecar naming the categories on each axis;
+`PredictionTable.lookup` then answers a request with a single memory-mapped
+read. Fractional scores, unseen categories and missing values are not in the
+table and return None so the caller falls back to the model.
+
+    python -m src.pipepline.prediction_table [--artifacts-dir artifacts]
+'''
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from itertools import product
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipepline.predict_pipeline import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERICAL_COLUMNS, as_data_frame, known_categories
+
+SCORE_MIN = 0
+SCORE_MAX = 100
+
+
+@dataclass
+class PredictionTableConfig:
+    table_path: str = os.path.join("artifacts", "prediction_table.npy")
+    # Categorical combinations scored per predict call (each is 101 x 101 rows).
+    chunk_combinations: int = 24
+    # Random grid points re-scored live to check the table matches the loaded model.
+    n_probes: int = 32
+
+
+def table_meta_path(table_path):
+    '''The JSON sidecar of a table: categories, shape and the artifacts it was built from.'''
+    return f"{os.path.splitext(table_path)[0]}.json"
+
+
+class PredictionTable:
+    def __init__(self, values, meta):
+        self.values = values
+        self.meta = meta
+        self._codes = [
+            (column, {category: code for code, category in enumerate(meta["categories"][column])})
+            for column in CATEGORICAL_COLUMNS
+        ]
+
+    @classmethod
+    def load(cls, table_path):
+        with open(table_meta_path(table_path)) as file_obj:
+            meta = json.load(file_obj)
+        return cls(np.load(table_path, mmap_mode="r"), meta)
+
+    def lookup(self, record):
+        '''Prediction for a record dict, or None if it is outside the table.'''
+        index = []
+        for column, codes in self._codes:
+            code = codes.get(record[column])
+            if code is None:
+                return None
+            index.append(code)
+        for column in NUMERICAL_COLUMNS:
+            value = record[column]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+                return None
+            if not SCORE_MIN <= value <= SCORE_MAX or value != int(value):
+                return None
+            index.append(int(value) - SCORE_MIN)
+        return float(self.values[tuple(index)])
+
+    def _grid_record(self, flat_index):
+        shape = self.values.shape
+        index = np.unravel_index(flat_index, shape)
+        record = {column: self.meta["categories"][column][code] for column, code in zip(CATEGORICAL_COLUMNS, index)}
+        for column, code in zip(NUMERICAL_COLUMNS, index[len(CATEGORICAL_COLUMNS):]):
+            record[column] = int(code) + SCORE_MIN
+        return record
+
+    def verify(self, model, transformer, n_probes=32, seed=0):
+        '''True if the model reproduces the table at `n_probes` random grid points.'''
+        flat = np.random.default_rng(seed).choice(self.values.size, size=min(n_probes, self.values.size), replace=False)
+        records = [self._grid_record(flat_index) for flat_index in flat]
+        columns = {column: [record[column] for record in records] for column in FEATURE_COLUMNS}
+        live = model.predict(_transform(transformer, columns))
+        stored = self.values.reshape(-1)[flat].astype(np.float64)
+        return bool(np.allclose(stored, live, rtol=1e-5, atol=1e-3))
+
+
+def _transform(transformer, columns):
+    if hasattr(transformer, "transform_columns"):
+        return transformer.transform_columns(columns)
+    return transformer.transform(as_data_frame(columns))
+
+
+def build_prediction_table(model, transformer, table_path, chunk_combinations=24, source=None):
+    '''
+    Scores every (categorical combination, integer score pair) and writes the
+    float32 table plus its JSON sidecar. `transformer` is the fitted (or
+    compiled) preprocessor; `source` is stored in the sidecar as-is.
+    '''
+    try:
+        categories = known_categories(transformer)
+        if categories is None:
+            raise ValueError("Preprocessor does not expose its category vocabularies")
+        categories = {column: sorted(categories[column]) for column in CATEGORICAL_COLUMNS}
+        n_scores = SCORE_MAX - SCORE_MIN + 1
+        shape = tuple(len(categories[column]) for column in CATEGORICAL_COLUMNS) + (n_scores,) * len(NUMERICAL_COLUMNS)
+
+        scores = np.arange(SCORE_MIN, SCORE_MAX + 1, dtype=np.float64)
+        score_grid = [grid.ravel() for grid in np.meshgrid(*([scores] * len(NUMERICAL_COLUMNS)), indexing="ij")]
+        per_combination = len(score_grid[0])
+
+        os.makedirs(os.path.dirname(os.path.abspath(table_path)), exist_ok=True)
+        tmp_path = f"{table_path}.{os.getpid()}.tmp"
+        start_time = time.perf_counter()
+        # open_memmap writes the .npy header, so the temporary file is a valid array throughout.
+        values = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=shape)
+        flat = values.reshape(-1)
+        combinations = list(product(*(categories[column] for column in CATEGORICAL_COLUMNS)))
+        for start in range(0, len(combinations), chunk_combinations):
+            chunk = combinations[start:start + chunk_combinations]
+            columns = {
+                column: np.repeat(np.array([combination[i] for combination in chunk], dtype=object), per_combination)
+                for i, column in enumerate(CATEGORICAL_COLUMNS)
+            }
+            for column, grid in zip(NUMERICAL_COLUMNS, score_grid):
+                columns[column] = np.tile(grid, len(chunk))
+            offset = start * per_combination
+            flat[offset:offset + len(chunk) * per_combination] = model.predict(_transform(transformer, columns))
+        values.flush()
+        del flat, values
+
+        meta = {
+            "columns": CATEGORICAL_COLUMNS + NUMERICAL_COLUMNS,
+            "categories": categories,
+            "score_range": [SCORE_MIN, SCORE_MAX],
+            "dtype": "float32",
+            "shape": list(shape),
+            "source": source,
+            "created_at": time.time(),
+        }
+        meta_tmp_path = f"{table_meta_path(table_path)}.{os.getpid()}.tmp"
+        with open(meta_tmp_path, "w") as file_obj:
+            json.dump(meta, file_obj, indent=2)
+        os.replace(tmp_path, table_path)
+        os.replace(meta_tmp_path, table_meta_path(table_path))
+        logging.info(f"Built prediction table {shape} in {time.perf_counter() - start_time:.1f}s at {table_path}")
+        return meta
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_source(table_path):
+    '''The `source` recorded when the table was built, or None if there is no table.'''
+    try:
+        with open(table_meta_path(table_path)) as file_obj:
+            return json.load(file_obj).get("source")
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute predictions for every integer-score input.")
+    parser.add_argument("--artifacts-dir", default="artifacts")
+    parser.add_argument("--out", default=None, help="defaults to <artifacts-dir>/prediction_table.npy")
+    args = parser.parse_args(argv)
+
+    from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+    from src.stage_cache import file_sha256
+    from src.utils import load_object
+
+    model_path = os.path.join(args.artifacts_dir, "model.pkl")
+    preprocessor_path = os.path.join(args.artifacts_dir, "preprocessor.pkl")
+    preprocessor = load_object(preprocessor_path)
+    table_path = args.out or os.path.join(args.artifacts_dir, "prediction_table.npy")
+    meta = build_prediction_table(
+        load_object(model_path),
+        CompiledPreprocessor.compile(preprocessor) or preprocessor,
+        table_path,
+        source={"model.pkl": file_sha256(model_path), "preprocessor.pkl": file_sha256(preprocessor_path)},
+    )
+    print(f"Wrote {table_path} with shape {tuple(meta['shape'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
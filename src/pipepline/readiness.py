@@ -0,0 +1,94 @@
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.pipepline.predict_pipeline import canary_prediction
+
+
+@dataclass
+class ReadinessConfig:
+    # Seconds between canary predictions run by /readyz; 0 disables the canary.
+    canary_interval: float = float(os.environ.get("READINESS_CANARY_INTERVAL", "60"))
+
+
+class ReadinessProbe:
+    '''
+    Readiness from the state the process already holds: the registry snapshot
+    and a canary prediction re-run at most every `canary_interval` seconds
+    (or when the registry swaps in a new generation). Probes between canaries
+    only read cached results, so they cost no I/O and no model call.
+    '''
+
+    def __init__(self, pipeline, config=None):
+        self.pipeline = pipeline
+        self.config = config or ReadinessConfig()
+        self._canary = None
+        self._canary_lock = threading.Lock()
+
+    def _run_canary(self, artifacts):
+        start = time.perf_counter()
+        try:
+            # Straight through the model and preprocessor: no cache, lookup table or stage metrics,
+            # so probes neither count as traffic nor pass on a table hit alone.
+            prediction = canary_prediction(artifacts)
+            ok = prediction is None or math.isfinite(prediction)
+            error = None if ok else f"canary prediction is not finite: {prediction}"
+        except Exception as e:
+            prediction, ok, error = None, False, str(e)
+        if not ok:
+            logging.error(f"Readiness canary failed: {error}")
+        return {
+            "ok": ok,
+            "prediction": prediction,
+            "error": error,
+            "seconds": time.perf_counter() - start,
+            "checked_at": time.time(),
+            "generation": artifacts.generation,
+        }
+
+    def canary(self, artifacts):
+        canary = self._canary
+        generation = artifacts.generation
+        if self.config.canary_interval <= 0:
+            return None
+        stale = (
+            canary is None
+            or canary["generation"] != generation
+            or time.time() - canary["checked_at"] >= self.config.canary_interval
+        )
+        # One probe refreshes the canary; concurrent probes keep answering from the cached one.
+        if stale and self._canary_lock.acquire(blocking=canary is None):
+            try:
+                canary = self._canary = self._run_canary(artifacts)
+            finally:
+                self._canary_lock.release()
+        return self._canary
+
+    def check(self):
+        '''Returns (ready, report).'''
+        registry = self.pipeline.registry
+        report = {"status": "not_ready", "artifact_format": registry.config.artifact_format}
+        try:
+            # Loads the artifacts on the first probe only; afterwards this reads the snapshot without counting a hit.
+            artifacts = registry.peek() or registry.get()
+        except Exception as e:
+            report["error"] = str(e)
+            report["model_registry"] = registry.stats()
+            return False, report
+
+        canary = self.canary(artifacts)
+        ready = canary is None or canary["ok"]
+        report.update({
+            "status": "ready" if ready else "not_ready",
+            "generation": artifacts.generation,
+            "version": artifacts.version,
+            "loaded_at": artifacts.loaded_at,
+            "model_path": artifacts.model_path,
+            "model_sha256": artifacts.model_sha256,
+            "preprocessor_sha256": artifacts.preprocessor_sha256,
+            "canary": canary,
+        })
+        return ready, report
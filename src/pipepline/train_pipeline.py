@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from src.artifact_format import export_artifacts, read_manifest
+from src.artifact_store import ArtifactStore
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer
+from src.exception import CustomException
+from src.logger import logging
+from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+from src.pipepline.prediction_table import PredictionTableConfig, build_prediction_table, read_source, table_meta_path
+from src.stage_cache import StageCache, describe, library_versions
+from src.utils import load_object
+
+# Search settings that change how fast the search runs but not what it picks.
+_SEARCH_RUNTIME_FIELDS = ("n_jobs", "mp_context", "score_cache_path")
+# Ingestion settings that change memory use but not the files written.
+_INGESTION_RUNTIME_FIELDS = ("chunk_size",)
+
+
+@dataclass
+class TrainPipelineConfig:
+    train_array_path: str = os.path.join("artifacts", "train_arr.npy")
+    test_array_path: str = os.path.join("artifacts", "test_arr.npy")
+    compact_artifacts_dir: str = os.path.join("artifacts", "compact")
+    # Publish the trained artifacts as a new version under artifacts/versions (src/artifact_store.py).
+    publish_artifacts: bool = os.environ.get("TRAIN_PUBLISH_ARTIFACTS", "1") != "0"
+
+
+class TrainPipeline:
+    '''
+    Runs ingestion -> transformation -> training, skipping every stage whose
+    inputs (upstream output hashes plus the stage's own config) were already
+    seen. A rerun on unchanged inputs only restores the cached artifacts;
+    a change reruns the stage it affects and everything downstream of it.
+    '''
+
+    def __init__(self, cache=None):
+        self.config = TrainPipelineConfig()
+        self.data_ingestion = DataIngestion()
+        self.data_transformation = DataTransformation()
+        self.model_trainer = ModelTrainer()
+        self.cache = cache or StageCache()
+
+    def run_ingestion(self):
+        config = self.data_ingestion.ingestion_config
+        inputs = {
+            "source": self.cache.file_digest(config.source_data_path),
+            "config": {
+                name: value for name, value in asdict(config).items()
+                if not name.endswith("_path") and name not in _INGESTION_RUNTIME_FIELDS
+            },
+            "split": "row_text_hash",
+        }
+        key = self.cache.key("ingestion", inputs)
+        outputs = {
+            "raw.csv": config.raw_data_path,
+            "train.csv": config.train_data_path,
+            "test.csv": config.test_data_path,
+        }
+        manifest = self.cache.fetch("ingestion", key, outputs)
+        if manifest is None:
+            self.data_ingestion.initiate_data_ingestion()
+            manifest = self.cache.store("ingestion", key, outputs, inputs)
+        return manifest
+
+    def run_transformation(self, ingestion_manifest):
+        '''Returns the stage manifest and, when the stage actually ran, the arrays.'''
+        ingestion_config = self.data_ingestion.ingestion_config
+        inputs = {
+            "train.csv": ingestion_manifest["outputs"]["train.csv"],
+            "test.csv": ingestion_manifest["outputs"]["test.csv"],
+            "transformer": describe(self.data_transformation.get_data_transformer_object()),
+            "versions": library_versions(),
+        }
+        key = self.cache.key("transformation", inputs)
+        outputs = {
+            "preprocessor.pkl": self.data_transformation.data_transformation_config.preprocessor_obj_file_path,
+            "train_arr.npy": self.config.train_array_path,
+            "test_arr.npy": self.config.test_array_path,
+        }
+        manifest = self.cache.fetch("transformation", key, outputs)
+        if manifest is not None:
+            return manifest, None
+
+        train_arr, test_arr, _ = self.data_transformation.initiate_data_transformation(
+            ingestion_config.train_data_path, ingestion_config.test_data_path
+        )
+        np.save(self.config.train_array_path, train_arr)
+        np.save(self.config.test_array_path, test_arr)
+        return self.cache.store("transformation", key, outputs, inputs), (train_arr, test_arr)
+
+    def run_training(self, transformation_manifest, arrays=None):
+        trainer = self.model_trainer
+        trainer_config = trainer.model_trainer_config
+        search_config = asdict(trainer.get_search_config())
+        inputs = {
+            "train_arr.npy": transformation_manifest["outputs"]["train_arr.npy"],
+            "test_arr.npy": transformation_manifest["outputs"]["test_arr.npy"],
+            "models": describe(trainer.get_models()),
+            "params": describe(trainer.get_params()),
+            "search": {name: value for name, value in search_config.items() if name not in _SEARCH_RUNTIME_FIELDS},
+            "versions": library_versions(),
+        }
+        key = self.cache.key("training", inputs)
+        outputs = {
+            "model.pkl": trainer_config.trained_model_file_path,
+            "model_report.json": trainer_config.search_report_file_path,
+        }
+        manifest = self.cache.fetch("training", key, outputs)
+        if manifest is not None:
+            with open(trainer_config.search_report_file_path) as file_obj:
+                report = json.load(file_obj)
+            return report["test_r2"][report["best_model"]]
+
+        if arrays is None:
+            arrays = (np.load(self.config.train_array_path), np.load(self.config.test_array_path))
+        r2_square = trainer.initiate_model_trainer(*arrays)
+        self.cache.store("training", key, outputs, inputs)
+        return r2_square
+
+    def run_export(self, transformation_manifest):
+        '''Rewrites the compact serving artifacts when the pickles they came from changed.'''
+        model_path = self.model_trainer.model_trainer_config.trained_model_file_path
+        preprocessor_path = self.data_transformation.data_transformation_config.preprocessor_obj_file_path
+        source = {
+            "model.pkl": self.cache.file_digest(model_path),
+            "preprocessor.pkl": transformation_manifest["outputs"]["preprocessor.pkl"],
+        }
+        try:
+            if read_manifest(self.config.compact_artifacts_dir).get("source") == source:
+                return
+        except (OSError, ValueError):
+            pass
+        export_artifacts(load_object(model_path), load_object(preprocessor_path), self.config.compact_artifacts_dir, source)
+        logging.info(f"Exported compact artifacts to {self.config.compact_artifacts_dir}")
+
+    def run_prediction_table(self, transformation_manifest):
+        '''Rebuilds the precomputed prediction table when the model or preprocessor changed.'''
+        table_config = PredictionTableConfig()
+        model_path = self.model_trainer.model_trainer_config.trained_model_file_path
+        preprocessor_path = self.data_transformation.data_transformation_config.preprocessor_obj_file_path
+        source = {
+            "model.pkl": self.cache.file_digest(model_path),
+            "preprocessor.pkl": transformation_manifest["outputs"]["preprocessor.pkl"],
+        }
+        if read_source(table_config.table_path) == source and os.path.exists(table_config.table_path):
+            return
+        preprocessor = load_object(preprocessor_path)
+        build_prediction_table(
+            load_object(model_path),
+            CompiledPreprocessor.compile(preprocessor) or preprocessor,
+            table_config.table_path,
+            table_config.chunk_combinations,
+            source,
+        )
+
+    def run_publish(self):
+        '''
+        Publishes the pickles, the compact export and the prediction table as
+        one version and flips current.json to it; serving processes swap it in
+        on their next check, so a rollback also rolls back the table.
+        '''
+        files = {
+            "model.pkl": self.model_trainer.model_trainer_config.trained_model_file_path,
+            "preprocessor.pkl": self.data_transformation.data_transformation_config.preprocessor_obj_file_path,
+        }
+        if os.path.isdir(self.config.compact_artifacts_dir):
+            files["compact"] = self.config.compact_artifacts_dir
+        table_path = PredictionTableConfig().table_path
+        if os.path.exists(table_path):
+            for path in (table_path, table_meta_path(table_path)):
+                files[os.path.basename(path)] = path
+        return ArtifactStore().publish(files)
+
+    def initiate_training(self):
+        try:
+            ingestion_manifest = self.run_ingestion()
+            transformation_manifest, arrays = self.run_transformation(ingestion_manifest)
+            r2_square = self.run_training(transformation_manifest, arrays)
+            self.run_export(transformation_manifest)
+            self.run_prediction_table(transformation_manifest)
+            if self.config.publish_artifacts:
+                self.run_publish()
+            logging.info(f"Training pipeline completed, test r2 {r2_square}")
+            return r2_square
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    print(TrainPipeline().initiate_training())
@@ -0,0 +1,270 @@
+'''
+On-demand profiling for serving and training, written under logs/profiles/.
+
+Two modes (PROFILE_MODE):
+
+    sample    a background thread samples the profiled threads' stacks every
+              PROFILE_INTERVAL_MS and writes collapsed stacks
+              ("frame;frame;frame count" lines, the input of flamegraph.pl
+              and speedscope) to <name>-<pid>-<time>.collapsed
+    cprofile  cProfile on the profiled threads, merged into one
+              <name>-<pid>-<time>.pstats (python -m pstats FILE); one
+              capture runs at a time, and a request arriving during another's
+              runs unprofiled, leaving its turn to a later one
+
+Serving: `RequestProfiler.arm(n)` profiles the next n requests into one
+file; PROFILE_REQUESTS=n arms it at start-up and app.py exposes an admin
+route for it. While nothing is armed the per-request cost is one attribute
+check. Training: PROFILE_TRAINING=1 profiles every `profile_block` and
+`profiled` function (ModelTrainer.initiate_model_trainer).
+
+Both are per process: behind prefork_server.py the admin route arms the
+worker that answered, and with a process pool only the parent is profiled.
+'''
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from dataclasses import dataclass
+
+from src.logger import logging
+
+
+@dataclass
+class ProfilingConfig:
+    output_dir: str = os.path.join(os.getcwd(), "logs", "profiles")
+    mode: str = os.environ.get("PROFILE_MODE", "sample")
+    interval_ms: float = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+    # Sample every thread, not only the ones serving profiled requests (e.g. the micro-batcher's).
+    all_threads: bool = os.environ.get("PROFILE_ALL_THREADS", "0") == "1"
+    # Requests to profile from start-up.
+    requests: int = int(os.environ.get("PROFILE_REQUESTS", "0"))
+    training: bool = os.environ.get("PROFILE_TRAINING", "0") == "1"
+    # The admin route is disabled unless a token is set.
+    admin_token: str = os.environ.get("PROFILE_ADMIN_TOKEN", "")
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _SamplingSession:
+    extension = "collapsed"
+
+    def __init__(self, interval, all_threads):
+        self.interval = interval
+        self.all_threads = all_threads
+        self.stacks = Counter()
+        self.samples = 0
+        self._threads = set()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def enter(self):
+        ident = threading.get_ident()
+        self._threads.add(ident)
+        return ident
+
+    def exit(self, ident):
+        self._threads.discard(ident)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            targets = [ident for ident in frames if ident != own] if self.all_threads else list(self._threads)
+            for ident in targets:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+
+    def finish(self, path):
+        self._stopped.set()
+        self._sampler.join()
+        with open(path, "w") as file_obj:
+            for stack, count in self.stacks.most_common():
+                file_obj.write(f"{stack} {count}\n")
+
+
+# Held while a cProfile.Profile is enabled. From Python 3.12 cProfile is built on
+# sys.monitoring and only one profiler can be active per process; enabling a
+# second one raises "Another profiling tool is already active".
+_CPROFILE_LOCK = threading.Lock()
+
+
+class _CProfileSession:
+    extension = "pstats"
+
+    def __init__(self, interval, all_threads):
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def enter(self):
+        '''
+        Enables a profiler for the calling thread, or returns None while
+        another thread's capture is running: captures never overlap, so
+        cprofile mode profiles one request at a time.
+        '''
+        if not _CPROFILE_LOCK.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # A profiler outside this module (a debugger, an IDE) is active.
+            _CPROFILE_LOCK.release()
+            logging.warning(f"cProfile unavailable: {e}")
+            return None
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def exit(self, profile):
+        if profile is None:
+            return
+        profile.disable()
+        _CPROFILE_LOCK.release()
+
+    def finish(self, path):
+        with self._lock:
+            profiles = [profile for profile in self._profiles if profile.getstats()]
+        if not profiles:
+            open(path, "w").close()
+            return
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+
+
+def _new_session(config, mode):
+    interval = config.interval_ms / 1000.0
+    if mode == "cprofile":
+        return _CProfileSession(interval, config.all_threads)
+    if mode == "sample":
+        return _SamplingSession(interval, config.all_threads)
+    raise ValueError(f"Unknown profile mode {mode!r}, expected 'sample' or 'cprofile'")
+
+
+def _output_path(config, name, extension):
+    os.makedirs(config.output_dir, exist_ok=True)
+    return os.path.join(config.output_dir, f"{name}-{os.getpid()}-{time.strftime('%Y%m%d_%H%M%S')}.{extension}")
+
+
+class RequestProfiler:
+    '''
+    Profiles the next `n` requests into one file. Callers bracket a request
+    with `begin()` / `end(token)`; `remaining` is 0 while nothing is armed,
+    which is all a request has to check.
+    '''
+
+    def __init__(self, config=None):
+        self.config = config or ProfilingConfig()
+        self.remaining = 0
+        self._active = 0
+        self._session = None
+        self._mode = None
+        self._lock = threading.Lock()
+        self.last_profile = None
+        if self.config.requests > 0:
+            self.arm(self.config.requests)
+
+    def arm(self, requests, mode=None):
+        mode = mode or self.config.mode
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Unknown profile mode {mode!r}, expected 'sample' or 'cprofile'")
+        with self._lock:
+            if self._session is not None and mode != self._mode:
+                raise ValueError(f"A {self._mode} profile is already running")
+            self._mode = mode
+            self.remaining += requests
+        logging.info(f"Profiling the next {requests} requests ({mode})")
+        return self.status()
+
+    def begin(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return None
+            self.remaining -= 1
+            self._active += 1
+            # Started by the first profiled request, so a process that forks after arming samples in the worker.
+            if self._session is None:
+                self._session = _new_session(self.config, self._mode)
+            session = self._session
+        handle = session.enter()
+        if handle is None:
+            # The capture slot is taken (cprofile mode); a later request takes this one's place.
+            with self._lock:
+                self.remaining += 1
+                self._active -= 1
+            return None
+        return session, handle
+
+    def end(self, token):
+        session, handle = token
+        session.exit(handle)
+        with self._lock:
+            self._active -= 1
+            if self.remaining > 0 or self._active > 0 or self._session is not session:
+                return
+            self._session = None
+        path = _output_path(self.config, "requests", session.extension)
+        session.finish(path)
+        self.last_profile = path
+        logging.info(f"Wrote request profile to {path}")
+
+    def status(self):
+        return {
+            "remaining": self.remaining,
+            "active": self._active,
+            "mode": self._mode if self.remaining or self._session is not None else None,
+            "last_profile": self.last_profile,
+        }
+
+
+@contextmanager
+def profile_block(name, enabled=None, config=None):
+    '''
+    Profiles the enclosed block (the calling thread, or every thread with
+    PROFILE_ALL_THREADS=1) when `enabled`, by default PROFILE_TRAINING=1.
+    '''
+    config = config or ProfilingConfig()
+    if not (config.training if enabled is None else enabled):
+        yield None
+        return
+    session = _new_session(config, config.mode)
+    handle = session.enter()
+    if handle is None:
+        logging.warning(f"Not profiling {name}: another cProfile capture is running")
+        yield None
+        return
+    try:
+        yield session
+    finally:
+        session.exit(handle)
+        path = _output_path(config, name, session.extension)
+        session.finish(path)
+        logging.info(f"Wrote {name} profile to {path}")
+
+
+def profiled(name):
+    '''Decorator form of `profile_block` for whole functions, e.g. a training entry point.'''
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_block(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
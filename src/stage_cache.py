@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from importlib import metadata
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class StageCacheConfig:
+    cache_dir: str = os.path.join("artifacts", "cache")
+    enabled: bool = os.environ.get("STAGE_CACHE", "1") != "0"
+
+
+def describe(obj):
+    '''
+    JSON-able description of configs and (unfitted) estimators, used to key
+    stages on what they would compute rather than on object identity.
+    '''
+    if hasattr(obj, "get_params") and not isinstance(obj, type):
+        cls = type(obj)
+        return {"class": f"{cls.__module__}.{cls.__qualname__}", "params": describe(obj.get_params(deep=False))}
+    if isinstance(obj, dict):
+        return {str(key): describe(value) for key, value in sorted(obj.items(), key=lambda item: str(item[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [describe(value) for value in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    return repr(obj)
+
+
+def library_versions():
+    versions = {}
+    for dist in ("scikit-learn", "numpy", "pandas", "xgboost", "catboost", "dill"):
+        try:
+            versions[dist] = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            versions[dist] = None
+    return versions
+
+
+def digest(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    sha = hashlib.sha256()
+    with open(path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class StageCache:
+    '''
+    Content-addressed cache for training stage outputs under artifacts/cache.
+
+    objects/<sha256> holds each output file once, named by its content hash.
+    stages/<stage>/<key>.json maps a stage's input key to the hashes of the
+    files it produced. A stage whose key is found is restored by copying its
+    objects back to the canonical paths instead of being recomputed.
+    '''
+
+    def __init__(self, config=None):
+        self.config = config or StageCacheConfig()
+        self.objects_dir = os.path.join(self.config.cache_dir, "objects")
+        self.stages_dir = os.path.join(self.config.cache_dir, "stages")
+        self._digests_path = os.path.join(self.config.cache_dir, "file_digests.json")
+        self._digests = None
+
+    def file_digest(self, path):
+        '''sha256 of a file, memoized on (size, mtime) so unchanged inputs are not re-read.'''
+        if self._digests is None:
+            try:
+                with open(self._digests_path) as file_obj:
+                    self._digests = json.load(file_obj)
+            except (OSError, ValueError):
+                self._digests = {}
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = self._digests.get(os.path.abspath(path))
+        if entry and entry[:2] == signature:
+            return entry[2]
+
+        sha = file_sha256(path)
+        self._digests[os.path.abspath(path)] = signature + [sha]
+        if self.config.enabled:
+            os.makedirs(self.config.cache_dir, exist_ok=True)
+            self._write_json(self._digests_path, self._digests)
+        return sha
+
+    def key(self, stage, inputs):
+        return digest({"stage": stage, "inputs": inputs})
+
+    def _manifest_path(self, stage, key):
+        return os.path.join(self.stages_dir, stage, f"{key}.json")
+
+    def _object_path(self, sha):
+        return os.path.join(self.objects_dir, sha[:2], sha)
+
+    @staticmethod
+    def _write_json(path, obj):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(obj, file_obj, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _copy(src, dest):
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+
+    def fetch(self, stage, key, outputs):
+        '''
+        Restores a cached stage. `outputs` maps output name to destination
+        path. Returns the stage manifest, or None on a miss.
+        '''
+        if not self.config.enabled:
+            return None
+        try:
+            with open(self._manifest_path(stage, key)) as file_obj:
+                manifest = json.load(file_obj)
+            objects = {name: self._object_path(manifest["outputs"][name]) for name in outputs}
+            if not all(os.path.exists(path) for path in objects.values()):
+                return None
+            for name, dest in outputs.items():
+                self._copy(objects[name], dest)
+        except (OSError, KeyError, ValueError):
+            return None
+        logging.info(f"Stage cache hit for {stage} ({key[:12]})")
+        return manifest
+
+    def store(self, stage, key, outputs, inputs=None):
+        '''Records the files in `outputs` (name -> path) as the result of `stage` for `key`.'''
+        manifest = {
+            "stage": stage,
+            "key": key,
+            "inputs": inputs,
+            "outputs": {name: self.file_digest(path) for name, path in outputs.items()},
+            "created_at": time.time(),
+        }
+        if not self.config.enabled:
+            return manifest
+        try:
+            for name, path in outputs.items():
+                object_path = self._object_path(manifest["outputs"][name])
+                if not os.path.exists(object_path):
+                    self._copy(path, object_path)
+            os.makedirs(os.path.dirname(self._manifest_path(stage, key)), exist_ok=True)
+            self._write_json(self._manifest_path(stage, key), manifest)
+        except Exception as e:
+            raise CustomException(e, sys)
+        return manifest
+
+    def object_path(self, manifest, name):
+        return self._object_path(manifest["outputs"][name])
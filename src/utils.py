@@ -1,14 +1,10 @@
 
 import os
 import sys
-
-import pandas as pd
-import numpy as np
-import dill
-from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
+import time
 
 from src.exception import CustomException
+from src.logger import logging
 
 def save_object(file_path , obj):
     try:
@@ -16,28 +12,38 @@ def save_object(file_path , obj):
 
         os.makedirs(dir_path,exist_ok=True)
 
-        with open(file_path,"wb") as file_obj:
+        import dill
+
+        # Written next to the target and renamed over it, so a concurrent reader
+        # sees either the old file or the complete new one, never a partial write.
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path,"wb") as file_obj:
             dill.dump(obj,file_obj)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+        os.replace(tmp_path,file_path)
 
 
 
     except Exception as e:
         raise CustomException(e,sys)
-def evaluate_models(X_train,y_train,X_test,y_test,models,param):
+def evaluate_models(X_train,y_train,X_test,y_test,models,param,search_config=None):
     try:
-        report = {}
+        from sklearn.metrics import r2_score
+
+        from src.components.model_search import ModelSearch
 
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            para = param[list(models.keys())[i]]
+        report = {}
 
-            gs = GridSearchCV(model,para,cv=3)
-            gs.fit(X_train,y_train)
+        search = ModelSearch(models,param,search_config)
+        best_params = search.fit(X_train,y_train)
+        logging.info(f"Model search finished in {search.wall_seconds_:.1f}s wall time")
 
-            model.set_params(**gs.best_params_)
+        for model_name,model in models.items():
+            start = time.perf_counter()
+            model.set_params(**best_params[model_name])
             model.fit(X_train,y_train)
-
-            #model.fit(X_train,y_train)
+            refit_seconds = time.perf_counter() - start
 
             y_train_pred = model.predict(X_train)
 
@@ -47,15 +53,24 @@ def evaluate_models(X_train,y_train,X_test,y_test,models,param):
 
             test_model_score = r2_score(y_test,y_test_pred)
 
-            report[list(models.keys())[i]] = test_model_score
+            report[model_name] = test_model_score
+
+            timing = search.timings_[model_name]
+            logging.info(
+                f"{model_name}: {timing['fits']} CV fits took {timing['search_seconds']:.1f}s "
+                f"({timing['cached']} scores reused), "
+                f"refit took {refit_seconds:.1f}s, test r2 {test_model_score:.4f}"
+            )
 
         return report    
     except Exception as e:
         raise CustomException(e,sys)
    
- 
 def load_object(file_path):
     try:
+        # Deferred so serving only imports dill (and, through the pickle, sklearn) when it loads one.
+        import dill
+
         with open(file_path,"rb") as file_obj:
             return dill.load(file_obj)
     except Exception as e:
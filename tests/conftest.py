@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.components.data_transformation import DataTransformation
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.utils import save_object
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notebook", "data", "stud.csv")
+TARGET = "math_score"
+
+
+@pytest.fixture(scope="session")
+def student_frame():
+    return pd.read_csv(SOURCE)
+
+
+@pytest.fixture(scope="session")
+def fitted_artifacts(student_frame):
+    '''(model, preprocessor) fitted on stud.csv with the training pipeline's preprocessor.'''
+    features = student_frame.drop(columns=[TARGET])
+    preprocessor = DataTransformation().get_data_transformer_object()
+    model = LinearRegression().fit(preprocessor.fit_transform(features), student_frame[TARGET])
+    return model, preprocessor
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path, fitted_artifacts):
+    '''A plain artifacts/ layout (model.pkl, preprocessor.pkl) in a temporary directory.'''
+    model, preprocessor = fitted_artifacts
+    save_object(str(tmp_path / "model.pkl"), model)
+    save_object(str(tmp_path / "preprocessor.pkl"), preprocessor)
+    return tmp_path
+
+
+@pytest.fixture
+def registry(artifacts_dir):
+    return ModelRegistry(ModelRegistryConfig(check_interval=0), artifacts_dir=str(artifacts_dir))
@@ -0,0 +1,69 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.artifact_format import MANIFEST_FILE_NAME, load_artifacts, main
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipepline.predict_pipeline import CustomDataBatch, PredictPipeline
+from src.utils import load_object, save_object
+
+from tests.conftest import TARGET
+
+
+@pytest.fixture
+def records(student_frame):
+    return CustomDataBatch(student_frame.drop(columns=[TARGET]).sample(8, random_state=0)).get_data_as_data_frame()
+
+
+def export(artifacts_dir):
+    assert main(["export", "--artifacts-dir", str(artifacts_dir)]) == 0
+    return os.path.join(artifacts_dir, "compact")
+
+
+def test_linear_export_has_no_pickles_and_same_predictions(artifacts_dir, records):
+    compact_dir = export(artifacts_dir)
+    with open(os.path.join(compact_dir, MANIFEST_FILE_NAME)) as file_obj:
+        manifest = json.load(file_obj)
+    assert manifest["model"]["kind"] == "linear"
+    assert manifest["preprocessor"]["kind"] == "column_transformer"
+    assert {os.path.splitext(name)[1] for name in manifest["files"]} == {".npy"}
+    assert sorted(os.listdir(compact_dir)) == sorted([MANIFEST_FILE_NAME, *manifest["files"]])
+
+    model, preprocessor = load_artifacts(compact_dir)
+    pickled_model = load_object(os.path.join(artifacts_dir, "model.pkl"))
+    pickled_preprocessor = load_object(os.path.join(artifacts_dir, "preprocessor.pkl"))
+    np.testing.assert_array_equal(preprocessor.transform(records), pickled_preprocessor.transform(records))
+    np.testing.assert_allclose(
+        model.predict(preprocessor.transform(records)),
+        pickled_model.predict(pickled_preprocessor.transform(records)),
+        rtol=1e-12,
+    )
+
+
+def test_xgboost_export_matches_pickle(artifacts_dir, student_frame, fitted_artifacts, records):
+    from xgboost import XGBRegressor
+
+    _, fitted_preprocessor = fitted_artifacts
+    model = XGBRegressor(n_estimators=5).fit(
+        fitted_preprocessor.transform(student_frame.drop(columns=[TARGET])), student_frame[TARGET]
+    )
+    save_object(str(artifacts_dir / "model.pkl"), model)
+
+    compact_model, compact_preprocessor = load_artifacts(export(artifacts_dir))
+    np.testing.assert_array_equal(
+        compact_model.predict(compact_preprocessor.transform(records)),
+        model.predict(fitted_preprocessor.transform(records)),
+    )
+
+
+def test_compact_registry_serves_the_same_predictions(artifacts_dir, records):
+    export(artifacts_dir)
+    predictions = {}
+    for artifact_format in ("dill", "compact"):
+        registry = ModelRegistry(
+            ModelRegistryConfig(check_interval=0, artifact_format=artifact_format), artifacts_dir=str(artifacts_dir)
+        )
+        predictions[artifact_format] = PredictPipeline(registry=registry).predict_batch(records)
+    np.testing.assert_allclose(predictions["compact"], predictions["dill"], rtol=1e-12)
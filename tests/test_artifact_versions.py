@@ -0,0 +1,79 @@
+import os
+
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.artifact_store import ArtifactStore, ArtifactStoreConfig
+from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipepline.predict_pipeline import FEATURE_COLUMNS, PredictPipeline, PredictPipelineConfig
+from src.pipepline.prediction_table import build_prediction_table, table_meta_path
+from src.stage_cache import file_sha256
+from src.utils import save_object
+
+RECORD = {
+    "gender": "female",
+    "race_ethnicity": "group B",
+    "parental_level_of_education": "some college",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": 72,
+    "writing_score": 74,
+}
+
+
+def write_artifacts(directory, model, preprocessor):
+    '''model.pkl, preprocessor.pkl and the prediction table built for them, as train_pipeline writes them.'''
+    model_path, table_path = str(directory / "model.pkl"), str(directory / "prediction_table.npy")
+    save_object(model_path, model)
+    save_object(str(directory / "preprocessor.pkl"), preprocessor)
+    build_prediction_table(
+        model, CompiledPreprocessor.compile(preprocessor), table_path,
+        source={"model.pkl": file_sha256(model_path), "preprocessor.pkl": file_sha256(str(directory / "preprocessor.pkl"))},
+    )
+    return {name: str(directory / name) for name in ("model.pkl", "preprocessor.pkl")} | {
+        os.path.basename(path): path for path in (table_path, table_meta_path(table_path))
+    }
+
+
+@pytest.fixture
+def shifted_model(student_frame, fitted_artifacts):
+    '''A second model whose predictions differ from the first by +10.'''
+    preprocessor = fitted_artifacts[1]
+    features = preprocessor.transform(student_frame[FEATURE_COLUMNS])
+    return LinearRegression().fit(features, student_frame["math_score"] + 10)
+
+
+def lookup_pipeline(directory):
+    registry = ModelRegistry(ModelRegistryConfig(check_interval=0), artifacts_dir=str(directory))
+    config = PredictPipelineConfig(lookup_table=True, prediction_table_path=str(directory / "prediction_table.npy"))
+    return PredictPipeline(registry=registry, config=config)
+
+
+def test_rollback_serves_the_table_published_with_the_model(tmp_path, fitted_artifacts, shifted_model):
+    model, preprocessor = fitted_artifacts
+    store = ArtifactStore(ArtifactStoreConfig(artifacts_dir=str(tmp_path)))
+    first = store.publish(write_artifacts(tmp_path, model, preprocessor))
+    store.publish(write_artifacts(tmp_path, shifted_model, preprocessor))
+
+    pipeline = lookup_pipeline(tmp_path)
+    shifted = pipeline.predict(RECORD)[0]
+    assert pipeline.lookup_stats["lookup_hits"] == 1
+
+    store.rollback(first)
+    assert pipeline.registry.check_for_updates()
+    assert pipeline.registry.stats()["version"] == first
+    # The plain artifacts/prediction_table.npy still belongs to the shifted model.
+    assert pipeline.predict(RECORD)[0] == pytest.approx(shifted - 10, abs=1e-3)
+    assert pipeline.lookup_stats["lookup_hits"] == 2
+
+
+def test_table_built_for_another_model_is_ignored(tmp_path, fitted_artifacts, shifted_model):
+    model, preprocessor = fitted_artifacts
+    files = write_artifacts(tmp_path, shifted_model, preprocessor)
+    save_object(files["model.pkl"], model)
+
+    pipeline = lookup_pipeline(tmp_path)
+    assert pipeline.prediction_table(pipeline.registry.get()) is None
+    pipeline.predict(RECORD)
+    assert pipeline.lookup_stats == {"lookup_hits": 0, "lookup_misses": 1}
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.pipepline.inference_pool import InferencePool, InferencePoolConfig
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+
+from tests.conftest import TARGET
+
+
+async def call(app, method, path, body=b""):
+    '''Serves one request through the ASGI app; returns (status, headers, decoded JSON body).'''
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    headers = dict(sent[0]["headers"])
+    return sent[0]["status"], headers, json.loads(sent[1]["body"])
+
+
+@pytest.fixture
+def asgi():
+    import asgi as asgi_module
+
+    return asgi_module
+
+
+def test_health_reports_the_registry(asgi, monkeypatch, registry, tmp_path):
+    monkeypatch.setattr(asgi.predict_pipeline, "registry", registry)
+    status, _, body = asyncio.run(call(asgi.app, "GET", "/health"))
+    assert status == 200 and body["status"] == "healthy"
+    assert body["model_registry"]["loaded"]
+
+    missing = ModelRegistry(ModelRegistryConfig(check_interval=0), artifacts_dir=str(tmp_path / "missing"))
+    monkeypatch.setattr(asgi.predict_pipeline, "registry", missing)
+    _, _, body = asyncio.run(call(asgi.app, "GET", "/health"))
+    assert body["status"] == "unhealthy"
+    assert "Model file not found" in body["error"]
+
+
+class BlockedPipeline:
+    def __init__(self, registry):
+        self.registry = registry
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def predict_batch(self, features):
+        self.entered.set()
+        self.release.wait(timeout=10)
+        return np.zeros(len(features))
+
+
+def test_saturated_pool_answers_503(asgi, monkeypatch, registry, student_frame):
+    pipeline = BlockedPipeline(registry)
+    pool = InferencePool(pipeline, InferencePoolConfig(kind="thread", workers=1, max_queue=0))
+    monkeypatch.setattr(asgi, "inference_pool", pool)
+    body = json.dumps(student_frame.drop(columns=[TARGET]).head(2).to_dict(orient="records")).encode()
+
+    async def scenario():
+        first = asyncio.ensure_future(call(asgi.app, "POST", "/predict/batch", body))
+        await asyncio.get_running_loop().run_in_executor(None, pipeline.entered.wait, 10)
+        second = await call(asgi.app, "POST", "/predict/batch", body)
+        pipeline.release.set()
+        return await first, second
+
+    try:
+        (first_status, _, first_body), (second_status, second_headers, second_body) = asyncio.run(scenario())
+    finally:
+        pipeline.release.set()
+        pool.shutdown()
+    assert (first_status, first_body) == (200, {"predictions": [0.0, 0.0], "count": 2})
+    assert second_status == 503
+    assert second_headers[b"retry-after"] == b"1"
+    assert second_body == {"error": "The server is busy, please try again"}
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from tests.conftest import TARGET
+
+
+@pytest.fixture
+def client(monkeypatch, registry):
+    import app as app_module
+
+    monkeypatch.setattr(app_module.predict_pipeline, "registry", registry)
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def records(student_frame):
+    return student_frame.drop(columns=[TARGET]).head(5).to_dict(orient="records")
+
+
+def test_batch_matches_model(client, records, student_frame, fitted_artifacts):
+    model, preprocessor = fitted_artifacts
+    expected = model.predict(preprocessor.transform(student_frame.drop(columns=[TARGET]).head(5)))
+
+    response = client.post("/predict/batch", json=records)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == 5
+    assert body["predictions"] == pytest.approx(expected.tolist())
+
+    columns = {column: [record[column] for record in records] for column in records[0]}
+    assert client.post("/predict/batch", json={"columns": columns}).get_json() == body
+
+
+@pytest.mark.parametrize("bad", [True, "ninety", -1, None])
+def test_bad_row_is_rejected(client, records, bad):
+    records[3]["reading_score"] = bad
+    response = client.post("/predict/batch", json={"records": records})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "'reading_score' must be a number between 0 and 100 in rows [3]"
+
+
+def test_empty_batch(client):
+    for payload in ([], {"records": []}):
+        response = client.post("/predict/batch", json=payload)
+        assert response.status_code == 200
+        assert response.get_json() == {"predictions": [], "count": 0}
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from src.exception import CustomException
+from src.pipepline import batch_score
+
+from tests.conftest import TARGET
+
+
+@pytest.fixture
+def input_csv(tmp_path, student_frame):
+    path = tmp_path / "input.csv"
+    student_frame.drop(columns=[TARGET]).head(7).to_csv(path, index=False)
+    return path
+
+
+def score(input_csv, output, artifacts_dir, *extra):
+    return batch_score.main([str(input_csv), str(output), "--chunk-size", "2", "--artifacts-dir", str(artifacts_dir), *extra])
+
+
+def test_resumed_run_matches_single_pass(tmp_path, input_csv, artifacts_dir, monkeypatch):
+    single = tmp_path / "single.csv"
+    assert score(input_csv, single, artifacts_dir) == 0
+
+    score_chunk = batch_score._score_chunk
+
+    def interrupted(chunk, first_row, *args):
+        if first_row == 4:
+            raise KeyboardInterrupt
+        return score_chunk(chunk, first_row, *args)
+
+    resumed = tmp_path / "resumed.csv"
+    monkeypatch.setattr(batch_score, "_score_chunk", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        score(input_csv, resumed, artifacts_dir, "--resume")
+    progress = json.loads((tmp_path / "resumed.csv.progress.json").read_text())
+    assert (progress["chunks_done"], progress["rows_done"]) == (2, 4)
+
+    # A torn write after the last checkpoint is dropped on resume.
+    with open(resumed, "a") as file_obj:
+        file_obj.write("female,group B,partial")
+    monkeypatch.setattr(batch_score, "_score_chunk", score_chunk)
+    assert score(input_csv, resumed, artifacts_dir, "--resume") == 0
+
+    assert resumed.read_bytes() == single.read_bytes()
+    assert len(single.read_text().splitlines()) == 8
+
+
+def test_resume_rejects_a_different_chunk_size(tmp_path, input_csv, artifacts_dir):
+    output = tmp_path / "out.csv"
+    score(input_csv, output, artifacts_dir, "--resume")
+    with pytest.raises(CustomException, match="different input or chunk size"):
+        batch_score.main([str(input_csv), str(output), "--chunk-size", "3", "--resume", "--artifacts-dir", str(artifacts_dir)])
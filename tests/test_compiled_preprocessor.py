@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_transformation import DataTransformation
+from src.pipepline.compiled_preprocessor import CompiledPreprocessor
+from src.pipepline.predict_pipeline import FEATURE_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def features(student_frame):
+    return student_frame[FEATURE_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def preprocessor(fitted_artifacts):
+    return fitted_artifacts[1]
+
+
+@pytest.fixture(scope="module")
+def lenient_preprocessor(features):
+    '''The same preprocessor with handle_unknown="ignore", where unseen categories encode as zeros.'''
+    preprocessor = DataTransformation().get_data_transformer_object()
+    preprocessor.set_params(cat_pipeline__one_hot_encoder__handle_unknown="ignore")
+    return preprocessor.fit(features)
+
+
+def compiled_of(preprocessor):
+    compiled = CompiledPreprocessor.compile(preprocessor)
+    assert compiled is not None
+    return compiled
+
+
+def test_dataframe_input(preprocessor, features):
+    np.testing.assert_array_equal(compiled_of(preprocessor).transform(features), preprocessor.transform(features))
+
+
+def test_dict_input(preprocessor, features):
+    compiled = compiled_of(preprocessor)
+    for record in features.head(50).to_dict("records"):
+        expected = preprocessor.transform(pd.DataFrame([record]))
+        np.testing.assert_array_equal(compiled.transform(record), expected)
+    np.testing.assert_array_equal(compiled.transform(features.to_dict("records")), preprocessor.transform(features))
+
+
+@pytest.mark.parametrize("as_array", [np.asarray, list])
+def test_column_array_input(preprocessor, features, as_array):
+    columns = {column: as_array(features[column].to_numpy()) for column in FEATURE_COLUMNS}
+    np.testing.assert_array_equal(compiled_of(preprocessor).transform(columns), preprocessor.transform(features))
+
+
+def test_missing_values_are_imputed(preprocessor, features):
+    frame = features.head(20).copy()
+    frame.loc[frame.index[::3], "reading_score"] = np.nan
+    frame.loc[frame.index[1::4], "lunch"] = np.nan
+    frame.loc[frame.index[2::5], "gender"] = np.nan
+    expected = preprocessor.transform(frame)
+    compiled = compiled_of(preprocessor)
+    np.testing.assert_array_equal(compiled.transform(frame), expected)
+    np.testing.assert_array_equal(compiled.transform({column: frame[column].to_numpy() for column in FEATURE_COLUMNS}), expected)
+    for row, record in enumerate(frame.to_dict("records")):
+        np.testing.assert_array_equal(compiled.transform(record), expected[row:row + 1])
+
+
+def test_unseen_category_raises_like_sklearn(preprocessor, features):
+    record = dict(features.iloc[0], race_ethnicity="group Z")
+    with pytest.raises(ValueError):
+        preprocessor.transform(pd.DataFrame([record]))
+    compiled = compiled_of(preprocessor)
+    with pytest.raises(ValueError, match="group Z"):
+        compiled.transform(record)
+    with pytest.raises(ValueError, match="group Z"):
+        compiled.transform({column: [value] for column, value in record.items()})
+
+
+def test_unseen_category_ignored_like_sklearn(lenient_preprocessor, features):
+    frame = features.head(10).copy()
+    frame.loc[frame.index[::2], "race_ethnicity"] = "group Z"
+    frame.loc[frame.index[1], "parental_level_of_education"] = "doctorate"
+    expected = lenient_preprocessor.transform(frame)
+    compiled = compiled_of(lenient_preprocessor)
+    np.testing.assert_array_equal(compiled.transform(frame), expected)
+    np.testing.assert_array_equal(compiled.transform(frame.iloc[0].to_dict()), expected[:1])
@@ -0,0 +1,64 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from src.components.data_ingestion import DataIngestion, DataIngestionConfig
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notebook", "data", "stud.csv")
+
+
+def ingest(tmp_path, source, chunk_size, name):
+    out = tmp_path / name
+    ingestion = DataIngestion()
+    ingestion.ingestion_config = DataIngestionConfig(
+        train_data_path=str(out / "train.csv"),
+        test_data_path=str(out / "test.csv"),
+        raw_data_path=str(out / "raw.csv"),
+        source_data_path=str(source),
+        chunk_size=chunk_size,
+    )
+    train_path, test_path = ingestion.initiate_data_ingestion()
+    return [open(path).read() for path in (out / "raw.csv", train_path, test_path)]
+
+
+@pytest.fixture
+def source_with_blank(tmp_path):
+    # A blank cell turns math_score into float64 in whichever chunk contains it.
+    frame = pd.read_csv(SOURCE, dtype=str, keep_default_na=False).head(200)
+    frame.loc[7, "math_score"] = ""
+    path = tmp_path / "source.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_split_is_independent_of_chunk_size(tmp_path, source_with_blank, chunk_size):
+    whole = ingest(tmp_path, source_with_blank, 10_000, "whole")
+    chunked = ingest(tmp_path, source_with_blank, chunk_size, f"chunked_{chunk_size}")
+    assert chunked == whole
+
+
+def test_split_covers_every_row_once(tmp_path, source_with_blank):
+    raw, train, test = (pd.read_csv(io.StringIO(text)) for text in ingest(tmp_path, source_with_blank, 16, "out"))
+    assert len(train) + len(test) == len(raw) == 200
+    assert 0 < len(test) < len(train)
+    assert pd.concat([train, test]).sort_values(list(raw.columns)).reset_index(drop=True).equals(
+        raw.sort_values(list(raw.columns)).reset_index(drop=True)
+    )
+
+
+def test_split_depends_on_random_state(tmp_path):
+    first = ingest(tmp_path, SOURCE, 256, "a")
+    ingestion = DataIngestion()
+    ingestion.ingestion_config = DataIngestionConfig(
+        train_data_path=str(tmp_path / "b_train.csv"),
+        test_data_path=str(tmp_path / "b_test.csv"),
+        raw_data_path=str(tmp_path / "b_raw.csv"),
+        source_data_path=SOURCE,
+        random_state=7,
+    )
+    ingestion.initiate_data_ingestion()
+    assert first[0] == open(tmp_path / "b_raw.csv").read()
+    assert first[2] != open(tmp_path / "b_test.csv").read()
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+
+from src.components.fold_cache import FoldCache
+from src.components.model_search import ModelSearch, ModelSearchConfig
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(50, 4)), rng.normal(size=50)
+    rows = np.arange(50)
+    splits = {
+        50: [(rows[10:], rows[:10]), (rows[:40], rows[40:])],
+        20: [(rows[:15], rows[15:20])],
+    }
+    return X, y, splits
+
+
+def expected_folds(X, y, splits):
+    for resource, folds in splits.items():
+        for fold_index, (train, test) in enumerate(folds):
+            yield (resource, fold_index), (X[train], y[train], X[test], y[test])
+
+
+def _fold_sums(descriptor, keys):
+    # Runs in a spawned process, like a search worker.
+    folds = FoldCache.attach(descriptor)
+    try:
+        return [[float(part.sum()) for part in folds.fold(*key)] for key in keys]
+    finally:
+        folds.close()
+
+
+def shared_segments():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_local_folds_match_the_source_rows(data, dtype):
+    X, y, splits = data
+    folds = FoldCache.build(X, y, splits, dtype)
+    for key, expected in expected_folds(X, y, splits):
+        for actual, part in zip(folds.fold(*key), expected):
+            assert actual.dtype == np.dtype(dtype) and not actual.flags.writeable
+            np.testing.assert_array_equal(actual, part.astype(dtype))
+
+
+def test_shared_folds_round_trip_to_another_process(data):
+    X, y, splits = data
+    folds = FoldCache.build(X, y, splits, shared=True)
+    name = folds.descriptor[0]
+    keys = [key for key, _ in expected_folds(X, y, splits)]
+    try:
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            sums = pool.apply(_fold_sums, (folds.descriptor, keys))
+        expected = [[float(part.sum()) for part in parts] for _, parts in expected_folds(X, y, splits)]
+        np.testing.assert_allclose(sums, expected)
+    finally:
+        folds.close(unlink=True)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_local_cache_cannot_be_attached(data):
+    with pytest.raises(ValueError):
+        FoldCache.build(*data).descriptor
+
+
+def test_search_unlinks_its_segments(data):
+    X, y, _ = data
+    before = shared_segments()
+    config = ModelSearchConfig(n_jobs=2, score_cache_path="")
+    ModelSearch({"Ridge": Ridge()}, {"Ridge": {"alpha": [0.1, 1.0]}}, config).fit(X, y)
+    assert shared_segments() == before
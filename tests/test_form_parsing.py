@@ -0,0 +1,33 @@
+import pytest
+
+from src.pipepline.predict_pipeline import CustomData
+
+FORM = {
+    "gender": "female",
+    "ethnicity": "group B",
+    "parental_level_of_education": "some college",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": "72",
+    "writing_score": "74",
+}
+
+
+def test_from_form_parses_scores():
+    data = CustomData.from_form(FORM)
+    assert data.race_ethnicity == "group B"
+    assert (data.reading_score, data.writing_score) == (72.0, 74.0)
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"lunch": ""}, "All fields are required"),
+    ({"reading_score": "abc"}, "Reading and writing scores must be valid numbers"),
+    ({"writing_score": "140"}, "Invalid input data - Scores must be between 0 and 100"),
+])
+def test_flask_route_shows_from_form_errors(changes, message):
+    import app as app_module
+
+    with pytest.raises(ValueError, match=message):
+        CustomData.from_form(dict(FORM, **changes))
+    response = app_module.app.test_client().post("/predictdata", data=dict(FORM, **changes))
+    assert f"Error: {message}" in response.get_data(as_text=True)
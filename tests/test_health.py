@@ -0,0 +1,29 @@
+import pytest
+
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import app as app_module
+
+    def use_registry(registry):
+        monkeypatch.setattr(app_module.predict_pipeline, "registry", registry)
+        return app_module.app.test_client()
+
+    return use_registry
+
+
+def test_fresh_worker_is_healthy(client, registry):
+    assert registry.peek() is None
+    body = client(registry).get("/health").get_json()
+    assert body["status"] == "healthy" and body["model_loaded"]
+    assert body["model_path"].endswith("model.pkl")
+    assert registry.stats()["loads"] == 1
+
+
+def test_missing_artifacts_are_unhealthy(client, tmp_path):
+    registry = ModelRegistry(ModelRegistryConfig(check_interval=0), artifacts_dir=str(tmp_path))
+    body = client(registry).get("/health").get_json()
+    assert body["status"] == "unhealthy"
+    assert "Model file not found" in body["error"]
@@ -0,0 +1,42 @@
+import json
+
+from benchmarks.load_test import parse_line, read_replay
+
+TEXT_LINE = (
+    "[2026-10-18 07:07:45,991]154 __main__ -INFO -Prediction completed route=/predictdata ms=1.786 "
+    "gender=male race_ethnicity=group D parental_level_of_education=bachelor's degree lunch=free/reduced "
+    "test_preparation_course=none writing_score=87.0 reading_score=85.0 prediction=92.4\n"
+)
+FORM = {
+    "gender": "male",
+    "ethnicity": "group D",
+    "parental_level_of_education": "bachelor's degree",
+    "lunch": "free/reduced",
+    "test_preparation_course": "none",
+    "reading_score": "85.0",
+    "writing_score": "87.0",
+}
+
+
+def test_text_log_line():
+    assert parse_line(TEXT_LINE) == ({"path": "/predictdata", "form": FORM}, True)
+
+
+def test_json_log_line():
+    entry = {"time": "t", "level": "INFO", "message": "Prediction completed", "route": "/predictdata", "ms": 1.7,
+             "gender": "male", "race_ethnicity": "group D", "parental_level_of_education": "bachelor's degree",
+             "lunch": "free/reduced", "test_preparation_course": "none", "writing_score": 87.0, "reading_score": 85.0}
+    assert parse_line(json.dumps(entry)) == ({"path": "/predictdata", "form": FORM}, True)
+
+
+def test_read_replay_counts_unsampled_and_other_lines(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("".join([
+        TEXT_LINE,
+        "[2026-10-18 07:07:46,001]154 __main__ -INFO -Prediction completed route=/predictdata ms=1.2\n",
+        "[2026-10-18 07:07:40,001]44 root -INFO -Loading model\n",
+        json.dumps({"path": "/predict/batch", "json": {"records": []}}) + "\n",
+    ]))
+    requests, skipped, unsampled = read_replay(str(path))
+    assert [request["path"] for request in requests] == ["/predictdata", "/predict/batch"]
+    assert (skipped, unsampled) == (1, 1)
@@ -0,0 +1,54 @@
+import logging
+import os
+import queue
+import time
+
+import pytest
+
+from src import logger as logger_module
+from src.logger import DroppingQueueHandler
+
+
+def record(message, *args):
+    return logging.makeLogRecord({"name": "test", "levelno": logging.INFO, "levelname": "INFO", "msg": message, "args": args})
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    records = [record("request %d", number) for number in range(5)]
+
+    started = time.perf_counter()
+    for item in records:
+        handler.handle(item)
+    assert time.perf_counter() - started < 1
+
+    assert handler.dropped == 3
+    # The first records are kept as they were logged; formatting is left to the listener.
+    assert [handler.queue.get_nowait() for _ in range(2)] == records[:2]
+    assert records[0].msg == "request %d" and records[0].args == (0,)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_restarts_the_listener(tmp_path, monkeypatch):
+    log_path = tmp_path / "child.log"
+    child_handler = logging.FileHandler(log_path)
+    child_handler.setFormatter(logging.Formatter("%(message)s"))
+    # Read by _start_listener when the fork hook runs in the child.
+    monkeypatch.setattr(logger_module, "_file_handler", child_handler)
+    parent_listener = logger_module._listener
+
+    pid = os.fork()
+    if pid == 0:
+        ok = False
+        try:
+            listener = logger_module._listener
+            ok = listener is not parent_listener and listener._thread.is_alive()
+            logger_module._queue_handler.handle(record("from pid %d", os.getpid()))
+            logger_module._stop_listener()
+        finally:
+            os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    child_handler.close()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert log_path.read_text() == f"from pid {pid}\n"
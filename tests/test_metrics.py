@@ -0,0 +1,78 @@
+import pytest
+
+from src import metrics
+
+from tests.test_form_parsing import FORM
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    '''An empty metric and stats registry for render().'''
+    monkeypatch.setattr(metrics, "_metrics", [])
+    monkeypatch.setattr(metrics, "_stats_sources", [])
+    return metrics._register
+
+
+def test_histogram_renders_cumulative_buckets(registered):
+    histogram = registered(metrics.Histogram("job_seconds", "Job time.", ["stage"], buckets=(0.1, 1.0)))
+    child = histogram.labels('say "hi"\\\n')
+    for value in (0.05, 0.1, 0.5, 5.0):
+        child.observe(value)
+
+    label = 'stage="say \\"hi\\"\\\\\\n"'
+    assert metrics.render() == "\n".join([
+        "# HELP job_seconds Job time.",
+        "# TYPE job_seconds histogram",
+        f'job_seconds_bucket{{{label},le="0.1"}} 2',
+        f'job_seconds_bucket{{{label},le="1.0"}} 3',
+        f'job_seconds_bucket{{{label},le="+Inf"}} 4',
+        f"job_seconds_sum{{{label}}} 5.65",
+        f"job_seconds_count{{{label}}} 4",
+    ]) + "\n"
+
+
+def test_counter_gauge_and_stats(registered):
+    counter = registered(metrics.Counter("jobs_total", "Jobs run.", ["status"]))
+    counter.labels("ok").inc()
+    counter.labels("error").inc(2)
+    gauge = registered(metrics.Gauge("jobs_running", "Jobs running."))
+    gauge.labels().inc(3)
+    gauge.labels().dec()
+    metrics.register_stats("pool", lambda: {"size": 4, "started": True, "kind": "thread", "sizes": {1: 5, 2: 1}})
+    metrics.register_stats("broken", lambda: 1 / 0)
+    metrics.register_stats("disabled", lambda: None)
+
+    assert metrics.render().splitlines() == [
+        "# HELP jobs_total Jobs run.",
+        "# TYPE jobs_total counter",
+        'jobs_total{status="error"} 2.0',
+        'jobs_total{status="ok"} 1.0',
+        "# HELP jobs_running Jobs running.",
+        "# TYPE jobs_running gauge",
+        "jobs_running 2.0",
+        "# TYPE pool_size gauge",
+        "pool_size 4",
+        "# TYPE pool_sizes gauge",
+        'pool_sizes{key="1"} 5',
+        'pool_sizes{key="2"} 1',
+        "# TYPE pool_started gauge",
+        "pool_started 1",
+    ]
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr(metrics.config, "enabled", False)
+    histogram = metrics.Histogram("off_seconds", "Off.")
+    histogram.labels().observe(1.0)
+    assert histogram.render()[-1] == "off_seconds_count 0"
+
+
+def test_form_prediction_observes_build_features(monkeypatch, registry):
+    import app as app_module
+
+    monkeypatch.setattr(app_module.predict_pipeline, "registry", registry)
+    stage = metrics.stage("build_features")
+    before = sum(stage.counts)
+    response = app_module.app.test_client().post("/predictdata", data=FORM)
+    assert "Error" not in response.get_data(as_text=True)
+    assert sum(stage.counts) == before + 1
@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.pipepline.micro_batcher import MicroBatcher, MicroBatcherConfig
+from src.pipepline.predict_pipeline import CustomData, PredictPipeline
+from src.pipepline.prediction_cache import PredictionCache, PredictionCacheConfig
+
+RECORD = {
+    "gender": "male",
+    "race_ethnicity": "group A",
+    "parental_level_of_education": "some college",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": 72.0,
+    "writing_score": 70.0,
+}
+
+
+def test_cache_is_checked_before_the_batcher(registry):
+    pipeline = PredictPipeline(registry=registry, cache=PredictionCache(PredictionCacheConfig(enabled=True)))
+    batcher = MicroBatcher(
+        lambda features: pipeline.predict(features, use_cache=False),
+        MicroBatcherConfig(enabled=True, max_wait_ms=0),
+    )
+    first = pipeline.predict(dict(RECORD), batcher=batcher)
+    second = pipeline.predict(dict(RECORD), batcher=batcher)
+
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first, pipeline.predict(dict(RECORD), use_cache=False))
+    assert batcher.stats()["requests"] == 1
+    stats = pipeline.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_batcher_results_match_direct_prediction(registry):
+    pipeline = PredictPipeline(registry=registry)
+    batcher = MicroBatcher(pipeline.predict, MicroBatcherConfig(enabled=True, max_wait_ms=20))
+    records = [dict(RECORD, reading_score=float(score)) for score in range(40, 60)]
+    futures = [batcher.submit(record) for record in records]
+    results = np.concatenate([future.result(timeout=10) for future in futures])
+    np.testing.assert_allclose(results, pipeline.predict({column: [record[column] for record in records] for column in RECORD}))
+
+
+def test_flask_form_is_validated_once(monkeypatch):
+    import app as app_module
+
+    calls = []
+    validate = CustomData.validate
+    monkeypatch.setattr(CustomData, "validate", lambda self: calls.append(1) or validate(self))
+    response = app_module.app.test_client().post("/predictdata", data={
+        "gender": "male", "ethnicity": "group A", "parental_level_of_education": "some college",
+        "lunch": "standard", "test_preparation_course": "none", "reading_score": "72", "writing_score": "70",
+    })
+    assert response.status_code == 200 and "Error" not in response.get_data(as_text=True)
+    assert len(calls) == 1
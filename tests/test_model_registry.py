@@ -0,0 +1,77 @@
+import copy
+import os
+import time
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.pipepline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipepline.predict_pipeline import FEATURE_COLUMNS, canary_prediction
+from src.utils import save_object
+
+
+def replace_model(artifacts_dir, model):
+    '''Rewrites model.pkl and moves its mtime forward, as a deploy would.'''
+    path = str(artifacts_dir / "model.pkl")
+    previous = os.stat(path).st_mtime_ns
+    save_object(path, model)
+    os.utime(path, ns=(previous + 10**9, previous + 10**9))
+
+
+@pytest.fixture
+def shifted_model(student_frame, fitted_artifacts):
+    features = fitted_artifacts[1].transform(student_frame[FEATURE_COLUMNS])
+    return LinearRegression().fit(features, student_frame["math_score"] + 10)
+
+
+def test_reload_on_content_change(registry, artifacts_dir, shifted_model):
+    first = registry.get()
+    assert first.generation == 1
+    assert not registry.check_for_updates()
+
+    replace_model(artifacts_dir, shifted_model)
+    assert registry.check_for_updates()
+    second = registry.get()
+    assert second.generation == 2
+    assert second.model_sha256 != first.model_sha256
+    assert canary_prediction(second) == pytest.approx(canary_prediction(first) + 10)
+    assert registry.stats()["reloads"] == 1
+
+
+def test_touched_files_keep_the_loaded_objects(registry, artifacts_dir):
+    first = registry.get()
+    stat = os.stat(artifacts_dir / "model.pkl")
+    os.utime(artifacts_dir / "model.pkl", ns=(stat.st_mtime_ns + 10**9, stat.st_mtime_ns + 10**9))
+    assert not registry.check_for_updates()
+    assert registry.get().model is first.model
+    assert registry.get().generation == 1
+
+
+def test_broken_artifact_is_rejected_and_old_generation_serves(registry, artifacts_dir, fitted_artifacts):
+    first = registry.get()
+    broken = copy.deepcopy(fitted_artifacts[0])
+    broken.intercept_ = np.nan
+    replace_model(artifacts_dir, broken)
+
+    assert not registry.check_for_updates()
+    assert registry.get() is first
+    assert registry.stats()["reload_failures"] == 1
+    # The same broken files are not loaded again on every check.
+    assert not registry.check_for_updates()
+    assert registry.stats()["reload_failures"] == 1
+
+    (artifacts_dir / "model.pkl").write_bytes(b"not a pickle")
+    assert not registry.check_for_updates()
+    assert registry.get() is first
+    assert registry.stats()["reload_failures"] == 2
+
+
+def test_watcher_swaps_in_new_artifacts(artifacts_dir, shifted_model):
+    registry = ModelRegistry(ModelRegistryConfig(check_interval=0.05), artifacts_dir=str(artifacts_dir))
+    assert registry.get().generation == 1
+    replace_model(artifacts_dir, shifted_model)
+    deadline = time.monotonic() + 10
+    while registry.peek().generation == 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert registry.peek().generation == 2
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeRegressor
+
+from src.components.model_search import ModelSearch, ModelSearchConfig
+from src.pipepline.predict_pipeline import FEATURE_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def training_data(student_frame, fitted_artifacts):
+    X = fitted_artifacts[1].transform(student_frame[FEATURE_COLUMNS])
+    return X, student_frame["math_score"].to_numpy()
+
+
+def search_config(**overrides):
+    return ModelSearchConfig(**dict({"n_jobs": 2, "score_cache_path": ""}, **overrides))
+
+
+def test_process_pool_matches_grid_search_cv(training_data):
+    X, y = training_data
+    models = {"Ridge": Ridge(), "Decision Tree": DecisionTreeRegressor(random_state=0)}
+    param = {
+        "Ridge": {"alpha": [0.01, 1.0, 30.0, 300.0]},
+        "Decision Tree": {"max_depth": [2, 4, 8], "min_samples_leaf": [1, 5]},
+    }
+    search = ModelSearch(models, param, search_config())
+    best = search.fit(X, y)
+
+    for name, model in models.items():
+        expected = GridSearchCV(model, param[name], cv=3).fit(X, y).best_params_
+        assert best[name] == expected
+    # Every (candidate, fold) was fitted once, in two worker processes.
+    assert search.timings_["Ridge"]["fits"] == 4 * 3
+    assert search.timings_["Decision Tree"]["fits"] == 6 * 3
+
+
+def test_halving_by_rows(training_data):
+    X, y = training_data
+    models = {"Ridge": Ridge()}
+    param = {"Ridge": {"alpha": [0.001, 0.1, 1.0, 10.0, 100.0, 1e3, 1e4, 1e5, 1e6]}}
+    search = ModelSearch(models, param, search_config(strategy="halving", halving_factor=3))
+
+    assert search._schedule("Ridge", 9, len(X)) == [len(X) // 9, len(X) // 3, len(X)]
+    best = search.fit(X, y)
+    # 9 candidates on a ninth of the rows, the best 3 on a third, the winner on all of them.
+    assert search.timings_["Ridge"]["fits"] == (9 + 3 + 1) * 3
+    grid = ModelSearch(models, param, search_config()).fit(X, y)
+    assert best == grid
+
+
+def test_halving_by_iterations(training_data):
+    from sklearn.ensemble import RandomForestRegressor
+
+    X, y = training_data
+    models = {"Random Forest": RandomForestRegressor(random_state=0)}
+    param = {"Random Forest": {"n_estimators": [4, 12, 36], "max_depth": [1, 3, 6]}}
+    search = ModelSearch(models, param, search_config(strategy="halving", halving_factor=3))
+
+    # n_estimators is the round budget, not a grid axis: 3 candidates, 12 then 36 trees.
+    assert search._candidates("Random Forest") == [{"max_depth": 1}, {"max_depth": 3}, {"max_depth": 6}]
+    assert search._schedule("Random Forest", 3, len(X)) == [12, 36]
+    best = search.fit(X, y)
+    assert best["Random Forest"]["n_estimators"] == 36
+    assert search.timings_["Random Forest"]["fits"] == (3 + 1) * 3
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match="Unknown search strategy"):
+        ModelSearch({}, {}, search_config(strategy="random"))
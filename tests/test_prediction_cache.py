@@ -0,0 +1,26 @@
+from src.pipepline.prediction_cache import PredictionCache, PredictionCacheConfig
+
+
+def cache():
+    return PredictionCache(PredictionCacheConfig(enabled=True, max_entries=100))
+
+
+def test_newer_generation_drops_entries():
+    prediction_cache = cache()
+    prediction_cache.put(("a",), 1, 1.0)
+    assert prediction_cache.get(("a",), 1) == 1.0
+    assert prediction_cache.get(("a",), 2) is None
+    assert prediction_cache.stats()["invalidations"] == 1
+
+
+def test_older_generation_does_not_flush():
+    prediction_cache = cache()
+    prediction_cache.put(("a",), 1, 1.0)
+    prediction_cache.put(("b",), 2, 2.0)
+    # A request that started before the reload finishes after it.
+    prediction_cache.put(("a",), 1, 1.0)
+    assert prediction_cache.get(("a",), 1) is None
+    assert prediction_cache.get(("b",), 2) == 2.0
+    assert prediction_cache.get(("a",), 2) is None
+    stats = prediction_cache.stats()
+    assert (stats["entries"], stats["invalidations"]) == (1, 1)
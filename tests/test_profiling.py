@@ -0,0 +1,101 @@
+import cProfile
+import os
+import pstats
+import threading
+import types
+
+import pytest
+
+from src import profiling
+from src.profiling import ProfilingConfig, RequestProfiler, profile_block
+
+from tests.test_form_parsing import FORM
+
+
+class ExclusiveProfile(cProfile.Profile):
+    '''cProfile as on Python 3.12+: a second enabled profiler in the process raises.'''
+    enabled = set()
+
+    def enable(self, *args, **kwargs):
+        if ExclusiveProfile.enabled - {self}:
+            raise ValueError("Another profiling tool is already active")
+        ExclusiveProfile.enabled.add(self)
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        ExclusiveProfile.enabled.discard(self)
+
+
+@pytest.fixture
+def exclusive_cprofile(monkeypatch):
+    monkeypatch.setattr(profiling, "cProfile", types.SimpleNamespace(Profile=ExclusiveProfile))
+
+
+def config(tmp_path, **overrides):
+    return ProfilingConfig(**dict(dict(output_dir=str(tmp_path), mode="cprofile", requests=0, admin_token=""), **overrides))
+
+
+def test_concurrent_cprofile_requests_take_turns(tmp_path, exclusive_cprofile):
+    profiler = RequestProfiler(config(tmp_path))
+    profiler.arm(2)
+    first = profiler.begin()
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(profiler.begin()))
+    thread.start()
+    thread.join()
+    # The second request runs unprofiled and leaves its turn to a later one.
+    assert others == [None]
+    assert profiler.status()["remaining"] == 1 and profiler.status()["active"] == 1
+
+    profiler.end(first)
+    assert profiler.last_profile is None
+    profiler.end(profiler.begin())
+    assert profiler.status() == {"remaining": 0, "active": 0, "mode": None, "last_profile": profiler.last_profile}
+    assert pstats.Stats(profiler.last_profile).total_calls > 0
+
+
+def test_profile_block_skips_while_a_request_is_captured(tmp_path, exclusive_cprofile):
+    profiler = RequestProfiler(config(tmp_path))
+    profiler.arm(1)
+    token = profiler.begin()
+    with profile_block("training", enabled=True, config=config(tmp_path)) as session:
+        assert session is None
+    profiler.end(token)
+    assert os.listdir(tmp_path) == [os.path.basename(profiler.last_profile)]
+
+
+@pytest.fixture
+def app_client(monkeypatch, tmp_path, registry):
+    import app as app_module
+
+    monkeypatch.setattr(app_module.predict_pipeline, "registry", registry)
+    monkeypatch.setattr(app_module, "request_profiler", RequestProfiler(config(tmp_path, admin_token="secret")))
+    return app_module.app.test_client()
+
+
+def test_admin_route_needs_the_token(app_client, monkeypatch):
+    import app as app_module
+
+    assert app_client.post("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert app_client.get("/admin/profile").status_code == 403
+    monkeypatch.setattr(app_module.request_profiler.config, "admin_token", "")
+    assert app_client.get("/admin/profile", headers={"X-Admin-Token": ""}).status_code == 404
+    assert app_module.request_profiler.remaining == 0
+
+
+def test_admin_route_captures_the_next_requests(app_client, tmp_path):
+    headers = {"X-Admin-Token": "secret"}
+    bad = app_client.post("/admin/profile", json={"requests": 0}, headers=headers)
+    assert bad.status_code == 400
+    armed = app_client.post("/admin/profile", json={"requests": 2, "mode": "cprofile"}, headers=headers).get_json()
+    assert armed["remaining"] == 2 and armed["mode"] == "cprofile"
+
+    for _ in range(2):
+        assert app_client.post("/predictdata", data=FORM).status_code == 200
+    status = app_client.get("/admin/profile", headers=headers).get_json()
+    assert status["remaining"] == 0 and status["mode"] is None
+    assert os.path.dirname(status["last_profile"]) == str(tmp_path)
+    functions = {function for _, _, function in pstats.Stats(status["last_profile"]).stats}
+    assert "predict" in functions
@@ -0,0 +1,23 @@
+from src.pipepline.predict_pipeline import PredictPipeline, PredictPipelineConfig
+from src.pipepline.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.pipepline.readiness import ReadinessConfig, ReadinessProbe
+
+
+def test_probe_does_not_count_as_traffic(registry):
+    pipeline = PredictPipeline(
+        registry=registry,
+        config=PredictPipelineConfig(lookup_table=True, prediction_table_path=registry.artifacts_dir + "/prediction_table.npy"),
+        cache=PredictionCache(PredictionCacheConfig(enabled=True)),
+    )
+    probe = ReadinessProbe(pipeline, ReadinessConfig(canary_interval=60))
+    ready, report = probe.check()
+    assert ready and report["canary"]["ok"]
+    hits, lookups, cache = registry.stats()["hits"], dict(pipeline.lookup_stats), pipeline.cache.stats()
+
+    probe.config.canary_interval = 1e-9
+    for _ in range(3):
+        ready, report = probe.check()
+        assert ready
+    assert registry.stats()["hits"] == hits
+    assert pipeline.lookup_stats == lookups
+    assert pipeline.cache.stats() == cache
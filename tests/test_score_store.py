@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from src.components.model_search import ModelSearch, ModelSearchConfig
+from src.components.score_store import ScoreStore
+
+
+class FlakyRegression(LinearRegression):
+    '''Fails to fit without an intercept while `fail_marker` exists, like a worker that ran out of memory.'''
+
+    def __init__(self, fit_intercept=True, fail_marker=""):
+        super().__init__(fit_intercept=fit_intercept)
+        self.fail_marker = fail_marker
+
+    def fit(self, X, y, sample_weight=None):
+        if not self.fit_intercept and os.path.exists(self.fail_marker):
+            raise MemoryError("transient failure")
+        return super().fit(X, y, sample_weight)
+
+
+def test_failed_scores_are_not_stored(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.sqlite"), {"data": "x"})
+    store.put_many([("ok", "m", {}, 10, 0, 0.5, 1.0), ("failed", "m", {}, 10, 1, np.nan, 1.0)])
+    # A failure stored by an earlier version of the store.
+    store._connection.execute("INSERT INTO cv_scores VALUES ('legacy', 'm', '{}', 10, 2, NULL, 1.0, 0)")
+    assert store.get_many(["ok", "failed", "legacy"]) == {"ok": (0.5, 1.0)}
+    store.close()
+
+
+def test_search_retries_a_failed_candidate(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 3))
+    y = X @ np.array([1.0, -2.0, 0.5]) + 3.0
+    marker = tmp_path / "fail"
+    marker.touch()
+    models = {"flaky": FlakyRegression(fail_marker=str(marker))}
+    param = {"flaky": {"fit_intercept": [True, False]}}
+    config = ModelSearchConfig(n_jobs=1, score_cache_path=str(tmp_path / "scores.sqlite"))
+
+    search = ModelSearch(models, param, config)
+    assert search.fit(X, y) == {"flaky": {"fit_intercept": True}}
+    assert search.timings_["flaky"] == dict(search.timings_["flaky"], fits=6, cached=0)
+
+    marker.unlink()
+    search = ModelSearch(models, param, config)
+    search.fit(X, y)
+    # The successful candidate comes from the store; the failed one is fitted again.
+    assert search.timings_["flaky"] == dict(search.timings_["flaky"], fits=3, cached=3)
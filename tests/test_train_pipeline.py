@@ -0,0 +1,86 @@
+import os
+import shutil
+from collections import Counter
+
+import pytest
+from sklearn.linear_model import Ridge
+
+from src.pipepline.train_pipeline import TrainPipeline
+
+from tests.conftest import SOURCE
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    '''A scratch working directory holding the source CSV; every artifact path is relative to it.'''
+    os.makedirs(tmp_path / "notebook" / "data")
+    shutil.copy(SOURCE, tmp_path / "notebook" / "data" / "stud.csv")
+    monkeypatch.chdir(tmp_path)
+    # The prediction table takes seconds to build and is not a cached stage.
+    monkeypatch.setattr(TrainPipeline, "run_prediction_table", lambda self, manifest: None)
+    return tmp_path
+
+
+def run(executed, alphas=(0.1, 1.0), test_size=0.2):
+    '''One training run with a small search; counts the stages that actually executed.'''
+    pipeline = TrainPipeline()
+    pipeline.config.publish_artifacts = False
+    pipeline.data_ingestion.ingestion_config.test_size = test_size
+    trainer = pipeline.model_trainer
+    trainer.model_trainer_config.search_n_jobs = 1
+    trainer.get_models = lambda: {"Ridge": Ridge()}
+    trainer.get_params = lambda: {"Ridge": {"alpha": list(alphas)}}
+
+    def counted(stage, fn):
+        def wrapper(*args, **kwargs):
+            executed[stage] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    pipeline.data_ingestion.initiate_data_ingestion = counted(
+        "ingestion", pipeline.data_ingestion.initiate_data_ingestion)
+    pipeline.data_transformation.initiate_data_transformation = counted(
+        "transformation", pipeline.data_transformation.initiate_data_transformation)
+    trainer.initiate_model_trainer = counted("training", trainer.initiate_model_trainer)
+    return pipeline.initiate_training()
+
+
+def test_unchanged_rerun_executes_no_stage(workdir):
+    executed = Counter()
+    first = run(executed)
+    assert executed == {"ingestion": 1, "transformation": 1, "training": 1}
+
+    executed.clear()
+    assert run(executed) == pytest.approx(first)
+    assert sum(executed.values()) == 0
+    assert os.path.exists(os.path.join("artifacts", "model.pkl"))
+
+
+def test_changed_parameter_reruns_only_training(workdir):
+    executed = Counter()
+    run(executed)
+    executed.clear()
+    run(executed, alphas=(0.1, 1.0, 10.0))
+    assert executed == {"training": 1}
+
+
+def test_changed_config_reruns_every_stage(workdir):
+    executed = Counter()
+    run(executed)
+    executed.clear()
+    run(executed, test_size=0.25)
+    assert executed == {"ingestion": 1, "transformation": 1, "training": 1}
+
+
+def test_changed_source_reruns_every_stage(workdir):
+    executed = Counter()
+    run(executed)
+    source = os.path.join("notebook", "data", "stud.csv")
+    with open(source) as file_obj:
+        last_row = file_obj.read().rstrip("\n").rsplit("\n", 1)[-1]
+    with open(source, "a") as file_obj:
+        file_obj.write(last_row.replace("female", "male", 1) + "\n")
+
+    executed.clear()
+    run(executed)
+    assert executed == {"ingestion": 1, "transformation": 1, "training": 1}